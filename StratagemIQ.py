@@ -1,19 +1,3090 @@
 import tkinter as tk
 from tkinter import ttk, simpledialog, messagebox, scrolledtext
 import json
-from kiteconnect import KiteConnect
+import sqlite3
+from kiteconnect import KiteConnect, KiteTicker
+from kiteconnect.exceptions import NetworkException, DataException
+from twisted.internet import reactor
 from PIL import Image, ImageTk
 import threading
 import time
 import requests
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import multiprocessing
+from multiprocessing import shared_memory
 import os
-from datetime import datetime
+import atexit
+import itertools
+import random
+import heapq
+import csv
+import io
+from collections import OrderedDict, deque
+from urllib.parse import quote
+from datetime import datetime, timedelta
 import webbrowser
+from abc import ABC, abstractmethod
 import ta
 import numpy as np
 import pandas as pd
 from pandas import DataFrame
 
+# Kite quote API accepts at most 500 instruments per request
+QUOTE_BATCH_SIZE = 500
+
+# Optional overrides so the app can run against mock_ticker_server.py offline
+TICKER_URL = os.environ.get("KITE_TICKER_URL")
+INSTRUMENTS_URL = os.environ.get("KITE_INSTRUMENTS_URL", "https://api.kite.trade/instruments")
+
+# Kite publishes a fresh instrument dump once a day, before the 08:30 IST cut-off
+INSTRUMENTS_CACHE_FILE = "instruments.cache"
+INSTRUMENTS_REFRESH_TIME = (8, 30)
+
+# Delay after the last keystroke before the suggestion box is searched
+SEARCH_DEBOUNCE_MS = 120
+
+# Historical candles: one append-only file per symbol and interval under this directory
+HISTORY_DIR = "history"
+
+# In-memory budget for cached candle series and values derived from them
+HISTORY_CACHE_BYTES = 256 * 1024 * 1024
+
+# Backtests replay this much stored history by default; the Backtest dialog offers the other lookbacks
+BACKTEST_DAYS = 365
+BACKTEST_LOOKBACKS = (30, 90, 365, 730, 1825)
+
+# NSE cash market session, as (hour, minute)
+MARKET_OPEN = (9, 15)
+MARKET_CLOSE = (15, 30)
+
+# Strategy timeframes (Kite candle intervals) -> days of history loaded to warm up indicators
+STRATEGY_TIMEFRAMES = {"minute": 5, "5minute": 10, "15minute": 30, "60minute": 60, "day": 365}
+
+# Seconds to wait after a bar closes before evaluating it, so the broker has published it
+BAR_CLOSE_DELAY = 3
+
+# Candles kept per symbol and timeframe when building them from live ticks
+LIVE_CANDLE_BARS = 500
+
+# Kite accepts at most 10 orders per second per account; the window is padded for the time a
+# request takes to leave after it is let through
+ORDER_RATE_PER_SECOND = 10
+ORDER_RATE_MARGIN = 0.05
+# Enough workers for one order to each of a few dozen mirrored accounts at once
+ORDER_WORKERS = 32
+ORDER_RETRIES = 3
+
+# Holdings and positions are re-read from the API this often, or sooner after a fill
+PORTFOLIO_TTL = 300
+# Seconds after placing an order to re-read accounts whose fills are not streamed
+PORTFOLIO_FILL_RECHECK = 15
+
+# Kite REST calls: (connect, read) timeout in seconds, keep-alive connections kept per host,
+# retries of read-only calls, and consecutive failures that open an endpoint's circuit for a cool-down
+API_TIMEOUT = (3.05, 10)
+API_POOL_SIZE = 32
+API_RETRIES = 2
+CIRCUIT_FAILURES = 5
+CIRCUIT_COOLDOWN = 30
+
+# Transaction log: JSON lines written in batches by a background thread, rotated by size
+TRANSACTION_LOG_FILE = "transactions.jsonl"
+LOG_FLUSH_SECONDS = 1.0
+LOG_FLUSH_RECORDS = 256
+LOG_ROTATE_BYTES = 64 * 1024 * 1024
+
+# Sidecar indexes of rotated log segments, rows per page in the audit viewer, and bytes read per indexing step
+AUDIT_INDEX_DIR = "transactions.index"
+AUDIT_PAGE_SIZE = 200
+AUDIT_READ_BYTES = 4 * 1024 * 1024
+
+# Accounts, wishlists and strategies live in an SQLite database; edits are written this long after the first unsaved change
+DATABASE_FILE = "stratagemiq.db"
+SAVE_DELAY_SECONDS = 1.0
+
+# Failures that may clear on retry: dropped connections, timeouts, 429/5xx and garbled responses
+RETRYABLE_ERRORS = (NetworkException, DataException, requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout)
+
+# Strategies with at least this many instruments are evaluated as one matrix
+BATCH_EVALUATION_MIN_SYMBOLS = 20
+
+
+class TickStream:
+    """Streams live ticks from the Kite WebSocket.
+
+    Keeps the socket subscribed to exactly the symbols in the wishlists and
+    hands every batch of ticks to the registered listeners. KiteTicker runs
+    its own reactor thread; subscription changes are marshalled onto it.
+    """
+
+    def __init__(self, api_key, access_token, root=None):
+        self.api_key = api_key
+        self.access_token = access_token
+        self.root = root
+        self.ticker = None
+        self.tokens = {}          # tradingsymbol -> instrument token
+        self.symbols = {}         # instrument token -> tradingsymbol
+        self.wanted = set()       # tokens the wishlists need
+        self.subscribed = set()   # tokens the socket currently has
+        self.listeners = []
+        self.order_listeners = []
+        self.lock = threading.Lock()
+
+    def set_instruments(self, registry):
+        """Build the symbol/token maps for NSE instruments from an InstrumentRegistry"""
+        rows = registry.exchange_indices("NSE")
+        symbols = registry.text("tradingsymbol", rows)
+        tokens = dict(zip(symbols, registry.columns["instrument_token"][rows].tolist()))
+
+        with self.lock:
+            self.tokens = tokens
+            self.symbols = {token: symbol for symbol, token in tokens.items()}
+
+    def add_listener(self, callback):
+        """Register callback(ticks) to receive every batch of ticks"""
+        self.listeners.append(callback)
+
+    def add_order_listener(self, callback):
+        """Register callback(order) to receive the account's order updates"""
+        self.order_listeners.append(callback)
+
+    def start(self):
+        kwargs = {"reconnect": True, "reconnect_max_tries": 300, "reconnect_max_delay": 60}
+        if self.root:
+            kwargs["root"] = self.root
+        self.ticker = KiteTicker(self.api_key, self.access_token, **kwargs)
+        self.ticker.on_ticks = self._on_ticks
+        self.ticker.on_connect = self._on_connect
+        self.ticker.on_close = self._on_close
+        self.ticker.on_error = self._on_error
+        self.ticker.on_reconnect = self._on_reconnect
+        self.ticker.on_noreconnect = self._on_noreconnect
+        self.ticker.on_order_update = self._on_order_update
+        self.ticker.connect(threaded=True)
+
+    def stop(self):
+        if self.ticker:
+            self.ticker.stop_retry()
+            self.ticker.close()
+
+    def is_connected(self):
+        return self.ticker is not None and self.ticker.is_connected()
+
+    def update_subscriptions(self, symbols):
+        """Subscribe/unsubscribe so the socket carries exactly these symbols"""
+        with self.lock:
+            self.wanted = {self.tokens[s] for s in symbols if s in self.tokens}
+        if self.is_connected():
+            reactor.callFromThread(self._sync_subscriptions)
+
+    def _sync_subscriptions(self):
+        if not self.is_connected():
+            return
+
+        with self.lock:
+            to_add = sorted(self.wanted - self.subscribed)
+            to_remove = sorted(self.subscribed - self.wanted)
+
+        try:
+            if to_add:
+                self.ticker.subscribe(to_add)
+                self.ticker.set_mode(self.ticker.MODE_QUOTE, to_add)
+            if to_remove:
+                self.ticker.unsubscribe(to_remove)
+            with self.lock:
+                self.subscribed.update(to_add)
+                self.subscribed.difference_update(to_remove)
+        except Exception as e:
+            print(f"Error updating tick subscriptions: {str(e)}")
+
+    def _on_connect(self, ws, response):
+        # A fresh socket has no subscriptions; resubscribe everything we need
+        with self.lock:
+            self.subscribed = set()
+        self._sync_subscriptions()
+
+    def _on_close(self, ws, code, reason):
+        with self.lock:
+            self.subscribed = set()
+
+    def _on_error(self, ws, code, reason):
+        print(f"Ticker error {code}: {reason}")
+
+    def _on_reconnect(self, ws, attempts_count):
+        print(f"Ticker reconnecting (attempt {attempts_count})")
+
+    def _on_noreconnect(self, ws):
+        print("Ticker gave up reconnecting; falling back to REST quotes")
+
+    def _on_order_update(self, ws, order):
+        for listener in self.order_listeners:
+            try:
+                listener(order)
+            except Exception as e:
+                print(f"Error in order listener: {str(e)}")
+
+    def _on_ticks(self, ws, ticks):
+        published = []
+        for tick in ticks:
+            symbol = self.symbols.get(tick.get("instrument_token"))
+            if symbol:
+                tick["tradingsymbol"] = symbol
+                published.append(tick)
+
+        if not published:
+            return
+
+        for listener in self.listeners:
+            try:
+                listener(published)
+            except Exception as e:
+                print(f"Error in tick listener: {str(e)}")
+
+
+class InstrumentRegistry:
+    """Columnar, memory-compact store for the Kite instrument master.
+
+    Each CSV column is one NumPy array: numbers as fixed-width ints/floats,
+    free text as byte strings, and exchange/segment/instrument_type as small
+    integer codes into a category table. Lookups by tradingsymbol and
+    instrument_token are binary searches over sorted key arrays, so no
+    per-row Python objects are kept alive.
+    """
+
+    FIELDS = ("instrument_token", "exchange_token", "tradingsymbol", "name", "last_price",
+              "expiry", "strike", "tick_size", "lot_size", "instrument_type", "segment", "exchange")
+    NUMERIC_COLUMNS = {
+        "instrument_token": np.int64,
+        "exchange_token": np.int32,
+        "last_price": np.float32,
+        "strike": np.float32,
+        "tick_size": np.float32,
+        "lot_size": np.int32
+    }
+    TEXT_COLUMNS = ("tradingsymbol", "name", "expiry")
+    CATEGORY_COLUMNS = ("instrument_type", "segment", "exchange")
+
+    def __init__(self, columns):
+        self.columns = columns
+        self._exchange_rows = {}
+        self._build_indexes()
+
+    @classmethod
+    def empty(cls):
+        return cls.from_rows(cls.FIELDS, [])
+
+    @classmethod
+    def from_csv(cls, text):
+        """Parse the instruments CSV with a real CSV reader (names may be quoted)"""
+        reader = csv.reader(io.StringIO(text))
+        header = next(reader, None)
+        if not header:
+            return cls.empty()
+        return cls.from_rows(header, (row for row in reader if len(row) == len(header)))
+
+    @classmethod
+    def from_rows(cls, header, rows):
+        # Transpose rows into columns in one pass
+        raw = dict(zip(header, zip(*rows)))
+
+        columns = {}
+        for name in cls.FIELDS:
+            values = raw.get(name, [])
+            if name in cls.NUMERIC_COLUMNS:
+                dtype = cls.NUMERIC_COLUMNS[name]
+                columns[name] = np.array([float(v) if v else 0.0 for v in values], dtype=np.float64).astype(dtype)
+            elif name in cls.CATEGORY_COLUMNS:
+                categories, codes = np.unique(np.array(values, dtype=str), return_inverse=True)
+                columns[name] = codes.astype(np.uint16)
+                columns[name + "_categories"] = categories
+            else:
+                columns[name] = np.array([v.encode("utf-8") for v in values], dtype=bytes)
+        return cls(columns)
+
+    @classmethod
+    def load(cls, file):
+        with np.load(file, allow_pickle=False) as data:
+            return cls({name: data[name] for name in data.files})
+
+    def save(self, file):
+        np.savez(file, **self.columns)
+
+    def _build_indexes(self):
+        codes = self.columns["exchange"]
+        exchanges = np.char.encode(self.columns["exchange_categories"], "utf-8")
+        exchange_names = exchanges[codes] if len(codes) else np.array([], dtype=bytes)
+
+        # "NSE:RELIANCE" style keys, sorted for binary search
+        keys = np.char.add(np.char.add(exchange_names, b":"), self.columns["tradingsymbol"])
+        self._key_order = np.argsort(keys, kind="stable")
+        self._sorted_keys = keys[self._key_order]
+
+        tokens = self.columns["instrument_token"]
+        self._token_order = np.argsort(tokens, kind="stable")
+        self._sorted_tokens = tokens[self._token_order]
+
+    def __len__(self):
+        return len(self.columns["instrument_token"])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.record(i)
+
+    @property
+    def nbytes(self):
+        arrays = list(self.columns.values()) + [self._key_order, self._sorted_keys,
+                                                self._token_order, self._sorted_tokens]
+        return sum(array.nbytes for array in arrays)
+
+    def record(self, i):
+        """One row as a dict of strings, matching the CSV columns"""
+        record = {}
+        for name in self.FIELDS:
+            value = self.columns[name][i]
+            if name in self.CATEGORY_COLUMNS:
+                record[name] = str(self.columns[name + "_categories"][value])
+            elif name in self.TEXT_COLUMNS:
+                record[name] = value.decode("utf-8")
+            elif name in ("last_price", "strike", "tick_size"):
+                record[name] = f"{float(value):g}"
+            else:
+                record[name] = str(int(value))
+        return record
+
+    def text(self, name, rows=None):
+        """Decoded values of a text column, optionally for selected rows"""
+        values = self.columns[name] if rows is None else self.columns[name][rows]
+        return [value.decode("utf-8") for value in values.tolist()]
+
+    def find(self, tradingsymbol, exchange="NSE"):
+        """Row index for exchange:tradingsymbol, or None"""
+        key = f"{exchange}:{tradingsymbol}".encode("utf-8")
+        pos = int(np.searchsorted(self._sorted_keys, key))
+        if pos < len(self._sorted_keys) and self._sorted_keys[pos] == key:
+            return int(self._key_order[pos])
+        return None
+
+    def by_token(self, instrument_token):
+        """Row index for an instrument token, or None"""
+        pos = int(np.searchsorted(self._sorted_tokens, instrument_token))
+        if pos < len(self._sorted_tokens) and self._sorted_tokens[pos] == instrument_token:
+            return int(self._token_order[pos])
+        return None
+
+    def exchange_indices(self, exchange):
+        """Row indices for every instrument on an exchange"""
+        if exchange not in self._exchange_rows:
+            categories = self.columns["exchange_categories"]
+            match = np.flatnonzero(categories == exchange)
+            if len(match):
+                rows = np.flatnonzero(self.columns["exchange"] == match[0])
+            else:
+                rows = np.array([], dtype=np.int64)
+            self._exchange_rows[exchange] = rows
+        return self._exchange_rows[exchange]
+
+
+class InstrumentSearchIndex:
+    """Prebuilt search index over tradingsymbol and name.
+
+    Rows are renumbered in rank order: liquid segments first, then by
+    symbol. Within each liquidity tier the symbols and the names form
+    sorted arrays, so prefix queries are binary searches. Substring queries
+    intersect trigram posting lists. Those lists are sorted in rank order
+    too, so verification stops as soon as enough hits are found. Results
+    come back ranked as exact symbol match, then symbol prefix, then name
+    prefix, then substring.
+    """
+
+    # Lower is more liquid; anything else ranks after these
+    SEGMENT_PRIORITY = {"NSE": 0, "BSE": 1, "INDICES": 2, "NFO-FUT": 3, "NFO-OPT": 4,
+                        "BFO-FUT": 5, "BFO-OPT": 6, "CDS-FUT": 7, "MCX-FUT": 8}
+    CHUNK = 256
+
+    def __init__(self, registry):
+        self.registry = registry
+        columns = registry.columns
+
+        segments = columns["segment_categories"]
+        default = len(self.SEGMENT_PRIORITY)
+        segment_rank = np.array([self.SEGMENT_PRIORITY.get(str(name), default) for name in segments],
+                                dtype=np.int16)
+        priority = segment_rank[columns["segment"]] if len(registry) else np.array([], dtype=np.int16)
+
+        # Position i in the index is registry row self.rows[i]
+        symbols = columns["tradingsymbol"]
+        names = columns["name"]
+        self.rows = np.lexsort((symbols, priority))
+        self.symbols = symbols[self.rows]
+        self.names = names[self.rows]
+        self.priority = priority[self.rows]
+
+        # Tier boundaries; each tier's slice of self.symbols is already sorted
+        tiers, starts = np.unique(self.priority, return_index=True)
+        bounds = list(starts) + [len(self.rows)]
+        self.tiers = [(bounds[i], bounds[i + 1]) for i in range(len(tiers))]
+
+        # Names sorted within each tier
+        self.name_positions = np.lexsort((self.names, self.priority))
+        self.sorted_names = self.names[self.name_positions]
+
+        self._build_trigrams()
+
+    @staticmethod
+    def _trigram_pairs(values):
+        """(trigram code, position) for every trigram of a fixed-width byte array"""
+        width = values.dtype.itemsize
+        if len(values) == 0 or width < 3:
+            return np.array([], dtype=np.int64)
+        chars = values.view(np.uint8).reshape(len(values), width).astype(np.int64)
+        codes = (chars[:, :-2] << 16) | (chars[:, 1:-1] << 8) | chars[:, 2:]
+        valid = chars[:, 2:] != 0  # Padding is trailing NULs
+        positions = np.broadcast_to(np.arange(len(values), dtype=np.int64)[:, None], codes.shape)
+        return (codes[valid] << 32) | positions[valid]
+
+    def _build_trigrams(self):
+        pairs = np.concatenate([self._trigram_pairs(self.symbols), self._trigram_pairs(self.names)])
+        pairs.sort()
+        if len(pairs):
+            pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))]
+
+        # CSR layout: postings for trigram_codes[i] are postings[starts[i]:starts[i + 1]]
+        codes = pairs >> 32
+        self.postings = (pairs & 0xFFFFFFFF).astype(np.int32)
+        boundaries = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+        self.trigram_starts = np.concatenate(([0], boundaries, [len(pairs)])) if len(pairs) else np.array([0])
+        self.trigram_codes = codes[self.trigram_starts[:-1]]
+
+    def _posting(self, trigram):
+        code = (trigram[0] << 16) | (trigram[1] << 8) | trigram[2]
+        i = int(np.searchsorted(self.trigram_codes, code))
+        if i == len(self.trigram_codes) or self.trigram_codes[i] != code:
+            return None
+        return self.postings[self.trigram_starts[i]:self.trigram_starts[i + 1]]
+
+    @staticmethod
+    def _prefix_range(sorted_values, prefix):
+        # A key wider than the column would make NumPy copy the whole array
+        width = sorted_values.dtype.itemsize
+        if len(prefix) > width:
+            return 0, 0
+        lo = int(np.searchsorted(sorted_values, prefix, side="left"))
+        if len(prefix) == width:
+            hi = int(np.searchsorted(sorted_values, prefix, side="right"))
+        else:
+            hi = int(np.searchsorted(sorted_values, prefix + b"\xff", side="left"))
+        return lo, hi
+
+    def search(self, query, limit=20):
+        """Registry row indices matching query, best first"""
+        needle = query.strip().upper().encode("utf-8")
+        if not needle:
+            return []
+
+        results = []
+        seen = set()
+
+        def take(positions):
+            for position in positions:
+                position = int(position)
+                if position not in seen:
+                    seen.add(position)
+                    results.append(position)
+                    if len(results) >= limit:
+                        return True
+            return False
+
+        # Exact symbol matches, then symbol prefixes, tier by tier
+        exact = []
+        prefixed = []
+        for start, end in self.tiers:
+            lo, hi = self._prefix_range(self.symbols[start:end], needle)
+            if lo == hi:
+                continue
+            eq = int(np.searchsorted(self.symbols[start:end][lo:hi], needle, side="right"))
+            exact.extend(range(start + lo, start + lo + eq))
+            prefixed.append((start + lo, start + hi))
+
+        done = take(exact)
+        for lo, hi in prefixed:
+            if done:
+                break
+            done = take(range(lo, min(hi, lo + limit)))
+
+        # Name prefixes
+        if not done:
+            for start, end in self.tiers:
+                lo, hi = self._prefix_range(self.sorted_names[start:end], needle)
+                if take(self.name_positions[start + lo:start + min(hi, lo + limit)]):
+                    done = True
+                    break
+
+        # Substrings via trigram intersection, verified in rank order
+        if not done and len(needle) >= 3:
+            postings = []
+            for trigram in {needle[i:i + 3] for i in range(len(needle) - 2)}:
+                posting = self._posting(trigram)
+                if posting is None:
+                    postings = []
+                    break
+                postings.append(posting)
+
+            if postings:
+                # Intersect only while the candidate list is long; verification does the rest
+                postings.sort(key=len)
+                candidates = postings[0]
+                for posting in postings[1:]:
+                    if len(candidates) <= 4 * self.CHUNK:
+                        break
+                    candidates = np.intersect1d(candidates, posting, assume_unique=True)
+
+                for chunk_start in range(0, len(candidates), self.CHUNK):
+                    chunk = candidates[chunk_start:chunk_start + self.CHUNK]
+                    hits = (np.char.find(self.symbols[chunk], needle) >= 0) | \
+                           (np.char.find(self.names[chunk], needle) >= 0)
+                    if take(chunk[hits]):
+                        break
+
+        return [int(self.rows[position]) for position in results]
+
+
+class InstrumentCache:
+    """Local copy of the Kite instrument master.
+
+    The columns of an InstrumentRegistry are stored as an uncompressed .npz,
+    a fraction of the size of the CSV, that loads in milliseconds. A small
+    JSON sidecar records the trading day, ETag and Last-Modified of the
+    download. The cache counts as fresh for the trading day it was fetched
+    on. After that, refresh() does a conditional GET, so an unchanged dump
+    costs a 304.
+    """
+
+    VERSION = 2
+
+    def __init__(self, path=INSTRUMENTS_CACHE_FILE, url=INSTRUMENTS_URL, session=None):
+        self.path = path
+        self.meta_path = path + ".json"
+        self.url = url
+        self.session = session or requests
+        self.meta = {}
+
+    @staticmethod
+    def trading_day(now=None):
+        """The trading day whose instrument dump is current at `now`"""
+        now = now or datetime.now()
+        day = now.date()
+        if (now.hour, now.minute) < INSTRUMENTS_REFRESH_TIME:
+            day -= timedelta(days=1)
+        while day.weekday() >= 5:  # Weekend: Friday's dump still applies
+            day -= timedelta(days=1)
+        return day.isoformat()
+
+    def is_fresh(self):
+        return self.meta.get("trading_day") == self.trading_day()
+
+    def load(self):
+        """Return the cached InstrumentRegistry, or None if there is no usable cache"""
+        try:
+            with open(self.meta_path, "r") as file:
+                self.meta = json.load(file)
+            if self.meta.get("version") != self.VERSION:
+                self.meta = {}
+                return None
+            with open(self.path, "rb") as file:
+                return InstrumentRegistry.load(file)
+        except FileNotFoundError:
+            self.meta = {}
+            return None
+        except Exception as e:
+            print(f"Error loading instrument cache: {str(e)}")
+            self.meta = {}
+            return None
+
+    def refresh(self):
+        """Re-download the master if it changed; returns a new registry or None if unchanged"""
+        headers = {}
+        if self.meta.get("etag"):
+            headers["If-None-Match"] = self.meta["etag"]
+        if self.meta.get("last_modified"):
+            headers["If-Modified-Since"] = self.meta["last_modified"]
+
+        response = self.session.get(self.url, headers=headers, timeout=(API_TIMEOUT[0], 60))
+        if response.status_code == 304:
+            self.meta["trading_day"] = self.trading_day()
+            self._write_atomic(self.meta_path, json.dumps(self.meta).encode("utf-8"))
+            return None
+        response.raise_for_status()
+
+        registry = InstrumentRegistry.from_csv(response.text)
+
+        payload = io.BytesIO()
+        registry.save(payload)
+        self._write_atomic(self.path, payload.getvalue())
+
+        self.meta = {
+            "version": self.VERSION,
+            "trading_day": self.trading_day(),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "count": len(registry)
+        }
+        self._write_atomic(self.meta_path, json.dumps(self.meta).encode("utf-8"))
+
+        return registry
+
+    def _write_atomic(self, path, payload):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(payload)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+
+
+class CandleStore:
+    """Append-only OHLCV candles on disk, one flat binary file per symbol and interval.
+
+    A file is a run of fixed-size DTYPE records in time order, so it can be
+    memory-mapped as a structured array and new candles are added with a
+    plain append. A torn record left at the end by a crash is ignored on
+    read and cut off before the next append.
+    """
+
+    DTYPE = np.dtype([("date", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"),
+                      ("close", "<f8"), ("volume", "<i8")])
+
+    def __init__(self, directory=HISTORY_DIR):
+        self.directory = directory
+        self.lock = threading.Lock()
+
+    def path(self, symbol, interval, exchange="NSE"):
+        return os.path.join(self.directory, interval, f"{exchange}_{quote(symbol, safe='')}.bin")
+
+    def read(self, symbol, interval, exchange="NSE"):
+        """Stored candles as a read-only structured array (memory-mapped when non-empty)"""
+        path = self.path(symbol, interval, exchange)
+        try:
+            count = os.path.getsize(path) // self.DTYPE.itemsize
+        except FileNotFoundError:
+            count = 0
+        if count == 0:
+            return np.empty(0, dtype=self.DTYPE)
+        return np.memmap(path, dtype=self.DTYPE, mode="r", shape=(count,))
+
+    def append(self, symbol, interval, records, exchange="NSE"):
+        """Append candles newer than the last stored one; returns how many were written"""
+        path = self.path(symbol, interval, exchange)
+        with self.lock:
+            stored = self.read(symbol, interval, exchange)
+            if len(stored):
+                records = records[records["date"] > stored["date"][-1]]
+            del stored
+            if not len(records):
+                return 0
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "ab") as file:
+                size = file.tell()
+                if size % self.DTYPE.itemsize:
+                    file.truncate(size - size % self.DTYPE.itemsize)
+                file.write(records.astype(self.DTYPE).tobytes())
+                file.flush()
+                os.fsync(file.fileno())
+        return len(records)
+
+    def prepend(self, symbol, interval, records, exchange="NSE"):
+        """Insert candles older than the first stored one, rewriting the file atomically"""
+        path = self.path(symbol, interval, exchange)
+        with self.lock:
+            stored = np.array(self.read(symbol, interval, exchange))
+            if len(stored):
+                records = records[records["date"] < stored["date"][0]]
+            if not len(records):
+                return 0
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as file:
+                file.write(records.astype(self.DTYPE).tobytes())
+                file.write(stored.tobytes())
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, path)
+        return len(records)
+
+
+class HistoricalData:
+    """OHLCV candles from Kite's historical API, kept in a local CandleStore.
+
+    The first request for a symbol and interval downloads the lookback
+    window in chunks no longer than Kite serves per call. Later requests
+    only fetch candles after the last stored one, at most once per interval.
+    Only completed candles are stored, so files are append-only except when
+    a longer lookback prepends older history.
+    """
+
+    # Longest date range Kite serves per historical_data call, by interval
+    MAX_DAYS = {"minute": 60, "3minute": 100, "5minute": 100, "10minute": 100,
+                "15minute": 200, "30minute": 200, "60minute": 400, "day": 2000}
+    INTERVAL_SECONDS = {"minute": 60, "3minute": 180, "5minute": 300, "10minute": 600,
+                        "15minute": 900, "30minute": 1800, "60minute": 3600, "day": 86400}
+    REQUEST_GAP = 0.35  # Kite allows about 3 historical requests per second
+    RETRY_BASE = 5.0    # Seconds before retrying a symbol whose fetch failed, doubling per failure
+    RETRY_CAP = 300.0
+
+    def __init__(self, store=None):
+        self.store = store or CandleStore()
+        self.lock = threading.Lock()
+        self.last_request = 0.0
+        self.checked = {}     # (exchange, symbol, interval) -> time of the last tail check
+        self.backfilled = {}  # (exchange, symbol, interval) -> earliest start already requested
+        self.failures = {}    # (exchange, symbol, interval) -> (failures in a row, time to retry after)
+
+    @staticmethod
+    def _epoch(value):
+        return int(np.datetime64(value, "s").astype(np.int64))
+
+    def is_due(self, symbol, interval="day", exchange="NSE"):
+        """True if a newer completed candle may be available from the API"""
+        failed = self.failures.get((exchange, symbol, interval))
+        if failed is not None and datetime.now() < failed[1]:
+            return False
+        checked = self.checked.get((exchange, symbol, interval))
+        return checked is None or datetime.now() - checked >= timedelta(seconds=self.INTERVAL_SECONDS[interval])
+
+    def candles(self, kite, instrument_token, symbol, interval="day", days=100, exchange="NSE"):
+        """DataFrame of the last `days` of candles, topping up the store first when possible"""
+        now = datetime.now()
+        start = now - timedelta(days=days)
+        key = (exchange, symbol, interval)
+        failed = self.failures.get(key)
+        # After a failure, leave the API alone until the backoff runs out rather than retry every pass
+        if kite is not None and instrument_token is not None and (failed is None or now >= failed[1]):
+            try:
+                due = self.is_due(symbol, interval, exchange)
+                self._update(kite, instrument_token, symbol, interval, exchange, start, now, due)
+                if due:
+                    self.checked[key] = now
+                self.failures.pop(key, None)
+            except Exception as e:
+                count = failed[0] + 1 if failed else 1
+                wait = self.RETRY_BASE + backoff_delay(count, base=self.RETRY_BASE, cap=self.RETRY_CAP)
+                self.failures[key] = (count, now + timedelta(seconds=wait))
+                print(f"Error fetching history for {symbol} ({interval}), retrying in {wait:.0f}s: {str(e)}")
+        return self.frame(symbol, interval, exchange, start)
+
+    def frame(self, symbol, interval="day", exchange="NSE", start=None):
+        """Stored candles from `start` onwards as a date-indexed DataFrame"""
+        stored = self.store.read(symbol, interval, exchange)
+        if start is not None:
+            stored = stored[np.searchsorted(stored["date"], self._epoch(start)):]
+        index = pd.DatetimeIndex(stored["date"].astype("datetime64[s]"), name="date")
+        return pd.DataFrame({name: np.array(stored[name]) for name in ("open", "high", "low", "close", "volume")},
+                            index=index)
+
+    def _update(self, kite, instrument_token, symbol, interval, exchange, start, now, due):
+        step = self.INTERVAL_SECONDS[interval]
+        key = (exchange, symbol, interval)
+        stored = self.store.read(symbol, interval, exchange)
+        if not len(stored):
+            del stored
+            self.backfilled[key] = self._epoch(start)
+            self.store.append(symbol, interval, self._download(kite, instrument_token, interval, start, now, now),
+                              exchange)
+            return
+
+        first, last = int(stored["date"][0]), int(stored["date"][-1])
+        del stored  # Release the mapping before the file is rewritten
+
+        # A gap of under a week before the first candle is just weekends/holidays
+        wanted = self._epoch(start)
+        if wanted < first - max(step, 7 * 86400) and wanted < self.backfilled.get(key, first):
+            self.backfilled[key] = wanted
+            end = pd.Timestamp(first - 1, unit="s").to_pydatetime()
+            self.store.prepend(symbol, interval, self._download(kite, instrument_token, interval, start, end, now),
+                               exchange)
+
+        # The candle after the last stored one is complete once another interval has passed
+        if due and last + 2 * step <= self._epoch(now):
+            tail_start = pd.Timestamp(last + step, unit="s").to_pydatetime()
+            self.store.append(symbol, interval, self._download(kite, instrument_token, interval, tail_start, now, now),
+                              exchange)
+
+    def _download(self, kite, instrument_token, interval, start, end, now):
+        """Fetch [start, end] in API-sized chunks; returns the candles completed by `now` as DTYPE records"""
+        candles = []
+        chunk = timedelta(days=self.MAX_DAYS[interval])
+        while start <= end:
+            chunk_end = min(start + chunk, end)
+            self._throttle()
+            candles.extend(kite.historical_data(instrument_token, start, chunk_end, interval))
+            start = chunk_end + timedelta(seconds=1)
+        return self._to_records(candles, interval, now)
+
+    def _throttle(self):
+        with self.lock:
+            wait = self.last_request + self.REQUEST_GAP - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self.last_request = time.monotonic()
+
+    def _to_records(self, candles, interval, now):
+        records = np.empty(len(candles), dtype=CandleStore.DTYPE)
+        if not candles:
+            return records
+        dates = pd.to_datetime([candle["date"] for candle in candles])
+        if dates.tz is not None:
+            dates = dates.tz_localize(None)  # Keep exchange (IST) wall-clock time
+        records["date"] = dates.values.astype("datetime64[s]").astype(np.int64)
+        for name in ("open", "high", "low", "close", "volume"):
+            records[name] = [candle[name] for candle in candles]
+
+        # Drop the still-forming candle and chunk-boundary duplicates
+        records = records[records["date"] + self.INTERVAL_SECONDS[interval] <= self._epoch(now)]
+        records.sort(order="date")
+        keep = np.ones(len(records), dtype=bool)
+        keep[1:] = records["date"][1:] != records["date"][:-1]
+        return records[keep]
+
+
+def _nbytes(value):
+    """Approximate memory held by a cached value"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True))
+    if isinstance(value, pd.Index):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sum(_nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_nbytes(item) for item in value)
+    return 64
+
+
+class HistoryCache:
+    """LRU cache of candle series, bounded by the bytes it holds.
+
+    A series is stored as read-only arrays, and get() wraps them in a new
+    DataFrame. A caller can add columns to its own frame, but writing into
+    the cached arrays raises. Results derived from a series, such as
+    backtests, live in a separate slot of the same entry, count against the
+    same budget, and are dropped when the series changes or is evicted.
+    """
+
+    def __init__(self, max_bytes=HISTORY_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> {"index", "columns", "derived", "nbytes"}
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        """The cached series as a DataFrame, or None"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return pd.DataFrame(entry["columns"], index=entry["index"], copy=False)
+
+    def put(self, key, frame):
+        """Cache a series and return the cached frame; an unchanged one keeps its derived results"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if (entry is not None and len(entry["index"]) == len(frame)
+                    and (not len(frame) or entry["index"][-1] == frame.index[-1])):
+                self.entries.move_to_end(key)
+                return pd.DataFrame(entry["columns"], index=entry["index"], copy=False)
+
+            columns = {}
+            for name in frame.columns:
+                values = np.array(frame[name].to_numpy(), copy=True)
+                values.flags.writeable = False
+                columns[name] = values
+            index = pd.DatetimeIndex(frame.index, copy=True)
+            size = index.nbytes + sum(values.nbytes for values in columns.values())
+
+            self._discard(key)
+            self.entries[key] = {"index": index, "columns": columns, "derived": {}, "nbytes": size}
+            self.nbytes += size
+            self._evict()
+        return pd.DataFrame(columns, index=index, copy=False)
+
+    def get_derived(self, key, name):
+        """A result derived from a cached series, or None"""
+        with self.lock:
+            entry = self.entries.get(key)
+            value = entry["derived"].get(name) if entry is not None else None
+            if value is None:
+                self.misses += 1
+            else:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            return value
+
+    def put_derived(self, key, name, value):
+        """Store a result derived from a cached series; ignored if the series is not cached"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return
+            size = _nbytes(value)
+            old = entry["derived"].get(name)
+            if old is not None:
+                size -= _nbytes(old)
+            entry["derived"][name] = value
+            entry["nbytes"] += size
+            self.nbytes += size
+            self._evict()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def _discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry["nbytes"]
+
+    def _evict(self):
+        # The newest entry stays even if it alone is over budget
+        while self.nbytes > self.max_bytes and len(self.entries) > 1:
+            key = next(iter(self.entries))
+            self._discard(key)
+            self.evictions += 1
+
+
+class CandleRing:
+    """Fixed-size ring of candles that reads back as one contiguous array.
+
+    Every candle is written twice, at slot i and i + capacity of a buffer
+    twice the capacity long, so the last n candles are always the slice
+    ending at the write position plus capacity: a view, never a copy. A
+    view's contents change once the ring wraps past it; copy to keep one.
+    """
+
+    def __init__(self, capacity=LIVE_CANDLE_BARS):
+        self.capacity = capacity
+        self.buffer = np.zeros(2 * capacity, dtype=CandleStore.DTYPE)
+        self.position = 0  # slot the next candle is written to
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, record):
+        self.buffer[self.position] = record
+        self.buffer[self.position + self.capacity] = record
+        self.position = (self.position + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def view(self, count=None):
+        """The last `count` candles, oldest first, as a read-only view"""
+        count = self.count if count is None else min(count, self.count)
+        end = self.position + self.capacity
+        view = self.buffer[end - count:end]
+        view.flags.writeable = False
+        return view
+
+
+class CandleAggregator:
+    """Builds OHLCV candles on several timeframes at once from live prices.
+
+    Intraday candles are aligned to the session open, as Kite's are, and
+    the day candle spans the session; prices outside market hours only mark
+    a symbol as seen. Closed candles go into a CandleRing per symbol and
+    timeframe. The candle already forming when a symbol's first price
+    arrives is dropped, since its open and volume were missed. Times are
+    exchange wall-clock seconds, like the CandleStore's.
+    """
+
+    EPOCH = datetime(1970, 1, 1)
+    SESSION_OPEN = MARKET_OPEN[0] * 3600 + MARKET_OPEN[1] * 60
+    SESSION_CLOSE = MARKET_CLOSE[0] * 3600 + MARKET_CLOSE[1] * 60
+
+    def __init__(self, timeframes=tuple(STRATEGY_TIMEFRAMES), capacity=LIVE_CANDLE_BARS):
+        self.timeframes = timeframes
+        self.capacity = capacity
+        self.rings = {}    # (symbol, timeframe) -> CandleRing of closed candles
+        self.forming = {}  # (symbol, timeframe) -> [start, end, open, high, low, close, volume, complete]
+        self.symbols = {}  # symbol -> [first seen, session day, cumulative day volume]
+        self.lock = threading.Lock()
+
+    def _bounds(self, timeframe, seconds):
+        """(start, end) of the candle holding an in-session time"""
+        day = seconds - seconds % 86400
+        if timeframe == "day":
+            return day, day + self.SESSION_CLOSE
+        step = HistoricalData.INTERVAL_SECONDS[timeframe]
+        session_open = day + self.SESSION_OPEN
+        start = session_open + (seconds - session_open) // step * step
+        return start, min(start + step, day + self.SESSION_CLOSE)
+
+    def add(self, symbol, price, volume=None, when=None):
+        """Fold a last price, and the day's cumulative volume if known, into the forming candles"""
+        seconds = int(((when or datetime.now()) - self.EPOCH).total_seconds())
+        day = seconds - seconds % 86400
+        with self.lock:
+            state = self.symbols.get(symbol)
+            if state is None:
+                state = self.symbols[symbol] = [seconds, day, volume or 0]
+            elif state[1] != day:
+                state[1], state[2] = day, 0  # New session: the day's volume starts again
+            traded = 0
+            if volume is not None:
+                traded = max(volume - state[2], 0)
+                state[2] = volume
+
+            if not day + self.SESSION_OPEN <= seconds < day + self.SESSION_CLOSE:
+                return
+
+            for timeframe in self.timeframes:
+                key = (symbol, timeframe)
+                bar = self.forming.get(key)
+                if bar is not None and seconds >= bar[1]:
+                    self._close(key, bar)
+                    bar = None
+                if bar is None:
+                    start, end = self._bounds(timeframe, seconds)
+                    ring = self.rings.get(key)
+                    if ring is not None and len(ring) and ring.view(1)["date"][0] >= start:
+                        continue  # Late price for a candle already closed by the clock
+                    complete = state[0] <= max(start, day + self.SESSION_OPEN)
+                    self.forming[key] = [start, end, price, price, price, price, traded, complete]
+                else:
+                    bar[3] = max(bar[3], price)
+                    bar[4] = min(bar[4], price)
+                    bar[5] = price
+                    bar[6] += traded
+
+    def add_ticks(self, ticks):
+        """Tick listener entry point: quote-mode ticks carry the day's cumulative volume"""
+        for tick in ticks:
+            self.add(tick["tradingsymbol"], tick["last_price"], tick.get("volume_traded"))
+
+    def close_bars(self, now=None):
+        """Close every forming candle whose period has ended, ticked or not"""
+        seconds = int(((now or datetime.now()) - self.EPOCH).total_seconds())
+        with self.lock:
+            for key, bar in list(self.forming.items()):
+                if bar[1] <= seconds:
+                    self._close(key, bar)
+
+    def _close(self, key, bar):
+        del self.forming[key]
+        if not bar[7]:
+            return
+        ring = self.rings.get(key)
+        if ring is None:
+            ring = self.rings[key] = CandleRing(self.capacity)
+        ring.append((bar[0], bar[2], bar[3], bar[4], bar[5], bar[6]))
+
+    def bars(self, symbol, timeframe, count=None):
+        """The last `count` closed candles as a read-only CandleStore.DTYPE view"""
+        with self.lock:
+            ring = self.rings.get((symbol, timeframe))
+            if ring is None:
+                return np.empty(0, dtype=CandleStore.DTYPE)
+            return ring.view(count)
+
+    def since(self, symbol, timeframe, after):
+        """A copy of the closed candles that started after epoch second `after`"""
+        with self.lock:
+            ring = self.rings.get((symbol, timeframe))
+            if ring is None or not len(ring) or ring.view(1)["date"][0] <= after:
+                return np.empty(0, dtype=CandleStore.DTYPE)
+            bars = ring.view()
+            return np.array(bars[np.searchsorted(bars["date"], after, side="right"):])
+
+    def continues(self, symbol, timeframe, last):
+        """True if the closed candles pick up no later than one interval after `last`"""
+        with self.lock:
+            ring = self.rings.get((symbol, timeframe))
+            if ring is None or not len(ring):
+                return False
+            first = int(ring.view()["date"][0])
+        return last is None or first <= HistoricalData._epoch(last) + HistoricalData.INTERVAL_SECONDS[timeframe]
+
+    def extend(self, symbol, timeframe, frame):
+        """`frame` with the closed candles newer than its last row appended"""
+        with self.lock:
+            ring = self.rings.get((symbol, timeframe))
+            if ring is None or not len(ring):
+                return frame
+            bars = ring.view()
+            if len(frame):
+                bars = bars[bars["date"] > HistoricalData._epoch(frame.index[-1])]
+            bars = np.array(bars)  # Copy out before the ring can wrap
+        if not len(bars):
+            return frame
+
+        live = pd.DataFrame({name: bars[name] for name in ("open", "high", "low", "close", "volume")},
+                            index=pd.DatetimeIndex(bars["date"].astype("datetime64[s]"), name="date"))
+        return pd.concat([frame, live]) if len(frame) else live
+
+
+def backoff_delay(attempt, base=0.5, cap=4.0):
+    """Exponential backoff with full jitter, so retrying threads spread out instead of stampeding"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Stops calls to an endpoint that keeps failing.
+
+    After `threshold` failures in a row the circuit opens and calls fail at
+    once. When the cool-down has passed, one trial call is let through: it
+    closes the circuit if it succeeds and restarts the cool-down if not.
+    """
+
+    def __init__(self, threshold=CIRCUIT_FAILURES, cooldown=CIRCUIT_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.trial or time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.trial = True
+            return True
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial = False
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial = False
+            if self.failures >= self.threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+class KiteClientPool:
+    """One Kite client per account over a single keep-alive HTTP session.
+
+    Every client shares the session's connection pool, so requests reuse
+    open TLS connections whichever account makes them. Circuit breakers
+    are kept per API route and shared by all accounts, because an endpoint
+    that is down is down for everyone.
+    """
+
+    def __init__(self, pool_size=API_POOL_SIZE):
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.breakers = {}  # route -> CircuitBreaker
+        self.lock = threading.Lock()
+
+    def client(self, api_key, access_token):
+        return PooledKiteConnect(self, api_key, access_token)
+
+    def breaker(self, route):
+        with self.lock:
+            breaker = self.breakers.get(route)
+            if breaker is None:
+                breaker = self.breakers[route] = CircuitBreaker()
+            return breaker
+
+
+class PooledKiteConnect(KiteConnect):
+    """KiteConnect on a KiteClientPool's session, with its timeouts, retries and circuit breakers.
+
+    Read-only (GET) calls are retried with jittered backoff. Other calls
+    are not, since an order may have gone through; OrderGateway retries
+    those with a tag check.
+    """
+
+    def __init__(self, pool, api_key, access_token=None):
+        super().__init__(api_key, access_token=access_token, timeout=API_TIMEOUT)
+        self.reqsession = pool.session
+        self.client_pool = pool
+
+    def _request(self, route, method, *args, **kwargs):
+        breaker = self.client_pool.breaker(route)
+        attempts = API_RETRIES + 1 if method == "GET" else 1
+        for attempt in range(attempts):
+            if attempt:
+                time.sleep(backoff_delay(attempt - 1))
+            if not breaker.allow():
+                raise NetworkException(f"Kite {route} is failing; calls paused for up to {breaker.cooldown}s")
+            try:
+                result = super()._request(route, method, *args, **kwargs)
+            except RETRYABLE_ERRORS:
+                breaker.failure()
+                if attempt + 1 == attempts:
+                    raise
+                continue
+            except Exception:
+                breaker.success()  # The API answered; the request itself was refused
+                raise
+            breaker.success()
+            return result
+
+
+class SendWindow:
+    """Rate limiter that lets at most `limit` calls through in any `window` seconds.
+
+    acquire() blocks until fewer than `limit` calls went through in the
+    last `window` seconds, then records the moment it returns, just before
+    the caller sends. Spacing is counted from those moments, so a caller
+    that woke up late can never crowd the calls after it. Callers sleep
+    outside the lock.
+    """
+
+    def __init__(self, limit, window=1.0):
+        self.limit = limit
+        self.window = window
+        self.sent = deque()  # monotonic times calls were let through, oldest first
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                while self.sent and now - self.sent[0] >= self.window:
+                    self.sent.popleft()
+                if len(self.sent) < self.limit:
+                    self.sent.append(now)
+                    return
+                wait = self.sent[0] + self.window - now
+            time.sleep(wait)
+
+
+class OrderGateway:
+    """Places orders on a worker pool, within each account's rate limit.
+
+    submit() queues an order and returns a Future of its order id at once.
+    Every order carries a unique tag. When a call fails in a way that may
+    still have reached the broker, the account's order book is searched
+    for the tag before placing again, so a retry never doubles an order.
+    """
+
+    def __init__(self, workers=ORDER_WORKERS, rate=ORDER_RATE_PER_SECOND, retries=ORDER_RETRIES):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="orders")
+        self.rate = rate
+        self.retries = retries
+        self.windows = {}  # account -> SendWindow
+        self.lock = threading.Lock()
+
+    def submit(self, account, kite, params, callback=None):
+        """Queue kite.place_order(**params) for an account; callback(future) runs on a worker thread"""
+        params = dict(params)
+        params.setdefault("tag", f"SIQ{random.getrandbits(64):016x}")  # Kite tags are up to 20 characters
+        future = self.executor.submit(self._place, account, kite, params)
+        if callback:
+            future.add_done_callback(callback)
+        return future
+
+    def submit_basket(self, orders, callback):
+        """Queue [(account, kite, params)] at once; callback({account: future}) runs when all have finished"""
+        futures = {}
+        remaining = [len(orders)]
+        lock = threading.Lock()
+
+        def finished(future):
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                callback(futures)
+
+        for account, kite, params in orders:
+            futures[account] = self.submit(account, kite, params)
+        # Attach only once every order is in, so the callback sees them all
+        for future in list(futures.values()):
+            future.add_done_callback(finished)
+        if not orders:
+            callback(futures)
+        return futures
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+    def _window(self, account):
+        with self.lock:
+            window = self.windows.get(account)
+            if window is None:
+                window = self.windows[account] = SendWindow(self.rate, 1.0 + ORDER_RATE_MARGIN)
+            return window
+
+    def _place(self, account, kite, params):
+        window = self._window(account)
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(backoff_delay(attempt - 1))
+                # The failed call may have placed the order before the connection dropped
+                try:
+                    order_id = self._find_tagged(kite, params["tag"])
+                except RETRYABLE_ERRORS as e:
+                    error = e
+                    continue
+                if order_id is not None:
+                    return order_id
+
+            window.acquire()
+            try:
+                return kite.place_order(**params)
+            except RETRYABLE_ERRORS as e:
+                error = e
+        raise error
+
+    @staticmethod
+    def _find_tagged(kite, tag):
+        for order in kite.orders():
+            if order.get("tag") == tag or tag in (order.get("tags") or ()):
+                return order["order_id"]
+        return None
+
+
+class Portfolio:
+    """Holdings and positions across accounts, valued from live prices.
+
+    load() reads every account's holdings and positions in parallel and is
+    only needed when is_due(): after a fill, shortly after an order is
+    placed, or once the TTL lapses. Between
+    loads, reprice() moves each line of a ticked symbol from the price it
+    was last valued at to the new one and adjusts its account's totals by
+    the difference, so a tick costs only the lines it touches.
+    """
+
+    def __init__(self, ttl=PORTFOLIO_TTL):
+        self.ttl = ttl
+        self.accounts = {}  # account -> lines: {"symbol", "quantity", "price", "value", "pnl", "holding"}
+        self.totals = {}    # account -> [value, pnl]
+        self.lines = {}     # symbol -> [(account, line)]
+        self.loaded_at = None
+        self.stale = True
+        self.recheck_at = None  # monotonic time of a re-read requested by expect_fill()
+        self.lock = threading.Lock()
+
+    def is_due(self):
+        now = time.monotonic()
+        return (self.stale or self.loaded_at is None or now - self.loaded_at >= self.ttl
+                or (self.recheck_at is not None and now >= self.recheck_at))
+
+    def invalidate(self):
+        """An order filled somewhere; re-read on the next refresh"""
+        self.stale = True
+
+    def expect_fill(self, delay=PORTFOLIO_FILL_RECHECK):
+        """Orders were placed; re-read after `delay` to catch fills no order update reports"""
+        recheck_at = time.monotonic() + delay
+        if self.recheck_at is None or recheck_at < self.recheck_at:
+            self.recheck_at = recheck_at
+
+    def load(self, clients):
+        """Re-read {account: kite} in parallel; returns {account: error} for those that failed"""
+        # Fills reported while the reads are in flight must trigger another load
+        self.stale = False
+        if self.recheck_at is not None and time.monotonic() >= self.recheck_at:
+            self.recheck_at = None
+        fetched, errors = {}, {}
+        if clients:
+            with ThreadPoolExecutor(max_workers=min(len(clients), 8)) as pool:
+                futures = {pool.submit(self._fetch, kite): account for account, kite in clients.items()}
+                for future in as_completed(futures):
+                    try:
+                        fetched[futures[future]] = future.result()
+                    except Exception as e:
+                        errors[futures[future]] = str(e)
+
+        with self.lock:
+            # Accounts that failed keep their last good lines until the next load
+            self.accounts = {account: fetched.get(account, self.accounts.get(account, []))
+                             for account in clients}
+            self.totals = {}
+            self.lines = {}
+            for account, lines in self.accounts.items():
+                totals = self.totals[account] = [0.0, 0.0]
+                for line in lines:
+                    totals[0] += line["value"]
+                    totals[1] += line["pnl"]
+                    self.lines.setdefault(line["symbol"], []).append((account, line))
+            self.loaded_at = time.monotonic()
+        return errors
+
+    @staticmethod
+    def _fetch(kite):
+        lines = []
+        for holding in kite.holdings():
+            quantity = holding["quantity"] + holding.get("t1_quantity", 0)
+            if not quantity:
+                continue
+            price = holding["last_price"]
+            lines.append({"symbol": holding["tradingsymbol"], "quantity": quantity, "price": price,
+                          "value": price * quantity, "pnl": (price - holding["average_price"]) * quantity,
+                          "holding": True})
+        # Net positions carry realised P&L even once flat
+        for position in kite.positions()["net"]:
+            lines.append({"symbol": position["tradingsymbol"], "quantity": position["quantity"],
+                          "price": position["last_price"], "value": 0.0, "pnl": position["pnl"],
+                          "holding": False})
+        return lines
+
+    def reprice(self, prices):
+        """Revalue the lines of these {symbol: price}; returns True if any figure changed"""
+        changed = False
+        with self.lock:
+            for symbol, price in prices.items():
+                for account, line in self.lines.get(symbol, ()):
+                    delta = (price - line["price"]) * line["quantity"]
+                    line["price"] = price
+                    if not delta:
+                        continue
+                    totals = self.totals[account]
+                    line["pnl"] += delta
+                    totals[1] += delta
+                    if line["holding"]:
+                        line["value"] += delta
+                        totals[0] += delta
+                    changed = True
+        return changed
+
+    def summary(self):
+        """(total value, total P&L, {account: (value, P&L)})"""
+        with self.lock:
+            accounts = {account: tuple(totals) for account, totals in self.totals.items()}
+        return (sum(value for value, pnl in accounts.values()),
+                sum(pnl for value, pnl in accounts.values()), accounts)
+
+
+class TransactionLogger:
+    """Structured transaction log written off the calling threads.
+
+    log() only appends a record to a queue. A writer thread turns queued
+    records into JSON lines and writes them in batches of up to
+    `flush_records` once that many are waiting or the oldest has waited
+    `flush_seconds`, with one fsync per batch; a backlog goes out batch
+    after batch. When the file would pass `max_bytes` it is renamed to the
+    next numbered segment (transactions.000001.jsonl, ...) and a new one
+    started, so a segment overshoots by at most one batch; segments are
+    never rewritten. close() drains
+    the queue and runs at interpreter exit. `echo` also prints each batch
+    to the console, for debugging; it is off by default.
+    """
+
+    def __init__(self, path=TRANSACTION_LOG_FILE, max_bytes=LOG_ROTATE_BYTES,
+                 flush_seconds=LOG_FLUSH_SECONDS, flush_records=LOG_FLUSH_RECORDS, echo=False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.flush_seconds = flush_seconds
+        self.flush_records = flush_records
+        self.echo = echo
+        self.pending = []
+        self.first_pending = None  # monotonic time the oldest pending record was queued
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+        self.file = None
+
+    def start(self):
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def log(self, record):
+        """Queue a record (a dict with at least "time" and "message"); returns at once"""
+        with self.condition:
+            self.pending.append(record)
+            if len(self.pending) == 1:
+                self.first_pending = time.monotonic()
+                self.condition.notify()
+            elif len(self.pending) >= self.flush_records:
+                self.condition.notify()
+
+    def close(self):
+        """Write out everything queued and stop the writer"""
+        with self.condition:
+            if not self.running:
+                return
+            self.running = False
+            self.condition.notify()
+        self.thread.join()
+
+    def segments(self):
+        """Rotated segment paths, oldest first"""
+        root, ext = os.path.splitext(self.path)
+        directory = os.path.dirname(root)
+        prefix = os.path.basename(root) + "."
+        names = [name for name in os.listdir(directory or ".")
+                 if name.startswith(prefix) and name.endswith(ext) and name[len(prefix):-len(ext)].isdigit()]
+        return [os.path.join(directory, name) for name in sorted(names)]
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.running and len(self.pending) < self.flush_records:
+                    if self.pending:
+                        wait = self.first_pending + self.flush_seconds - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self.condition.wait(wait)
+                    else:
+                        self.condition.wait()
+                # Anything left over is already due and goes out in the next pass
+                batch = self.pending[:self.flush_records]
+                del self.pending[:self.flush_records]
+                done = not self.running and not self.pending
+
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    print(f"Error writing to log file: {str(e)}")
+                    if self.file:
+                        self.file.close()
+                    self.file = None  # Reopen on the next batch
+            if done:
+                if self.file:
+                    self.file.close()
+                    self.file = None
+                return
+
+    def _write(self, batch):
+        payload = "".join(json.dumps(record, default=str) + "\n" for record in batch).encode("utf-8")
+        if self.file is None:
+            self.file = open(self.path, "ab")
+        if self.file.tell() and self.file.tell() + len(payload) > self.max_bytes:
+            self._rotate()
+        self.file.write(payload)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+        if self.echo:
+            print("\n".join(f"[{record['time'][:19].replace('T', ' ')}] {record['message']}" for record in batch))
+
+    def _rotate(self):
+        self.file.close()
+        root, ext = os.path.splitext(self.path)
+        segments = self.segments()
+        number = int(segments[-1][len(root) + 1:-len(ext)]) + 1 if segments else 1
+        os.replace(self.path, f"{root}.{number:06d}{ext}")
+        self.file = open(self.path, "ab")
+
+
+class AuditFileIndex:
+    """Index of one transaction log file: a row per record with its byte offset, time and field codes.
+
+    Field values (symbol, account, event) are stored as integer codes into
+    a per-file vocabulary. A sealed (rotated) segment also gets posting
+    lists, each field's row numbers sorted by code, and is saved next to
+    the log as memory-mapped .npy files, so later sessions open it without
+    reading the log. The live file is indexed in memory and extended by
+    parsing only the bytes added since the last look.
+    """
+
+    FIELDS = ("symbol", "account", "event")
+    ROW_DTYPE = np.dtype([("offset", "<i8"), ("time", "<i8"),
+                          ("symbol", "<i4"), ("account", "<i4"), ("event", "<i4")])
+
+    def __init__(self, path):
+        self.path = path
+        self.size = 0      # bytes indexed
+        self.inode = None
+        self.rows = np.empty(0, dtype=self.ROW_DTYPE)
+        self.vocab = {field: [] for field in self.FIELDS}
+        self.codes = {field: {} for field in self.FIELDS}
+        self.postings = None  # sealed only: field -> row numbers sorted by code
+        self.starts = None    # sealed only: field -> start of each code's run in postings
+
+    def extend(self):
+        """Index records appended since the last call; returns False if the file was replaced"""
+        stat = os.stat(self.path)
+        if self.inode is not None and (stat.st_ino != self.inode or stat.st_size < self.size):
+            return False
+        self.inode = stat.st_ino
+        if stat.st_size == self.size:
+            return True
+
+        # Read in bounded chunks; a line cut at a chunk's end carries over to the next
+        batches = []
+        with open(self.path, "rb") as file:
+            file.seek(self.size)
+            remaining = stat.st_size - self.size
+            carry = b""
+            while remaining > 0:
+                chunk = file.read(min(AUDIT_READ_BYTES, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                data = carry + chunk
+                end = data.rfind(b"\n") + 1  # A batch still being written ends without a newline
+                if end:
+                    batches.append(self._parse(data[:end]))
+                carry = data[end:]
+        if batches:
+            self.rows = np.concatenate([self.rows] + batches)
+        return True
+
+    def _parse(self, data):
+        """Rows for whole lines of the file starting at the indexed size, which moves past them"""
+        offsets, times, codes = [], [], {field: [] for field in self.FIELDS}
+        position = self.size
+        for line in data.split(b"\n")[:-1]:
+            try:
+                record = json.loads(line)
+                times.append(record["time"])
+            except (ValueError, KeyError):
+                position += len(line) + 1
+                continue
+            offsets.append(position)
+            position += len(line) + 1
+            for field in self.FIELDS:
+                value = record.get(field)
+                if value is None:
+                    codes[field].append(-1)
+                    continue
+                value = str(value)
+                code = self.codes[field].get(value)
+                if code is None:
+                    code = self.codes[field][value] = len(self.vocab[field])
+                    self.vocab[field].append(value)
+                codes[field].append(code)
+
+        rows = np.empty(len(offsets), dtype=self.ROW_DTYPE)
+        rows["offset"] = offsets
+        rows["time"] = np.array(times, dtype="datetime64[ms]").astype(np.int64)
+        for field in self.FIELDS:
+            rows[field] = codes[field]
+        self.size += len(data)
+        return rows
+
+    def _sidecar(self, directory):
+        return os.path.join(directory, os.path.basename(self.path))
+
+    def seal(self, directory):
+        """Build posting lists and save the index; the file must no longer change"""
+        self.postings, self.starts = {}, {}
+        for field in self.FIELDS:
+            order = np.argsort(self.rows[field], kind="stable").astype(np.int32)
+            self.postings[field] = order
+            self.starts[field] = np.searchsorted(self.rows[field][order],
+                                                 np.arange(len(self.vocab[field]) + 1)).tolist()
+
+        os.makedirs(directory, exist_ok=True)
+        base = self._sidecar(directory)
+        np.save(base + ".rows.npy", self.rows)
+        np.save(base + ".postings.npy", np.stack([self.postings[field] for field in self.FIELDS])
+                if len(self.rows) else np.empty((len(self.FIELDS), 0), dtype=np.int32))
+        meta = {"size": self.size, "vocab": self.vocab, "starts": self.starts}
+        # The metadata is written last and atomically, so a partial index is never trusted
+        with open(base + ".json.tmp", "w") as file:
+            json.dump(meta, file)
+        os.replace(base + ".json.tmp", base + ".json")
+
+    @classmethod
+    def load(cls, path, directory):
+        """A saved index that still matches the segment, memory-mapped, or None"""
+        index = cls(path)
+        base = index._sidecar(directory)
+        try:
+            with open(base + ".json") as file:
+                meta = json.load(file)
+            if meta["size"] != os.path.getsize(path):
+                return None
+            index.rows = np.load(base + ".rows.npy", mmap_mode="r")
+            postings = np.load(base + ".postings.npy", mmap_mode="r")
+        except (OSError, ValueError, KeyError):
+            return None
+        index.size = meta["size"]
+        index.vocab = meta["vocab"]
+        index.codes = {field: {value: code for code, value in enumerate(values)}
+                       for field, values in index.vocab.items()}
+        index.postings = dict(zip(cls.FIELDS, postings))
+        index.starts = meta["starts"]
+        return index
+
+    def select(self, start=None, end=None, filters=None):
+        """Row numbers, in file order, of records in [start, end] (epoch ms) matching {field: value}"""
+        times = self.rows["time"]
+        if not len(times) or (start is not None and start > times.max()) or (end is not None and end < times.min()):
+            return np.empty(0, dtype=np.int64)
+
+        # Writer threads can interleave a few out of order, so bound the range by running max/min
+        lo, hi = 0, len(times)
+        if start is not None:
+            lo = int(np.searchsorted(np.maximum.accumulate(times), start, side="left"))
+        if end is not None:
+            hi = int(np.searchsorted(np.minimum.accumulate(times[::-1])[::-1], end, side="right"))
+
+        wanted = {}
+        for field, value in (filters or {}).items():
+            code = self.codes[field].get(str(value))
+            if code is None:
+                return np.empty(0, dtype=np.int64)
+            wanted[field] = code
+
+        if not wanted:
+            rows = np.arange(lo, hi)
+        elif self.postings is not None:
+            # Seek the shortest posting list, then check the other fields on its rows only
+            field = min(wanted, key=lambda f: self.starts[f][wanted[f] + 1] - self.starts[f][wanted[f]])
+            code = wanted.pop(field)
+            rows = np.asarray(self.postings[field][self.starts[field][code]:self.starts[field][code + 1]],
+                              dtype=np.int64)
+            rows = rows[np.searchsorted(rows, lo):np.searchsorted(rows, hi)]
+            for field, code in wanted.items():
+                rows = rows[self.rows[field][rows] == code]
+        else:
+            mask = np.ones(hi - lo, dtype=bool)
+            for field, code in wanted.items():
+                mask &= self.rows[field][lo:hi] == code
+            rows = lo + np.flatnonzero(mask)
+
+        if start is not None or end is not None:
+            selected = times[rows]
+            keep = np.ones(len(rows), dtype=bool)
+            if start is not None:
+                keep &= selected >= start
+            if end is not None:
+                keep &= selected <= end
+            rows = rows[keep]
+        return rows
+
+    def read(self, rows):
+        """The records at these row numbers"""
+        records = []
+        with open(self.path, "rb") as file:
+            for offset in self.rows["offset"][rows]:
+                file.seek(int(offset))
+                records.append(json.loads(file.readline()))
+        return records
+
+
+class AuditLog:
+    """Time, symbol, account and event queries over the transaction log and its rotated segments.
+
+    Segments are indexed once and the live file incrementally, so a query
+    skips segments outside its time range, binary-searches the rest, and
+    reads from disk only the records on the requested page.
+    """
+
+    def __init__(self, logger, directory=None):
+        self.logger = logger
+        self.directory = directory or os.path.join(os.path.dirname(logger.path), AUDIT_INDEX_DIR)
+        self.sealed = {}  # segment path -> AuditFileIndex
+        self.live = None
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        """Index new segments and newly appended records"""
+        segments = self.logger.segments()
+        for path in segments:
+            if path not in self.sealed:
+                index = AuditFileIndex.load(path, self.directory)
+                if index is None:
+                    index = AuditFileIndex(path)
+                    index.extend()
+                    index.seal(self.directory)
+                self.sealed[path] = index
+        for path in set(self.sealed) - set(segments):
+            del self.sealed[path]
+
+        if not os.path.exists(self.logger.path):
+            self.live = None
+            return
+        if self.live is None or not self.live.extend():
+            # Rotated since the last look: the old live file is now a segment
+            self.live = AuditFileIndex(self.logger.path)
+            self.live.extend()
+
+    def query(self, start=None, end=None, symbol=None, account=None, event=None, offset=0, limit=AUDIT_PAGE_SIZE):
+        """(total matches, newest-first page of records); start/end are datetimes"""
+        filters = {field: value for field, value in
+                   (("symbol", symbol), ("account", account), ("event", event)) if value}
+        start_ms = int(np.datetime64(start, "ms").astype(np.int64)) if start is not None else None
+        end_ms = int(np.datetime64(end, "ms").astype(np.int64)) if end is not None else None
+
+        with self.lock:
+            self.refresh()
+            indexes = [self.sealed[path] for path in sorted(self.sealed)]
+            if self.live is not None:
+                indexes.append(self.live)
+
+            total = 0
+            page = []
+            for index in reversed(indexes):
+                rows = index.select(start_ms, end_ms, filters)
+                if len(page) < limit and offset < total + len(rows):
+                    skip = max(offset - total, 0)
+                    page.extend(index.read(rows[::-1][skip:skip + limit - len(page)]))
+                total += len(rows)
+        return total, page
+
+    def values(self, field):
+        """Every value of a field seen so far, for filter choices"""
+        with self.lock:
+            indexes = list(self.sealed.values()) + ([self.live] if self.live is not None else [])
+            return sorted({value for index in indexes for value in index.vocab[field]})
+
+
+class StateDatabase:
+    """SQLite store for accounts, wishlists and strategies.
+
+    Each save runs in one transaction, so a crash leaves either the old or
+    the new state, never a partly written one. In WAL mode a commit is an
+    append to the write-ahead log, which SQLite replays on the next open
+    and folds back into the database in the background. Saves are also
+    incremental: the last saved state of each table is kept in memory, and
+    a save writes only the rows that changed, with executemany over
+    parameterised statements that sqlite3 prepares once and caches. The
+    schema is versioned with PRAGMA user_version; migrations import the
+    files earlier versions wrote and leave them on disk.
+    """
+
+    # (schema script, method importing pre-database files or None), applied in order
+    MIGRATIONS = [
+        ("""
+        CREATE TABLE wishlists (
+            tab INTEGER PRIMARY KEY,
+            name TEXT NOT NULL
+        );
+        CREATE TABLE wishlist_items (
+            tab INTEGER NOT NULL,
+            symbol TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            PRIMARY KEY (tab, symbol)
+        ) WITHOUT ROWID;
+        CREATE INDEX wishlist_items_order ON wishlist_items (tab, position);
+        CREATE TABLE strategies (
+            id INTEGER PRIMARY KEY,
+            position INTEGER NOT NULL,
+            active INTEGER NOT NULL,
+            data TEXT NOT NULL
+        );
+        """, "_import_json_state"),
+        ("""
+        CREATE TABLE accounts (
+            username TEXT PRIMARY KEY,
+            position INTEGER NOT NULL,
+            credentials TEXT NOT NULL
+        );
+        """, "_import_legacy"),
+    ]
+
+    def __init__(self, path=DATABASE_FILE):
+        self.path = path
+        self.directory = os.path.dirname(os.path.abspath(path))
+        self.write_lock = threading.Lock()
+        self.connection = self._connect()
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self._migrate()
+        # Last saved state, so saves write only what changed
+        self.saved_accounts = {}   # username -> (position, credentials JSON)
+        self.saved_names = {}      # tab -> wishlist name
+        self.saved_items = {}      # tab -> {symbol: position}
+        self.saved_strategies = {}  # id -> (position, active, data JSON)
+        atexit.register(self.close)
+
+    def _connect(self):
+        # Autocommit; writes open their transactions explicitly
+        connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA busy_timeout=5000")
+        return connection
+
+    def _transaction(self, work, *args):
+        """Run work(cursor, *args) in one write transaction"""
+        with self.write_lock:
+            cursor = self.connection.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(cursor, *args)
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
+            return result
+
+    def _migrate(self):
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        for number, (script, importer) in enumerate(self.MIGRATIONS[version:], start=version + 1):
+            def migrate(cursor):
+                for statement in script.split(";"):
+                    if statement.strip():
+                        cursor.execute(statement)
+                if importer:
+                    getattr(self, importer)(cursor)
+                cursor.execute(f"PRAGMA user_version = {number}")
+            self._transaction(migrate)
+
+    def _import_file(self, cursor, name, statements):
+        """Import one pre-database JSON file; statements(data) gives (sql, rows) pairs to run.
+
+        A missing file is skipped. One that cannot be read, parsed or
+        imported is logged and skipped as a whole, so a bad file never
+        stops the app from starting.
+        """
+        try:
+            with open(os.path.join(self.directory, name), "r") as file:
+                data = json.load(file)
+            batches = statements(data) if data else []
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"Skipping {name} during migration: {str(e)}")
+            return
+
+        cursor.execute("SAVEPOINT import_file")
+        try:
+            for sql, rows in batches:
+                cursor.executemany(sql, rows)
+        except (sqlite3.Error, ValueError) as e:
+            cursor.execute("ROLLBACK TO import_file")
+            print(f"Skipping {name} during migration: {str(e)}")
+        finally:
+            cursor.execute("RELEASE import_file")
+
+    @staticmethod
+    def _wishlist_rows(data):
+        return [("INSERT INTO wishlists VALUES (?, ?)", list(enumerate(data.get("wishlist_names", [])))),
+                ("INSERT OR IGNORE INTO wishlist_items VALUES (?, ?, ?)",
+                 [(tab, symbol, position) for tab, symbols in enumerate(data.get("instruments", []))
+                  for position, symbol in enumerate(symbols)])]
+
+    @staticmethod
+    def _strategy_rows(data):
+        active = set(data.get("active_strategies", []))
+        rows, ids = [], set()
+        next_id = max((strategy["id"] for strategy in data.get("strategies", [])), default=0) + 1
+        for position, strategy in enumerate(data.get("strategies", [])):
+            if strategy["id"] in ids:
+                # Older versions could reuse an id after a delete; keep both strategies
+                print(f"Strategy '{strategy.get('name')}' reused id {strategy['id']}; imported as {next_id}")
+                strategy = dict(strategy, id=next_id)
+                next_id += 1
+            ids.add(strategy["id"])
+            rows.append((strategy["id"], position, strategy["id"] in active, json.dumps(strategy)))
+        return [("INSERT INTO strategies VALUES (?, ?, ?, ?)", rows)]
+
+    @staticmethod
+    def _account_rows(data):
+        return [("INSERT OR REPLACE INTO accounts VALUES (?, ?, ?)",
+                 [(creds["username"], position, json.dumps(creds)) for position, creds in enumerate(data)])]
+
+    def _import_json_state(self, cursor):
+        self._import_file(cursor, "wishlists.json", self._wishlist_rows)
+        self._import_file(cursor, "strategies.json", self._strategy_rows)
+
+    def _import_legacy(self, cursor):
+        self._import_file(cursor, "credentials.json", self._account_rows)
+
+        # Before wishlists.json each tab had its own wishlist_N.json of symbols. Once
+        # wishlists.json exists it holds the tabs, and any emptied there stay empty.
+        if not os.path.exists(os.path.join(self.directory, "wishlists.json")):
+            for tab in range(10):
+                self._import_file(cursor, f"wishlist_{tab + 1}.json", lambda symbols, tab=tab: [
+                    ("INSERT OR IGNORE INTO wishlist_items VALUES (?, ?, ?)",
+                     [(tab, symbol, position)
+                      for position, symbol in enumerate(symbols.get("instruments", []) if isinstance(symbols, dict)
+                                                        else symbols)
+                      if isinstance(symbol, str)])])
+
+        # The plain-text transactions.log becomes the oldest segment of the JSON-lines log
+        legacy = os.path.join(self.directory, "transactions.log")
+        root, ext = os.path.splitext(TRANSACTION_LOG_FILE)
+        segment = os.path.join(self.directory, f"{root}.{0:06d}{ext}")
+        if os.path.exists(legacy) and not os.path.exists(segment):
+            try:
+                with open(legacy, "r", errors="replace") as source, open(segment + ".tmp", "w") as target:
+                    for line in source:
+                        line = line.rstrip("\n")
+                        # "[2024-05-31 14:30:00] message"
+                        if line.startswith("[") and line[20:22] == "] ":
+                            target.write(json.dumps({"time": line[1:20].replace(" ", "T") + ".000",
+                                                     "event": "info", "message": line[22:]}) + "\n")
+                    target.flush()
+                    os.fsync(target.fileno())
+                os.replace(segment + ".tmp", segment)
+            except OSError as e:
+                print(f"Skipping transactions.log during migration: {str(e)}")
+
+    def close(self):
+        with self.write_lock:
+            if self.connection is None:
+                return
+            self.connection.close()
+            self.connection = None
+
+    # Accounts
+
+    def load_credentials(self):
+        with self.write_lock:
+            rows = self.connection.execute(
+                "SELECT username, position, credentials FROM accounts ORDER BY position").fetchall()
+        self.saved_accounts = {username: (position, data) for username, position, data in rows}
+        return [json.loads(data) for username, position, data in rows]
+
+    def save_credentials(self, credentials_list):
+        accounts = {creds["username"]: (position, json.dumps(creds))
+                    for position, creds in enumerate(credentials_list)}
+
+        def save(cursor):
+            cursor.executemany("DELETE FROM accounts WHERE username = ?",
+                               [(username,) for username in self.saved_accounts if username not in accounts])
+            cursor.executemany("INSERT OR REPLACE INTO accounts VALUES (?, ?, ?)",
+                               [(username, position, data) for username, (position, data) in accounts.items()
+                                if self.saved_accounts.get(username) != (position, data)])
+        self._transaction(save)
+        self.saved_accounts = accounts
+
+    # Wishlists
+
+    def load_wishlists(self):
+        """{"wishlist_names", "instruments"} as the app keeps them, or None if nothing is saved"""
+        with self.write_lock:
+            names = self.connection.execute("SELECT tab, name FROM wishlists ORDER BY tab").fetchall()
+            items = self.connection.execute(
+                "SELECT tab, symbol, position FROM wishlist_items ORDER BY tab, position").fetchall()
+        self.saved_names = dict(names)
+        self.saved_items = {}
+        for tab, symbol, position in items:
+            self.saved_items.setdefault(tab, {})[symbol] = position
+        if not names and not items:
+            return None
+
+        # The app always has at least its ten tabs
+        tabs = max(list(self.saved_names) + list(self.saved_items) + [9]) + 1
+        data = {"instruments": [list(self.saved_items.get(tab, {})) for tab in range(tabs)]}
+        if names:
+            data["wishlist_names"] = [self.saved_names.get(tab, f"Wishlist {tab+1}") for tab in range(tabs)]
+        return data
+
+    def save_wishlists(self, names, instruments):
+        """Write the tabs whose name or symbols changed since the last save"""
+        def save(cursor):
+            cursor.executemany("INSERT OR REPLACE INTO wishlists VALUES (?, ?)",
+                               [(tab, name) for tab, name in enumerate(names) if self.saved_names.get(tab) != name])
+            saved_items = {}
+            for tab, symbols in enumerate(instruments):
+                positions = self.saved_items.get(tab, {})
+                kept = [symbol for symbol in symbols if symbol in positions]
+                in_order = all(positions[a] < positions[b] for a, b in zip(kept, kept[1:]))
+                if in_order and kept == symbols and len(kept) == len(positions):
+                    saved_items[tab] = positions
+                    continue
+
+                if in_order and symbols[:len(kept)] == kept:
+                    # Adds at the end and removals keep the other rows as they are
+                    current = {symbol: positions[symbol] for symbol in kept}
+                    cursor.executemany("DELETE FROM wishlist_items WHERE tab = ? AND symbol = ?",
+                                       [(tab, symbol) for symbol in positions if symbol not in current])
+                    start = max(positions.values(), default=-1) + 1
+                    for offset, symbol in enumerate(symbols[len(kept):]):
+                        current[symbol] = start + offset
+                    cursor.executemany("INSERT OR REPLACE INTO wishlist_items VALUES (?, ?, ?)",
+                                       [(tab, symbol, current[symbol]) for symbol in symbols[len(kept):]])
+                else:
+                    current = {symbol: position for position, symbol in enumerate(symbols)}
+                    cursor.execute("DELETE FROM wishlist_items WHERE tab = ?", (tab,))
+                    cursor.executemany("INSERT OR IGNORE INTO wishlist_items VALUES (?, ?, ?)",
+                                       [(tab, symbol, position) for symbol, position in current.items()])
+                saved_items[tab] = current
+            return saved_items
+        self.saved_items = self._transaction(save)
+        self.saved_names = dict(enumerate(names))
+
+    # Strategies
+
+    def load_strategies(self):
+        """{"strategies", "active_strategies"} as the app keeps them, or None if nothing is saved"""
+        with self.write_lock:
+            rows = self.connection.execute(
+                "SELECT id, position, active, data FROM strategies ORDER BY position").fetchall()
+        self.saved_strategies = {id: (position, active, data) for id, position, active, data in rows}
+        if not rows:
+            return None
+        return {"strategies": [json.loads(data) for id, position, active, data in rows],
+                "active_strategies": [id for id, position, active, data in rows if active]}
+
+    def save_strategies(self, strategies, active_ids):
+        """strategies: (id, data JSON) pairs in order; writes only added, edited, moved or toggled ones"""
+        active_ids = set(active_ids)
+        current = {id: (position, int(id in active_ids), data)
+                   for position, (id, data) in enumerate(strategies)}
+        if len(current) != len(strategies):
+            raise ValueError("Strategies share an id; not saving rather than dropping one")
+
+        def save(cursor):
+            cursor.executemany("DELETE FROM strategies WHERE id = ?",
+                               [(id,) for id in self.saved_strategies if id not in current])
+            cursor.executemany("INSERT OR REPLACE INTO strategies VALUES (?, ?, ?, ?)",
+                               [(id,) + row for id, row in current.items() if self.saved_strategies.get(id) != row])
+        self._transaction(save)
+        self.saved_strategies = current
+
+
+class DeferredWrite:
+    """Calls write(*snapshot) on a timer thread, at most once per `delay` seconds.
+
+    update() records the latest snapshot and marks it unsaved; a burst of
+    changes before the timer fires becomes one write of the last one.
+    close() cancels the timer and writes anything still pending, and runs
+    at interpreter exit.
+    """
+
+    def __init__(self, write, delay=SAVE_DELAY_SECONDS):
+        self.write = write
+        self.delay = delay
+        self.pending = None
+        self.timer = None
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        atexit.register(self.close)
+
+    def update(self, snapshot):
+        """Record the new state; the caller must not mutate it afterwards"""
+        with self.lock:
+            self.pending = snapshot
+            if self.timer is None:
+                self.timer = threading.Timer(self.delay, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self):
+        """Write the pending snapshot now, if there is one"""
+        with self.write_lock:
+            with self.lock:
+                snapshot, self.pending = self.pending, None
+                self.timer = None
+            if snapshot is None:
+                return
+            try:
+                self.write(*snapshot)
+            except Exception as e:
+                print(f"Error saving: {str(e)}")
+
+    def close(self):
+        with self.lock:
+            timer, self.timer = self.timer, None
+        if timer is not None:
+            timer.cancel()
+        self.flush()
+
+
+class UIDispatcher:
+    """Funnels widget updates from worker threads onto the Tk thread.
+
+    Workers call post() or post_row() and return immediately. Row updates are
+    coalesced per Treeview row and keyed calls per key, so only the latest
+    value is ever drawn. A single root.after render pass drains the queue
+    within a per-frame time budget and also runs every recurring UI timer.
+    """
+
+    def __init__(self, root, interval_ms=50, budget_ms=8):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.budget = budget_ms / 1000.0
+        self.lock = threading.Lock()
+        self.calls = deque()          # (fn, args, kwargs) in posting order
+        self.keyed_calls = OrderedDict()  # key -> (fn, args, kwargs), latest wins
+        self.rows = OrderedDict()     # (tree, item) -> [columns, tags], merged
+        self.timers = {}              # name -> [interval_s, next_due, fn]
+        self.after_id = None
+
+    def start(self):
+        if self.after_id is None:
+            self.after_id = self.root.after(self.interval_ms, self._render)
+
+    def stop(self):
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+
+    def post(self, fn, *args, key=None, **kwargs):
+        """Queue fn(*args, **kwargs) for the Tk thread; a key keeps only the newest call"""
+        with self.lock:
+            if key is None:
+                self.calls.append((fn, args, kwargs))
+            else:
+                self.keyed_calls[key] = (fn, args, kwargs)
+
+    def post_row(self, tree, item, columns, tags=None):
+        """Queue column values (and tags) for one Treeview row"""
+        with self.lock:
+            pending = self.rows.get((tree, item))
+            if pending is None:
+                self.rows[(tree, item)] = [dict(columns), tags]
+            else:
+                pending[0].update(columns)
+                if tags is not None:
+                    pending[1] = tags
+
+    def every(self, name, interval_ms, fn, run_now=True):
+        """Run fn on the Tk thread every interval_ms; re-registering a name replaces it"""
+        due = time.monotonic() if run_now else time.monotonic() + interval_ms / 1000.0
+        self.timers[name] = [interval_ms / 1000.0, due, fn]
+
+    def cancel(self, name):
+        self.timers.pop(name, None)
+
+    def _render(self):
+        deadline = time.perf_counter() + self.budget
+
+        now = time.monotonic()
+        for name, timer in list(self.timers.items()):
+            interval, due, fn = timer
+            if now >= due:
+                timer[1] = now + interval
+                self._run(fn, (), {})
+
+        while time.perf_counter() < deadline:
+            with self.lock:
+                if self.calls:
+                    fn, args, kwargs = self.calls.popleft()
+                elif self.keyed_calls:
+                    _, (fn, args, kwargs) = self.keyed_calls.popitem(last=False)
+                elif self.rows:
+                    (tree, item), (columns, tags) = self.rows.popitem(last=False)
+                    fn, args, kwargs = self._apply_row, (tree, item, columns, tags), {}
+                else:
+                    break
+            self._run(fn, args, kwargs)
+
+        self.after_id = self.root.after(self.interval_ms, self._render)
+
+    def _apply_row(self, tree, item, columns, tags):
+        if not tree.exists(item):
+            return  # Row removed after the update was posted
+        for column, value in columns.items():
+            tree.set(item, column, value)
+        if tags is not None:
+            tree.item(item, tags=tags)
+
+    def _run(self, fn, args, kwargs):
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            print(f"Error in UI update: {str(e)}")
+
+
+def sma_series(values, period):
+    """Simple moving average along axis 0; NaN until `period` values are seen"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if len(values) >= period:
+        windows = np.lib.stride_tricks.sliding_window_view(values, period, axis=0)
+        out[period - 1:] = windows.mean(axis=-1)
+    return out
+
+
+def _recursive_mean(values, alpha, seed, first):
+    """out[first] = seed, then out[i] = out[i-1] + alpha * (values[i] - out[i-1]), along axis 0.
+
+    Runs through pandas' compiled exponentially weighted mean instead of a
+    Python loop over bars.
+    """
+    values = values[first:].copy()
+    values[0] = seed
+    frame = pd.DataFrame(values.reshape(len(values), -1))
+    smoothed = frame.ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    return smoothed.reshape(values.shape)
+
+
+def ema_series(values, period, start=0):
+    """EMA along axis 0, seeded with the SMA of the first `period` values from `start`"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    seed_end = start + period
+    if len(values) < seed_end:
+        return out
+    seed = values[start:seed_end].mean(axis=0)
+    out[seed_end - 1:] = _recursive_mean(values, 2.0 / (period + 1), seed, seed_end - 1)
+    return out
+
+
+def rsi_series(values, period):
+    """Wilder RSI along axis 0; NaN for the first `period` values"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if len(values) <= period:
+        return out
+    changes = np.diff(values, axis=0)
+    gains = np.clip(changes, 0, None)
+    losses = np.clip(-changes, 0, None)
+    # Wilder smoothing is an EMA with alpha = 1/period, seeded with the plain average
+    avg_gain = _recursive_mean(gains, 1.0 / period, gains[:period].mean(axis=0), period - 1)
+    avg_loss = _recursive_mean(losses, 1.0 / period, losses[:period].mean(axis=0), period - 1)
+    out[period:] = _rsi_value(avg_gain, avg_loss)
+    return out
+
+
+def _rsi_value(avg_gain, avg_loss):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return np.where(avg_loss == 0, 100.0, rsi)
+
+
+def macd_series(values, fast, slow, signal):
+    """MACD line and signal line along axis 0"""
+    macd_line = ema_series(values, fast) - ema_series(values, slow)
+    first = max(fast, slow) - 1
+    signal_line = ema_series(np.nan_to_num(macd_line), signal, start=first)
+    return macd_line, signal_line
+
+
+def _crossover(fast, slow):
+    """+1 on bars where fast closes above slow after not being above, -1 on the reverse"""
+    above = fast > slow
+    was_above = np.zeros_like(above)
+    was_above[1:] = above[:-1]
+    return np.where(above & ~was_above, 1, np.where(was_above & ~above, -1, 0)).astype(np.int8)
+
+
+def ma_crossover_signal_series(closes, short, long):
+    """Per-bar SMA crossover signals (+1/-1/0) along axis 0"""
+    return _crossover(sma_series(closes, short), sma_series(closes, long))
+
+
+def rsi_signal_series(closes, period, overbought, oversold):
+    """Per-bar signals: +1 while RSI is below `oversold`, -1 while above `overbought`"""
+    rsi = rsi_series(closes, period)
+    return np.where(rsi < oversold, 1, np.where(rsi > overbought, -1, 0)).astype(np.int8)
+
+
+def macd_signal_series(closes, fast, slow, signal):
+    """Per-bar MACD/signal-line crossover signals along axis 0"""
+    macd_line, signal_line = macd_series(closes, fast, slow, signal)
+    buy = np.zeros(macd_line.shape, dtype=bool)
+    sell = np.zeros(macd_line.shape, dtype=bool)
+    buy[1:] = (macd_line[1:] > signal_line[1:]) & (macd_line[:-1] <= signal_line[:-1])
+    sell[1:] = (macd_line[1:] < signal_line[1:]) & (macd_line[:-1] >= signal_line[:-1])
+    return np.where(buy, 1, np.where(sell, -1, 0)).astype(np.int8)
+
+
+class SMAIndicator:
+    """Streaming simple moving average; O(1) per update"""
+
+    def __init__(self, period):
+        self.period = period
+        self.window = deque()
+        self.total = 0.0
+        self.value = None
+        self.prev = None
+
+    def update(self, close):
+        """Commit a closed bar and return the new value"""
+        self.window.append(close)
+        self.total += close
+        if len(self.window) > self.period:
+            self.total -= self.window.popleft()
+        self.prev = self.value
+        if len(self.window) == self.period:
+            self.value = self.total / self.period
+        return self.value
+
+    def peek(self, close):
+        """Value if `close` were the next bar, without committing it (for live ticks)"""
+        if len(self.window) < self.period - 1:
+            return None
+        dropped = self.window[0] if len(self.window) == self.period else 0.0
+        return (self.total - dropped + close) / self.period
+
+
+class EMAIndicator:
+    """Streaming EMA seeded with the SMA of its first `period` values"""
+
+    def __init__(self, period):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.seed = SMAIndicator(period)
+        self.value = None
+        self.prev = None
+
+    def update(self, close):
+        self.prev = self.value
+        if self.value is None:
+            self.value = self.seed.update(close)
+        else:
+            self.value = self.value + self.alpha * (close - self.value)
+        return self.value
+
+    def peek(self, close):
+        if self.value is None:
+            return self.seed.peek(close)
+        return self.value + self.alpha * (close - self.value)
+
+
+class RSIIndicator:
+    """Streaming Wilder RSI"""
+
+    def __init__(self, period):
+        self.period = period
+        self.last_close = None
+        self.count = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.value = None
+        self.prev = None
+
+    def _averages(self, close):
+        change = close - self.last_close
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        if self.count < self.period:
+            # Still collecting the first `period` changes for the simple-average seed
+            n = self.count + 1
+            return (self.avg_gain * self.count + gain) / n, (self.avg_loss * self.count + loss) / n, n
+        return ((self.avg_gain * (self.period - 1) + gain) / self.period,
+                (self.avg_loss * (self.period - 1) + loss) / self.period,
+                self.count + 1)
+
+    @staticmethod
+    def _value(avg_gain, avg_loss):
+        if avg_loss == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+    def update(self, close):
+        self.prev = self.value
+        if self.last_close is not None:
+            self.avg_gain, self.avg_loss, self.count = self._averages(close)
+            if self.count >= self.period:
+                self.value = self._value(self.avg_gain, self.avg_loss)
+        self.last_close = close
+        return self.value
+
+    def peek(self, close):
+        if self.last_close is None:
+            return None
+        avg_gain, avg_loss, count = self._averages(close)
+        return self._value(avg_gain, avg_loss) if count >= self.period else None
+
+
+class MACDIndicator:
+    """Streaming MACD line and signal line"""
+
+    def __init__(self, fast, slow, signal):
+        self.fast = EMAIndicator(fast)
+        self.slow = EMAIndicator(slow)
+        self.signal_ema = EMAIndicator(signal)
+        self.value = None
+        self.signal = None
+        self.prev = None
+        self.prev_signal = None
+
+    def update(self, close):
+        self.prev, self.prev_signal = self.value, self.signal
+        fast, slow = self.fast.update(close), self.slow.update(close)
+        if fast is not None and slow is not None:
+            self.value = fast - slow
+            self.signal = self.signal_ema.update(self.value)
+        return self.value
+
+    def peek(self, close):
+        """(macd, signal) if `close` were the next bar"""
+        fast, slow = self.fast.peek(close), self.slow.peek(close)
+        if fast is None or slow is None:
+            return None, None
+        macd = fast - slow
+        return macd, self.signal_ema.peek(macd)
+
+
+class Strategy(ABC):
+    """A strategy type compiled from its saved parameters.
+
+    PARAMS lists (name, label, default) for each parameter. The saved
+    strings are parsed and validated once in the constructor, which raises
+    ValueError with a message fit for the user. evaluate() is the live
+    per-symbol path over streaming indicators. signal_series() covers every
+    bar of a close series or (bars x symbols) matrix. Signals are +1 BUY,
+    -1 SELL and 0 for none. Subclasses must implement every abstract method;
+    register_strategy rejects one that does not.
+    """
+
+    TYPE = None
+    PARAMS = ()
+    SEARCH_RANGES = {}  # Optimizer defaults: param -> (start, stop, step), stop inclusive
+
+    def __init__(self, params):
+        for name, label, default in self.PARAMS:
+            try:
+                value = int(params.get(name, ""))
+            except (TypeError, ValueError):
+                raise ValueError(f"{label} must be a whole number")
+            if value < 1:
+                raise ValueError(f"{label} must be at least 1")
+            setattr(self, name, value)
+        self.validate()
+
+    @classmethod
+    def is_valid(cls, params):
+        try:
+            cls(params)
+            return True
+        except ValueError:
+            return False
+
+    @property
+    def params(self):
+        """Parameters in the string form strategies.json stores"""
+        return {name: str(getattr(self, name)) for name, label, default in self.PARAMS}
+
+    def validate(self):
+        pass
+
+    @abstractmethod
+    def create_indicators(self):
+        """Fresh streaming indicators for evaluate()"""
+
+    @abstractmethod
+    def evaluate(self, indicators):
+        """Signal on the bar the indicators were last updated with"""
+
+    @abstractmethod
+    def evaluate_tick(self, indicators, price):
+        """Signal if the forming bar closed at `price`; indicators are left untouched"""
+
+    @abstractmethod
+    def signal_series(self, closes):
+        """Signal on every bar of a close series or (bars x symbols) matrix"""
+
+    def latest_signals(self, closes):
+        """Signal on the last bar of each column of a (bars x symbols) close matrix"""
+        return self.signal_series(closes)[-1]
+
+
+STRATEGY_TYPES = {}  # type name -> Strategy subclass, in the order offered to the user
+
+
+def register_strategy(cls):
+    """Class decorator offering a Strategy subclass to the user; it must be complete"""
+    if cls.__abstractmethods__:
+        raise TypeError(f"{cls.__name__} does not implement {', '.join(sorted(cls.__abstractmethods__))}")
+    if not cls.TYPE:
+        raise TypeError(f"{cls.__name__} has no TYPE")
+    STRATEGY_TYPES[cls.TYPE] = cls
+    return cls
+
+
+def compile_strategy(strategy_type, params):
+    """Compiled Strategy for a saved type and params; raises ValueError if invalid"""
+    cls = STRATEGY_TYPES.get(strategy_type)
+    if cls is None:
+        raise ValueError(f"Unknown strategy type: {strategy_type}")
+    return cls(params)
+
+
+@register_strategy
+class MovingAverageCrossover(Strategy):
+    TYPE = "Moving Average Crossover"
+    PARAMS = (("short_ma", "Short MA Period", 20), ("long_ma", "Long MA Period", 50))
+    SEARCH_RANGES = {"short_ma": (5, 30, 5), "long_ma": (20, 100, 10)}
+
+    def validate(self):
+        if self.short_ma >= self.long_ma:
+            raise ValueError("Short MA Period must be less than Long MA Period")
+
+    def create_indicators(self):
+        return SMAIndicator(self.short_ma), SMAIndicator(self.long_ma)
+
+    def evaluate(self, indicators):
+        short, long = indicators
+        # Short above long on this bar vs the previous one
+        above = short.value is not None and long.value is not None and short.value > long.value
+        was_above = short.prev is not None and long.prev is not None and short.prev > long.prev
+        if above and not was_above:
+            return 1
+        elif was_above and not above:
+            return -1
+        return 0
+
+    def evaluate_tick(self, indicators, price):
+        short, long = indicators
+        short_now, long_now = short.peek(price), long.peek(price)
+        above = short_now is not None and long_now is not None and short_now > long_now
+        was_above = short.value is not None and long.value is not None and short.value > long.value
+        if above and not was_above:
+            return 1
+        elif was_above and not above:
+            return -1
+        return 0
+
+    def signal_series(self, closes):
+        return ma_crossover_signal_series(closes, self.short_ma, self.long_ma)
+
+    def latest_signals(self, closes):
+        # Only the last two averages matter, so only the last long+1 bars are needed
+        closes = np.asarray(closes, dtype=np.float64)[-(self.long_ma + 1):]
+        return self.signal_series(closes)[-1]
+
+
+@register_strategy
+class RSIStrategy(Strategy):
+    TYPE = "RSI"
+    PARAMS = (("period", "RSI Period", 14), ("overbought", "Overbought Level", 70),
+              ("oversold", "Oversold Level", 30))
+    SEARCH_RANGES = {"period": (7, 21, 7), "overbought": (65, 80, 5), "oversold": (20, 35, 5)}
+
+    def validate(self):
+        if not self.oversold < self.overbought < 100:
+            raise ValueError("Levels must satisfy Oversold < Overbought < 100")
+
+    def create_indicators(self):
+        return (RSIIndicator(self.period),)
+
+    def evaluate(self, indicators):
+        return self._level_signal(indicators[0].value)
+
+    def evaluate_tick(self, indicators, price):
+        return self._level_signal(indicators[0].peek(price))
+
+    def _level_signal(self, rsi):
+        if rsi is None:
+            return 0
+        elif rsi < self.oversold:
+            return 1
+        elif rsi > self.overbought:
+            return -1
+        return 0
+
+    def signal_series(self, closes):
+        return rsi_signal_series(closes, self.period, self.overbought, self.oversold)
+
+
+@register_strategy
+class MACDStrategy(Strategy):
+    TYPE = "MACD"
+    PARAMS = (("fast_ema", "Fast EMA", 12), ("slow_ema", "Slow EMA", 26), ("signal_period", "Signal Period", 9))
+    SEARCH_RANGES = {"fast_ema": (8, 16, 2), "slow_ema": (20, 32, 3), "signal_period": (6, 12, 3)}
+
+    def validate(self):
+        if self.fast_ema >= self.slow_ema:
+            raise ValueError("Fast EMA must be less than Slow EMA")
+
+    def create_indicators(self):
+        return (MACDIndicator(self.fast_ema, self.slow_ema, self.signal_period),)
+
+    def evaluate(self, indicators):
+        macd = indicators[0]
+        return self._crossover(macd.value, macd.signal, macd.prev, macd.prev_signal)
+
+    def evaluate_tick(self, indicators, price):
+        macd = indicators[0]
+        value, signal = macd.peek(price)
+        return self._crossover(value, signal, macd.value, macd.signal)
+
+    @staticmethod
+    def _crossover(value, signal, prev, prev_signal):
+        # A crossover between the previous bar and this one
+        if None in (value, signal, prev, prev_signal):
+            return 0
+        elif value > signal and prev <= prev_signal:
+            return 1
+        elif value < signal and prev >= prev_signal:
+            return -1
+        return 0
+
+    def signal_series(self, closes):
+        return macd_signal_series(closes, self.fast_ema, self.slow_ema, self.signal_period)
+
+
+class MISCharges:
+    """Statutory charges and brokerage for intraday (MIS) NSE equity orders"""
+
+    BROKERAGE_RATE = 0.0003      # 0.03% per executed order...
+    BROKERAGE_CAP = 20.0         # ...or Rs 20, whichever is lower
+    STT_SELL_RATE = 0.00025      # Sell side only
+    EXCHANGE_RATE = 0.0000297    # NSE transaction charge
+    SEBI_RATE = 0.000001         # Rs 10 per crore
+    STAMP_BUY_RATE = 0.00003     # Buy side only
+    GST_RATE = 0.18              # On brokerage, exchange and SEBI charges
+
+    def __call__(self, value, is_buy):
+        """Total charges for orders of the given turnover; works on arrays"""
+        value = np.asarray(value, dtype=np.float64)
+        brokerage = np.minimum(value * self.BROKERAGE_RATE, self.BROKERAGE_CAP)
+        exchange = value * (self.EXCHANGE_RATE + self.SEBI_RATE)
+        stt = np.where(is_buy, 0.0, value * self.STT_SELL_RATE)
+        stamp = np.where(is_buy, value * self.STAMP_BUY_RATE, 0.0)
+        return brokerage + exchange + stt + stamp + self.GST_RATE * (brokerage + exchange)
+
+
+class Backtester:
+    """Replays candles through a compiled strategy's signal logic.
+
+    A signal on a bar's close is filled at the next bar's open, adverse
+    slippage applied. BUY holds long and SELL holds short (or flat without
+    shorting) until the opposite signal. On intraday candles, positions
+    are squared off at each session's last close as MIS orders are, and no
+    signal carries into the next session. Every step is an array operation
+    over all bars; nothing loops per bar in Python.
+    """
+
+    def __init__(self, quantity=1, slippage_bps=2.0, capital=100000.0, allow_short=True,
+                 square_off=None, charges=None):
+        self.quantity = quantity
+        self.slippage = slippage_bps / 10000.0
+        self.capital = capital
+        self.allow_short = allow_short
+        self.square_off = square_off  # None: only for intraday candles
+        self.charges = charges or MISCharges()
+
+    def run(self, strategy, candles):
+        """Backtest a compiled strategy on one symbol's candles; returns summary stats, equity and trades"""
+        close = candles["close"].to_numpy(dtype=np.float64)
+        opens = candles["open"].to_numpy(dtype=np.float64) if "open" in candles else close
+        bars = len(close)
+        index = np.arange(bars)
+
+        sessions = candles.index.normalize().asi8
+        new_session = np.ones(bars, dtype=bool)
+        new_session[1:] = sessions[1:] != sessions[:-1]
+        square_off = self.square_off if self.square_off is not None else not new_session[1:].all()
+
+        # Position wanted after each bar's close: the latest signal, within the session for MIS
+        signals = strategy.signal_series(close)
+        last_signal = np.maximum.accumulate(np.where(signals != 0, index, -1))
+        if square_off:
+            session_start = np.maximum.accumulate(np.where(new_session, index, 0))
+            last_signal[last_signal < session_start] = -1
+        target = np.where(last_signal >= 0, signals[np.maximum(last_signal, 0)], 0)
+        if not self.allow_short:
+            target = np.maximum(target, 0)
+
+        # Position held through each bar, entered at its open on the previous bar's signal
+        position = np.zeros(bars, dtype=np.int8)
+        position[1:] = target[:-1]
+        if square_off:
+            position[new_session] = 0
+
+        # Each run of a constant non-zero position is one trade
+        boundary = np.ones(bars, dtype=bool)
+        boundary[1:] = position[1:] != position[:-1]
+        if square_off:
+            boundary |= new_session
+        starts = np.flatnonzero(boundary)
+        ends = np.append(starts[1:], bars) - 1
+        held = position[starts] != 0
+        starts, ends = starts[held], ends[held]
+        side = position[starts].astype(np.float64)
+
+        # Exit at the next bar's open, or at this bar's close at session/data end
+        next_bar = np.minimum(ends + 1, bars - 1)
+        at_close = ends == bars - 1
+        if square_off:
+            at_close |= new_session[next_bar]
+        exit_bars = np.where(at_close, ends, ends + 1)
+        entry_price = opens[starts] * (1 + self.slippage * side)
+        exit_price = np.where(at_close, close[ends], opens[next_bar]) * (1 - self.slippage * side)
+
+        qty = self.quantity
+        entry_charges = self.charges(entry_price * qty, side > 0)
+        exit_charges = self.charges(exit_price * qty, side < 0)
+        gross = side * qty * (exit_price - entry_price)
+        net = gross - entry_charges - exit_charges
+
+        # Mark-to-market P&L per bar, corrected to the actual fill prices
+        prev_close = np.concatenate([close[:1], close[:-1]])
+        bar_pnl = position * qty * (close - prev_close)
+        np.add.at(bar_pnl, starts, side * qty * (prev_close[starts] - entry_price) - entry_charges)
+        np.add.at(bar_pnl, exit_bars, side * qty * (exit_price - close[ends]) - exit_charges)
+        equity = self.capital + np.cumsum(bar_pnl)
+        drawdown = equity - np.maximum.accumulate(np.concatenate([[self.capital], equity]))[1:]
+        worst = int(np.argmin(drawdown)) if bars else 0
+
+        trades = pd.DataFrame({
+            "entry_time": candles.index[starts],
+            "exit_time": candles.index[exit_bars],
+            "side": np.where(side > 0, "LONG", "SHORT"),
+            "quantity": qty,
+            "entry_price": entry_price,
+            "exit_price": exit_price,
+            "charges": entry_charges + exit_charges,
+            "pnl": net
+        })
+        winners = int((net > 0).sum())
+        return {
+            "bars": bars,
+            "trades": len(trades),
+            "winners": winners,
+            "hit_rate": winners / len(trades) if len(trades) else 0.0,
+            "gross_pnl": float(gross.sum()),
+            "charges": float((entry_charges + exit_charges).sum()),
+            "net_pnl": float(net.sum()),
+            "max_drawdown": float(-drawdown.min()) if bars else 0.0,
+            "max_drawdown_pct": float(-drawdown[worst] / (equity[worst] - drawdown[worst]) * 100) if bars else 0.0,
+            "equity": pd.Series(equity, index=candles.index),
+            "trade_list": trades
+        }
+
+
+# Per worker process: symbol -> candles viewing the sweep's shared memory block
+_sweep_memory = None
+_sweep_candles = {}
+
+
+def _sweep_worker_init(memory_name, layout):
+    global _sweep_memory, _sweep_candles
+    # Attached, not created: the parent process unlinks the block when the sweep ends
+    _sweep_memory = shared_memory.SharedMemory(name=memory_name)
+    buffer = _sweep_memory.buf
+    for symbol, (offset, bars) in layout.items():
+        dates = np.ndarray(bars, dtype=np.int64, buffer=buffer, offset=offset)
+        opens = np.ndarray(bars, dtype=np.float64, buffer=buffer, offset=offset + 8 * bars)
+        closes = np.ndarray(bars, dtype=np.float64, buffer=buffer, offset=offset + 16 * bars)
+        _sweep_candles[symbol] = pd.DataFrame({"open": opens, "close": closes}, copy=False,
+                                              index=pd.DatetimeIndex(dates.view("datetime64[ns]")))
+
+
+def _sweep_evaluate(strategy_type, param_sets, backtester_options):
+    """Worker task: backtest each parameter set on every shared symbol and aggregate"""
+    backtester = Backtester(**backtester_options)
+    results = []
+    for params in param_sets:
+        strategy = compile_strategy(strategy_type, params)
+        runs = [backtester.run(strategy, candles) for candles in _sweep_candles.values()]
+        trades = sum(run["trades"] for run in runs)
+        winners = sum(run["winners"] for run in runs)
+        results.append({
+            "params": params,
+            "net_pnl": sum(run["net_pnl"] for run in runs),
+            "charges": sum(run["charges"] for run in runs),
+            "trades": trades,
+            "hit_rate": winners / trades if trades else 0.0,
+            "max_drawdown": max((run["max_drawdown"] for run in runs), default=0.0)
+        })
+    return results
+
+
+class ParameterSweep:
+    """Backtests many parameter sets of one strategy type across a process pool.
+
+    The candles of every symbol are copied once into a shared memory block
+    that each worker maps at startup, so tasks carry only parameter sets
+    and results. Sets are the full grid of the given ranges, or a random
+    sample of it.
+    """
+
+    def __init__(self, strategy_type, ranges, backtester_options=None, max_workers=None):
+        self.strategy_type = strategy_type
+        self.ranges = ranges  # param -> iterable of values
+        self.backtester_options = backtester_options or {}
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def parameter_sets(self, samples=None, seed=None):
+        names = list(self.ranges)
+        grid = [dict(zip(names, values)) for values in itertools.product(*(self.ranges[n] for n in names))]
+        grid = [params for params in grid if STRATEGY_TYPES[self.strategy_type].is_valid(params)]
+        if samples and samples < len(grid):
+            grid = random.Random(seed).sample(grid, samples)
+        return grid
+
+    def run(self, candles, samples=None, seed=None, progress=None):
+        """Rank parameter sets by total net P&L over `candles` (symbol -> DataFrame)"""
+        param_sets = self.parameter_sets(samples, seed)
+        if not param_sets or not candles:
+            return []
+
+        layout = {}
+        size = 0
+        for symbol, df in candles.items():
+            layout[symbol] = (size, len(df))
+            size += 24 * len(df)
+
+        memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        try:
+            for symbol, df in candles.items():
+                offset, bars = layout[symbol]
+                close = df["close"].to_numpy(dtype=np.float64)
+                np.ndarray(bars, dtype=np.int64, buffer=memory.buf, offset=offset)[:] = \
+                    df.index.values.astype("datetime64[ns]").view(np.int64)
+                np.ndarray(bars, dtype=np.float64, buffer=memory.buf, offset=offset + 8 * bars)[:] = \
+                    df["open"].to_numpy(dtype=np.float64) if "open" in df else close
+                np.ndarray(bars, dtype=np.float64, buffer=memory.buf, offset=offset + 16 * bars)[:] = close
+
+            # A few chunks per worker keeps them busy without a task per parameter set
+            chunk = max(1, len(param_sets) // (self.max_workers * 4))
+            chunks = [param_sets[i:i + chunk] for i in range(0, len(param_sets), chunk)]
+            results = []
+            # Spawn, not fork: the app process has Tk and network threads running
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(chunks)),
+                                     mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_sweep_worker_init, initargs=(memory.name, layout)) as pool:
+                futures = [pool.submit(_sweep_evaluate, self.strategy_type, part, self.backtester_options)
+                           for part in chunks]
+                for future in as_completed(futures):
+                    results.extend(future.result())
+                    if progress:
+                        progress(len(results), len(param_sets))
+        finally:
+            memory.close()
+            memory.unlink()
+
+        results.sort(key=lambda result: (-result["net_pnl"], result["max_drawdown"]))
+        return results
+
+
+def market_is_open(now=None):
+    now = now or datetime.now()
+    return now.weekday() < 5 and MARKET_OPEN <= (now.hour, now.minute) < MARKET_CLOSE
+
+
+def next_bar_close(timeframe, now=None):
+    """When the bar forming at `now` closes; for "day", the next session's open.
+
+    Intraday bars are aligned to the session open, as Kite's candles are,
+    and the last bar of a session is cut short at the close. Weekends have
+    no bars; exchange holidays are not known here.
+    """
+    now = now or datetime.now()
+    day = now.date()
+    while True:
+        if day.weekday() < 5:
+            session_open = datetime(day.year, day.month, day.day, *MARKET_OPEN)
+            session_close = datetime(day.year, day.month, day.day, *MARKET_CLOSE)
+            if timeframe == "day":
+                if session_open > now:
+                    return session_open
+            elif now < session_close:
+                step = HistoricalData.INTERVAL_SECONDS[timeframe]
+                elapsed = max((now - session_open).total_seconds(), 0)
+                return min(session_open + timedelta(seconds=(elapsed // step + 1) * step), session_close)
+        day += timedelta(days=1)
+
+
+class StrategyScheduler:
+    """Runs strategies when they can produce a new signal, instead of polling.
+
+    Bar-triggered strategies wait in a heap keyed by the close of the
+    current bar on their own timeframe. Tick-triggered strategies run only
+    for the symbols that ticked since their last run. The worker sleeps
+    until the earliest deadline or the next tick, so idle strategies and
+    symbols cost nothing.
+    """
+
+    def __init__(self, on_bar_close, on_ticks, delay=BAR_CLOSE_DELAY):
+        self.on_bar_close = on_bar_close  # callback(strategy_id)
+        self.on_ticks = on_ticks          # callback(strategy_id, symbols)
+        self.delay = timedelta(seconds=delay)
+        self.timeframes = {}  # bar-triggered strategy id -> timeframe
+        self.watchers = {}    # symbol -> ids of tick-triggered strategies
+        self.deadlines = []   # heap of (evaluation time, strategy id)
+        self.dirty = set()    # symbols that ticked since the last pass
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+
+    def set_jobs(self, jobs):
+        """Replace the schedule with {strategy id: (timeframe, trigger, symbols)}"""
+        now = datetime.now()
+        with self.condition:
+            self.timeframes = {}
+            self.watchers = {}
+            self.deadlines = []
+            for strategy_id, (timeframe, trigger, symbols) in jobs.items():
+                if trigger == "tick":
+                    for symbol in symbols:
+                        self.watchers.setdefault(symbol, set()).add(strategy_id)
+                else:
+                    self.timeframes[strategy_id] = timeframe
+                    self.deadlines.append((next_bar_close(timeframe, now) + self.delay, strategy_id))
+            heapq.heapify(self.deadlines)
+            self.dirty &= set(self.watchers)
+            self.condition.notify()
+
+    def mark_dirty(self, symbols):
+        """New prices arrived for these symbols"""
+        with self.condition:
+            watched = [symbol for symbol in symbols if symbol in self.watchers]
+            if watched:
+                self.dirty.update(watched)
+                self.condition.notify()
+
+    def _next_work(self):
+        """Wait for due deadlines or dirty symbols; returns (due ids, {id: symbols}) or None to stop"""
+        with self.condition:
+            while self.running and not self.dirty:
+                now = datetime.now()
+                if self.deadlines and self.deadlines[0][0] <= now:
+                    break
+                timeout = (self.deadlines[0][0] - now).total_seconds() if self.deadlines else None
+                self.condition.wait(timeout)
+            if not self.running:
+                return None
+
+            now = datetime.now()
+            due = []
+            while self.deadlines and self.deadlines[0][0] <= now:
+                _, strategy_id = heapq.heappop(self.deadlines)
+                due.append(strategy_id)
+                heapq.heappush(self.deadlines,
+                               (next_bar_close(self.timeframes[strategy_id], now) + self.delay, strategy_id))
+
+            ticked = {}
+            for symbol in self.dirty:
+                for strategy_id in self.watchers.get(symbol, ()):
+                    ticked.setdefault(strategy_id, []).append(symbol)
+            self.dirty = set()
+            return due, ticked
+
+    def _run(self):
+        while True:
+            work = self._next_work()
+            if work is None:
+                return
+            due, ticked = work
+            for strategy_id in due:
+                try:
+                    self.on_bar_close(strategy_id)
+                except Exception as e:
+                    print(f"Error running strategy {strategy_id} on bar close: {str(e)}")
+            for strategy_id, symbols in ticked.items():
+                try:
+                    self.on_ticks(strategy_id, symbols)
+                except Exception as e:
+                    print(f"Error running strategy {strategy_id} on ticks: {str(e)}")
+
+
 class StratagemIQ:
     def __init__(self, root):
         self.root = root
@@ -58,10 +3129,18 @@ class StratagemIQ:
         self.current_theme = "dark"
         self.colors = self.themes[self.current_theme]
 
+        # Transaction log writer; flushed when the window closes
+        self.logger = TransactionLogger()
+        self.logger.start()
+        self.audit_log = AuditLog(self.logger)
+        # Opened and migrated by the first startup loader that needs it
+        self.database = None
+        self.database_lock = threading.Lock()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
         # Initialize variables
-        self.credentials_list = self.load_credentials_list()
-        self.buy_kite_instances = []
-        self.sell_kite_instances = []
+        self.credentials_list = []  # Filled in by the startup pipeline
+        self.client_pool = KiteClientPool()
         self.logo_photo = None
         self.search_entry = None
         self.suggestion_tree = None
@@ -74,49 +3153,190 @@ class StratagemIQ:
         self.add_account_button = None
         self.account_dropdown = None
         self.result_label = None
-        self.stock_prices = {}
+        self.stock_prices = {}  # Live last price per symbol, shared by trees, strategies and portfolio
+        self.portfolio = Portfolio()
+        self.tick_stream = None
         self.subscribed_instruments = [[] for _ in range(10)]  # 10 wishlists
-        self.status_var = tk.StringVar(value="Ready")
-        self.selected_accounts = []
+        self.wishlist_rows = [{} for _ in range(10)]  # Per tab: symbol -> Treeview item id
+        self.row_symbols = {}  # (tab, item id) -> symbol
+        self.status_var = tk.StringVar(value="Starting...")
+        self.selected_accounts = []  # Usernames every order is mirrored to
+        self.selected_account = ""  # The dropdown's account, readable off the Tk thread
+        self.accounts = {}  # username -> {"creds", "kite"} for loaded accounts
         self.transaction_log = []
         self.limit_price_entry = None
         self.wishlist_names = [f"Wishlist {i+1}" for i in range(10)]  # Default names
+        self.wishlist_saver = DeferredWrite(lambda *snapshot: self.open_database().save_wishlists(*snapshot))
         
         # Strategy variables
         self.strategies = []
         self.active_strategies = []
-        self.strategy_thread = None
-        self.strategy_running = False
-        self.historical_data = {}
+        self.compiled_strategies = {}  # strategy id -> compiled Strategy
+        self.scheduler = StrategyScheduler(self.run_strategy_bar, self.run_strategy_ticks)
+        self.evaluated_bars = {}  # (strategy id, symbol) -> last bar a bar-close run acted on
+        self.historical_data = HistoryCache()  # (symbol, interval, days) -> candles
+        self.history = HistoricalData()
+        self.live_candles = CandleAggregator()
+        self.order_gateway = OrderGateway()
+        self.indicator_states = {}  # (strategy id, symbol) -> streaming indicator state
+        self.strategy_saver = DeferredWrite(lambda *snapshot: self.open_database().save_strategies(*snapshot))
+
+        # All widget updates from worker threads go through the dispatcher
+        self.ui = UIDispatcher(self.root)
+
+        # Instruments arrive from the startup pipeline; start with an empty registry
+        self.instrument_cache = InstrumentCache(session=self.client_pool.session)
+        self.all_instruments = InstrumentRegistry.empty()
+        self.search_index = InstrumentSearchIndex(self.all_instruments)
+        self.suggestion_after = None
+        self.last_suggestion_query = None
+        self.update_thread = None
+        
+        # Create widgets: the shell UI paints before any data is loaded
+        self.startup_started = time.perf_counter()
+        self.startup_results = {}
+        self.startup_applied = set()
+        self.create_widgets()
+        self.root.after_idle(self.record_first_paint)
+
+        # Load accounts, instruments, wishlists and strategies concurrently
+        self.start_startup_pipeline()
+
+    def start_startup_pipeline(self):
+        """Run the slow startup loaders in parallel; results are applied on the Tk thread"""
+        loaders = {
+            "accounts": self.load_accounts,
+            "instruments": self.get_all_instruments_with_index,
+            "wishlists": self.load_subscribed_instruments,
+            "strategies": self.load_strategies
+        }
+        self.status_var.set(f"Loading... (0/{len(loaders)})")
         
-        # Initialize KiteConnect instances
-        for creds in self.credentials_list:
+        executor = ThreadPoolExecutor(max_workers=len(loaders), thread_name_prefix="startup")
+        for name, loader in loaders.items():
+            executor.submit(self.run_startup_stage, name, loader)
+        executor.shutdown(wait=False)
+
+    def run_startup_stage(self, name, loader):
+        started = time.perf_counter()
+        try:
+            result, error = loader(), None
+        except Exception as e:
+            result, error = None, e
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.ui.post(self.finish_startup_stage, name, result, error, elapsed_ms)
+
+    def finish_startup_stage(self, name, result, error, elapsed_ms):
+        """Record a finished loader, then apply every stage whose inputs are ready"""
+        since_start_ms = (time.perf_counter() - self.startup_started) * 1000
+        if error:
+            self.log_transaction(f"Startup: {name} failed after {elapsed_ms:.0f} ms: {str(error)}")
+        else:
+            self.log_transaction(f"Startup: {name} loaded in {elapsed_ms:.0f} ms (ready at {since_start_ms:.0f} ms)")
+        self.startup_results[name] = result
+        self.advance_startup()
+
+    def advance_startup(self):
+        results = self.startup_results
+        applied = self.startup_applied
+        
+        if "accounts" in results and "accounts" not in applied:
+            applied.add("accounts")
+            self.show_accounts(results["accounts"])
+            self.set_widgets_state(self.startup_widgets("accounts"), True)
+            
+            # Start price update thread
+            self.update_thread = threading.Thread(target=self.update_stock_prices_thread, daemon=True)
+            self.update_thread.start()
+        
+        if "instruments" in results and "instruments" not in applied:
+            applied.add("instruments")
+            if results["instruments"]:
+                self.all_instruments, self.search_index = results["instruments"]
+            self.set_widgets_state(self.startup_widgets("instruments"), True)
+            
+            # Refresh the cached instrument master in the background when it is stale
+            if not self.instrument_cache.is_fresh():
+                threading.Thread(target=self.refresh_instruments_thread, daemon=True).start()
+        
+        if "wishlists" in results and "wishlists" not in applied:
+            applied.add("wishlists")
+            self.show_subscribed_instruments(results["wishlists"])
+        
+        # Strategy names are shown in wishlist rows, so wishlists go first
+        if "strategies" in results and "wishlists" in applied and "strategies" not in applied:
+            applied.add("strategies")
+            self.show_strategies(results["strategies"])
+            self.set_widgets_state(self.startup_widgets("strategies"), True)
+            
+            # Strategies run on bar closes and ticks from here on
+            self.sync_scheduler()
+            self.scheduler.start()
+        
+        # Live tick stream needs an account, the token map and the subscriptions
+        if {"accounts", "instruments", "wishlists"} <= applied and self.tick_stream is None:
+            self.start_tick_stream()
+        
+        total = len(("accounts", "instruments", "wishlists", "strategies"))
+        if len(applied) < total:
+            self.status_var.set(f"Loading... ({len(applied)}/{total})")
+        elif "ready" not in applied:
+            applied.add("ready")
+            self.status_var.set("Ready")
+            total_ms = (time.perf_counter() - self.startup_started) * 1000
+            self.log_transaction(f"Startup: all features ready in {total_ms:.0f} ms")
+
+    def record_first_paint(self):
+        self.root.update_idletasks()
+        first_paint_ms = (time.perf_counter() - self.startup_started) * 1000
+        self.log_transaction(f"Startup: first paint in {first_paint_ms:.0f} ms")
+
+    def startup_widgets(self, stage):
+        """Widgets that stay disabled until a startup stage is applied"""
+        if stage == "accounts":
+            return [self.buy_button, self.sell_button, self.add_account_button, self.change_access_token_button,
+                    self.quantity_scale_button]
+        if stage == "instruments":
+            return [self.search_entry, self.search_button, self.add_button]
+        if stage == "strategies":
+            return [self.add_strategy_button, self.edit_strategy_button, self.delete_strategy_button,
+                    self.toggle_strategy_button, self.backtest_strategy_button, self.optimize_strategy_button,
+                    self.save_strategy_button]
+        return []
+
+    def set_widgets_state(self, widgets, enabled):
+        for widget in widgets:
+            widget.config(state=tk.NORMAL if enabled else tk.DISABLED)
+
+    def load_accounts(self):
+        """Read the saved accounts and create KiteConnect clients for them; safe off the Tk thread"""
+        clients = []
+        errors = []
+        try:
+            credentials_list = self.open_database().load_credentials()
+        except Exception as e:
+            return [], clients, [f"Failed to load credentials: {str(e)}"]
+        for creds in credentials_list:
             try:
-                buy_kite = KiteConnect(api_key=creds["api_key"])
-                sell_kite = KiteConnect(api_key=creds["api_key"])
-                buy_kite.set_access_token(creds["access_token"])
-                sell_kite.set_access_token(creds["access_token"])
-                self.buy_kite_instances.append(buy_kite)
-                self.sell_kite_instances.append(sell_kite)
+                clients.append((creds, self.client_pool.client(creds["api_key"], creds["access_token"])))
             except Exception as e:
-                messagebox.showerror("Error", f"Failed to initialize account {creds['username']}: {str(e)}")
+                errors.append(f"Failed to initialize account {creds['username']}: {str(e)}")
+        return credentials_list, clients, errors
 
-        # Fetch all instruments from Kite API
-        self.all_instruments = self.get_all_instruments()
-        
-        # Create widgets
-        self.create_widgets()
-        self.update_suggestions()
-        self.load_subscribed_instruments()
-        self.load_strategies()
+    def show_accounts(self, result):
+        if not result:
+            return
+        self.credentials_list, clients, errors = result
+        for creds, kite in clients:
+            self.accounts[creds["username"]] = {"creds": creds, "kite": kite}
         
-        # Start price update thread
-        self.update_thread = threading.Thread(target=self.update_stock_prices_thread, daemon=True)
-        self.update_thread.start()
+        self.refresh_account_widgets()
+        if self.account_dropdown['values'] and not self.account_dropdown.get():
+            self.account_dropdown.current(0)
+        self.update_selected_account()
         
-        # Start strategy thread
-        self.strategy_thread = threading.Thread(target=self.strategy_execution_thread, daemon=True)
-        self.strategy_thread.start()
+        for message in errors:
+            messagebox.showerror("Error", message)
 
     def create_widgets(self):
         # Create menu bar
@@ -129,6 +3349,10 @@ class StratagemIQ:
         theme_menu.add_command(label="Light Theme", command=lambda: self.change_theme("light"))
         self.menubar.add_cascade(label="Themes", menu=theme_menu)
         
+        tools_menu = tk.Menu(self.menubar, tearoff=0)
+        tools_menu.add_command(label="Audit Log", command=self.open_audit_log)
+        self.menubar.add_cascade(label="Tools", menu=tools_menu)
+        
         # Create header frame
         self.header_frame = tk.Frame(self.root, bg=self.colors["header"], height=80)
         self.header_frame.pack(fill=tk.X, padx=0, pady=0)
@@ -218,6 +3442,26 @@ class StratagemIQ:
                                            width=20, font=("Segoe UI", 9))
         self.account_dropdown.pack(fill=tk.X, padx=5, pady=5)
         self.account_dropdown.current(0) if self.account_dropdown['values'] else None
+        self.account_dropdown.bind("<<ComboboxSelected>>", self.update_selected_account)
+        self.update_selected_account()
+        
+        # Accounts to mirror orders to; with none ticked, orders go to the selected account
+        tk.Label(self.account_frame, text="Mirror Orders To:", fg=self.colors["text"], 
+               bg=self.colors["panel"], font=("Segoe UI", 9)).pack(anchor="w", padx=5)
+        self.mirror_listbox = tk.Listbox(self.account_frame, selectmode=tk.MULTIPLE, exportselection=False,
+                                       height=4, font=("Segoe UI", 9), relief=tk.FLAT,
+                                       bg=self.colors["background"], fg=self.colors["text"],
+                                       selectbackground=self.colors["secondary"])
+        self.mirror_listbox.pack(fill=tk.X, padx=5, pady=5)
+        self.mirror_listbox.bind("<<ListboxSelect>>", self.update_selected_accounts)
+        
+        # Quantity scale button
+        self.quantity_scale_button = tk.Button(self.account_frame, text="Set Quantity Scale", 
+                                             command=self.change_quantity_scale,
+                                             bg=self.colors["primary"], fg="white", 
+                                             font=("Segoe UI", 10, "bold"), 
+                                             relief=tk.FLAT, padx=10, cursor="hand2")
+        self.quantity_scale_button.pack(fill=tk.X, pady=5, padx=5)
         
         # Change Access Token button
         self.change_access_token_button = tk.Button(self.account_frame, text="Update Access Token", 
@@ -241,7 +3485,23 @@ class StratagemIQ:
         self.portfolio_value = tk.Label(self.dashboard_frame, text="₹0.00", 
                                       font=("Segoe UI", 16, "bold"), 
                                       fg=self.colors["positive"], bg=self.colors["panel"])
-        self.portfolio_value.pack(anchor="w", pady=(0, 15))
+        self.portfolio_value.pack(anchor="w", pady=(0, 5))
+        
+        # Open P&L across holdings and positions
+        self.portfolio_pnl = tk.Label(self.dashboard_frame, text="P&L: ₹0.00", 
+                                    font=("Segoe UI", 10, "bold"), 
+                                    fg=self.colors["positive"], bg=self.colors["panel"])
+        self.portfolio_pnl.pack(anchor="w", pady=(0, 5))
+        
+        # Per-account breakdown
+        self.portfolio_tree = ttk.Treeview(self.dashboard_frame, columns=("Account", "Value", "P&L"), 
+                                         show="headings", height=3)
+        self.portfolio_tree.column("Account", width=90, anchor=tk.W)
+        self.portfolio_tree.column("Value", width=90, anchor=tk.E)
+        self.portfolio_tree.column("P&L", width=80, anchor=tk.E)
+        for column in ("Account", "Value", "P&L"):
+            self.portfolio_tree.heading(column, text=column)
+        self.portfolio_tree.pack(fill=tk.X, pady=(0, 15))
         
         # Market status
         tk.Label(self.dashboard_frame, text="Market Status:", fg=self.colors["light_text"], 
@@ -394,6 +3654,18 @@ class StratagemIQ:
                                               relief=tk.FLAT, padx=10, cursor="hand2")
         self.toggle_strategy_button.pack(side=tk.LEFT, padx=5)
         
+        self.backtest_strategy_button = tk.Button(strategy_controls, text="Backtest", command=self.backtest_strategy,
+                                                bg=self.colors["primary"], fg="white", 
+                                                font=("Segoe UI", 10, "bold"), 
+                                                relief=tk.FLAT, padx=10, cursor="hand2")
+        self.backtest_strategy_button.pack(side=tk.LEFT, padx=5)
+        
+        self.optimize_strategy_button = tk.Button(strategy_controls, text="Optimize", command=self.open_optimizer,
+                                                bg=self.colors["primary"], fg="white", 
+                                                font=("Segoe UI", 10, "bold"), 
+                                                relief=tk.FLAT, padx=10, cursor="hand2")
+        self.optimize_strategy_button.pack(side=tk.LEFT, padx=5)
+        
         # Strategy configuration frame
         config_frame = tk.LabelFrame(strategy_frame, text="Strategy Configuration", 
                                    font=("Segoe UI", 10, "bold"),
@@ -404,7 +3676,7 @@ class StratagemIQ:
         # Strategy type selection
         tk.Label(config_frame, text="Strategy Type:", fg=self.colors["text"], 
                bg=self.colors["panel"], font=("Segoe UI", 9)).grid(row=0, column=0, padx=5, pady=5, sticky="e")
-        self.strategy_type = ttk.Combobox(config_frame, values=["Moving Average Crossover", "RSI", "MACD"], 
+        self.strategy_type = ttk.Combobox(config_frame, values=list(STRATEGY_TYPES), 
                                         width=25, font=("Segoe UI", 9))
         self.strategy_type.grid(row=0, column=1, padx=5, pady=5, sticky="w")
         self.strategy_type.current(0)
@@ -416,19 +3688,35 @@ class StratagemIQ:
         self.strategy_name = ttk.Entry(config_frame, width=20, font=("Segoe UI", 9))
         self.strategy_name.grid(row=0, column=3, padx=5, pady=5, sticky="w")
         
+        # Bar timeframe and when to evaluate: on each bar close, or on every tick against the forming bar
+        tk.Label(config_frame, text="Timeframe:", fg=self.colors["text"], 
+               bg=self.colors["panel"], font=("Segoe UI", 9)).grid(row=1, column=0, padx=5, pady=5, sticky="e")
+        self.strategy_timeframe = ttk.Combobox(config_frame, values=list(STRATEGY_TIMEFRAMES), state="readonly",
+                                             width=12, font=("Segoe UI", 9))
+        self.strategy_timeframe.grid(row=1, column=1, padx=5, pady=5, sticky="w")
+        self.strategy_timeframe.set("day")
+        
+        tk.Label(config_frame, text="Trigger:", fg=self.colors["text"], 
+               bg=self.colors["panel"], font=("Segoe UI", 9)).grid(row=1, column=2, padx=5, pady=5, sticky="e")
+        self.strategy_trigger = ttk.Combobox(config_frame, values=["bar", "tick"], state="readonly",
+                                           width=8, font=("Segoe UI", 9))
+        self.strategy_trigger.grid(row=1, column=3, padx=5, pady=5, sticky="w")
+        self.strategy_trigger.set("bar")
+        
         # Parameters frame
         self.parameters_frame = tk.Frame(config_frame, bg=self.colors["panel"])
-        self.parameters_frame.grid(row=1, column=0, columnspan=4, padx=5, pady=5, sticky="we")
+        self.parameters_frame.grid(row=2, column=0, columnspan=4, padx=5, pady=5, sticky="we")
         
         # Default parameters
-        self.create_ma_config()
+        self.param_entries = {}
+        self.update_strategy_config()
         
         # Save strategy button
         self.save_strategy_button = tk.Button(config_frame, text="Save Strategy", command=self.save_strategy,
                                             bg=self.colors["secondary"], fg="white", 
                                             font=("Segoe UI", 10, "bold"), 
                                             relief=tk.FLAT, padx=10, cursor="hand2")
-        self.save_strategy_button.grid(row=2, column=0, columnspan=4, pady=10)
+        self.save_strategy_button.grid(row=3, column=0, columnspan=4, pady=10)
         
         # Bottom panel for search and trading
         self.bottom_panel = tk.Frame(self.right_panel, bg=self.colors["panel"])
@@ -449,7 +3737,7 @@ class StratagemIQ:
         # Search entry
         self.search_entry = ttk.Entry(search_controls, width=40, font=("Segoe UI", 10))
         self.search_entry.pack(side=tk.LEFT, padx=(0, 10), pady=5, fill=tk.X, expand=True)
-        self.search_entry.bind('<KeyRelease>', self.update_suggestions)
+        self.search_entry.bind('<KeyRelease>', self.schedule_suggestions)
         
         # Search button
         self.search_button = tk.Button(search_controls, text="Search", command=self.search_instruments,
@@ -575,11 +3863,20 @@ class StratagemIQ:
                                     activebackground="#ea580c")
         self.sell_button.grid(row=0, column=7, padx=10, pady=5)
         
+        # Price colours are applied as row tags
+        self.configure_row_tags()
+        
+        # Features are enabled by the startup pipeline as their data arrives
+        self.set_widgets_state(self.startup_widgets("instruments"), False)
+        self.set_widgets_state(self.startup_widgets("accounts"), False)
+        self.set_widgets_state(self.startup_widgets("strategies"), False)
+        
         # Add initial status message
         self.log_transaction("System initialized. Ready to trade.")
         
-        # Update market status
-        self.update_market_status()
+        # Update market status every minute; the dispatcher owns the timer
+        self.ui.every("market_status", 60000, self.update_market_status)
+        self.ui.start()
 
     def show_tab_menu(self, event):
         """Show context menu for tab renaming"""
@@ -605,9 +3902,6 @@ class StratagemIQ:
         item = tree.identify_row(event.y)
         
         if item:
-            # Get the stock symbol
-            stock = tree.item(item)["values"][0]
-            
             # Create menu
             menu = tk.Menu(self.root, tearoff=0)
             menu.add_command(label="Assign Strategy", 
@@ -618,7 +3912,7 @@ class StratagemIQ:
 
     def assign_strategy(self, tree, item):
         """Assign a strategy to an instrument"""
-        stock = tree.item(item)["values"][0]
+        stock = self.row_symbols[(self.stock_trees.index(tree), item)]
         
         # Get available strategies
         strategy_names = [s["name"] for s in self.strategies]
@@ -649,11 +3943,12 @@ class StratagemIQ:
                     
             self.save_strategies()
             self.update_strategy_tree()
-            self.log_transaction(f"Assigned '{strategy_name}' to {stock}")
+            self.log_transaction(f"Assigned '{strategy_name}' to {stock}", event="strategy",
+                                 symbol=stock, strategy=strategy_name)
 
     def remove_strategy(self, tree, item):
         """Remove strategy from an instrument"""
-        stock = tree.item(item)["values"][0]
+        stock = self.row_symbols[(self.stock_trees.index(tree), item)]
         current_strategy = tree.item(item)["values"][4] if len(tree.item(item)["values"]) > 4 else ""
         
         if not current_strategy:
@@ -673,98 +3968,35 @@ class StratagemIQ:
                 
         self.save_strategies()
         self.update_strategy_tree()
-        self.log_transaction(f"Removed strategy from {stock}")
-
-    def create_ma_config(self):
-        """Create configuration for Moving Average strategy"""
-        # Clear existing widgets
-        for widget in self.parameters_frame.winfo_children():
-            widget.destroy()
-        
-        # Short MA period
-        tk.Label(self.parameters_frame, text="Short MA Period:", fg=self.colors["text"], 
-               bg=self.colors["panel"], font=("Segoe UI", 9)).grid(row=0, column=0, padx=5, pady=5, sticky="e")
-        self.short_ma = ttk.Entry(self.parameters_frame, width=10, font=("Segoe UI", 9))
-        self.short_ma.grid(row=0, column=1, padx=5, pady=5, sticky="w")
-        self.short_ma.insert(0, "20")
-        
-        # Long MA period
-        tk.Label(self.parameters_frame, text="Long MA Period:", fg=self.colors["text"], 
-               bg=self.colors["panel"], font=("Segoe UI", 9)).grid(row=0, column=2, padx=5, pady=5, sticky="e")
-        self.long_ma = ttk.Entry(self.parameters_frame, width=10, font=("Segoe UI", 9))
-        self.long_ma.grid(row=0, column=3, padx=5, pady=5, sticky="w")
-        self.long_ma.insert(0, "50")
-
-    def create_rsi_config(self):
-        """Create configuration for RSI strategy"""
-        # Clear existing widgets
-        for widget in self.parameters_frame.winfo_children():
-            widget.destroy()
-        
-        # RSI Period
-        tk.Label(self.parameters_frame, text="RSI Period:", fg=self.colors["text"], 
-               bg=self.colors["panel"], font=("Segoe UI", 9)).grid(row=0, column=0, padx=5, pady=5, sticky="e")
-        self.rsi_period = ttk.Entry(self.parameters_frame, width=10, font=("Segoe UI", 9))
-        self.rsi_period.grid(row=0, column=1, padx=5, pady=5, sticky="w")
-        self.rsi_period.insert(0, "14")
-        
-        # Overbought level
-        tk.Label(self.parameters_frame, text="Overbought Level:", fg=self.colors["text"], 
-               bg=self.colors["panel"], font=("Segoe UI", 9)).grid(row=0, column=2, padx=5, pady=5, sticky="e")
-        self.overbought = ttk.Entry(self.parameters_frame, width=10, font=("Segoe UI", 9))
-        self.overbought.grid(row=0, column=3, padx=5, pady=5, sticky="w")
-        self.overbought.insert(0, "70")
-        
-        # Oversold level
-        tk.Label(self.parameters_frame, text="Oversold Level:", fg=self.colors["text"], 
-               bg=self.colors["panel"], font=("Segoe UI", 9)).grid(row=1, column=0, padx=5, pady=5, sticky="e")
-        self.oversold = ttk.Entry(self.parameters_frame, width=10, font=("Segoe UI", 9))
-        self.oversold.grid(row=1, column=1, padx=5, pady=5, sticky="w")
-        self.oversold.insert(0, "30")
+        self.log_transaction(f"Removed strategy from {stock}", event="strategy", symbol=stock)
 
-    def create_macd_config(self):
-        """Create configuration for MACD strategy"""
-        # Clear existing widgets
+    def update_strategy_config(self, event=None):
+        """Rebuild the parameter entries for the selected strategy type"""
         for widget in self.parameters_frame.winfo_children():
             widget.destroy()
+        self.param_entries = {}
         
-        # Fast EMA
-        tk.Label(self.parameters_frame, text="Fast EMA:", fg=self.colors["text"], 
-               bg=self.colors["panel"], font=("Segoe UI", 9)).grid(row=0, column=0, padx=5, pady=5, sticky="e")
-        self.fast_ema = ttk.Entry(self.parameters_frame, width=10, font=("Segoe UI", 9))
-        self.fast_ema.grid(row=0, column=1, padx=5, pady=5, sticky="w")
-        self.fast_ema.insert(0, "12")
-        
-        # Slow EMA
-        tk.Label(self.parameters_frame, text="Slow EMA:", fg=self.colors["text"], 
-               bg=self.colors["panel"], font=("Segoe UI", 9)).grid(row=0, column=2, padx=5, pady=5, sticky="e")
-        self.slow_ema = ttk.Entry(self.parameters_frame, width=10, font=("Segoe UI", 9))
-        self.slow_ema.grid(row=0, column=3, padx=5, pady=5, sticky="w")
-        self.slow_ema.insert(0, "26")
-        
-        # Signal Period
-        tk.Label(self.parameters_frame, text="Signal Period:", fg=self.colors["text"], 
-               bg=self.colors["panel"], font=("Segoe UI", 9)).grid(row=1, column=0, padx=5, pady=5, sticky="e")
-        self.signal_period = ttk.Entry(self.parameters_frame, width=10, font=("Segoe UI", 9))
-        self.signal_period.grid(row=1, column=1, padx=5, pady=5, sticky="w")
-        self.signal_period.insert(0, "9")
-
-    def update_strategy_config(self, event=None):
-        """Update configuration based on selected strategy type"""
-        strategy_type = self.strategy_type.get()
+        strategy_cls = STRATEGY_TYPES.get(self.strategy_type.get())
+        if strategy_cls is None:
+            return
         
-        if strategy_type == "Moving Average Crossover":
-            self.create_ma_config()
-        elif strategy_type == "RSI":
-            self.create_rsi_config()
-        elif strategy_type == "MACD":
-            self.create_macd_config()
+        # Two parameters per row
+        for i, (name, label, default) in enumerate(strategy_cls.PARAMS):
+            row, column = divmod(i, 2)
+            tk.Label(self.parameters_frame, text=f"{label}:", fg=self.colors["text"], 
+                   bg=self.colors["panel"], font=("Segoe UI", 9)).grid(row=row, column=column * 2, padx=5, pady=5, sticky="e")
+            entry = ttk.Entry(self.parameters_frame, width=10, font=("Segoe UI", 9))
+            entry.grid(row=row, column=column * 2 + 1, padx=5, pady=5, sticky="w")
+            entry.insert(0, str(default))
+            self.param_entries[name] = entry
 
     def add_strategy(self):
         """Add a new strategy"""
         self.strategy_name.delete(0, tk.END)
         self.strategy_name.insert(0, f"Strategy {len(self.strategies)+1}")
         self.strategy_type.current(0)
+        self.strategy_timeframe.set("day")
+        self.strategy_trigger.set("bar")
         self.update_strategy_config()
 
     def edit_strategy(self):
@@ -784,28 +4016,15 @@ class StratagemIQ:
             # Set strategy type
             index = self.strategy_type["values"].index(strategy["type"])
             self.strategy_type.current(index)
+            self.strategy_timeframe.set(strategy.get("timeframe", "day"))
+            self.strategy_trigger.set(strategy.get("trigger", "bar"))
             self.update_strategy_config()
             
             # Set parameters
-            if strategy["type"] == "Moving Average Crossover":
-                self.short_ma.delete(0, tk.END)
-                self.short_ma.insert(0, strategy["params"]["short_ma"])
-                self.long_ma.delete(0, tk.END)
-                self.long_ma.insert(0, strategy["params"]["long_ma"])
-            elif strategy["type"] == "RSI":
-                self.rsi_period.delete(0, tk.END)
-                self.rsi_period.insert(0, strategy["params"]["period"])
-                self.overbought.delete(0, tk.END)
-                self.overbought.insert(0, strategy["params"]["overbought"])
-                self.oversold.delete(0, tk.END)
-                self.oversold.insert(0, strategy["params"]["oversold"])
-            elif strategy["type"] == "MACD":
-                self.fast_ema.delete(0, tk.END)
-                self.fast_ema.insert(0, strategy["params"]["fast_ema"])
-                self.slow_ema.delete(0, tk.END)
-                self.slow_ema.insert(0, strategy["params"]["slow_ema"])
-                self.signal_period.delete(0, tk.END)
-                self.signal_period.insert(0, strategy["params"]["signal_period"])
+            for name, entry in self.param_entries.items():
+                if name in strategy["params"]:
+                    entry.delete(0, tk.END)
+                    entry.insert(0, strategy["params"][name])
 
     def delete_strategy(self):
         """Delete selected strategy"""
@@ -814,77 +4033,468 @@ class StratagemIQ:
             messagebox.showwarning("Selection Error", "Please select a strategy to delete")
             return
             
-        strategy_id = self.strategy_tree.item(selected[0])["values"][0]
-        
-        # Remove from strategies
-        self.strategies = [s for s in self.strategies if s["id"] != strategy_id]
+        strategy_id = self.strategy_tree.item(selected[0])["values"][0]
+        strategy = next((s for s in self.strategies if s["id"] == strategy_id), None)
+        
+        # Remove from strategies
+        self.strategies = [s for s in self.strategies if s["id"] != strategy_id]
+        
+        # Remove from active strategies
+        self.active_strategies = [s for s in self.active_strategies if s["id"] != strategy_id]
+        self.compiled_strategies.pop(strategy_id, None)
+        self.indicator_states = {k: v for k, v in self.indicator_states.items() if k[0] != strategy_id}
+        self.evaluated_bars = {k: v for k, v in self.evaluated_bars.items() if k[0] != strategy_id}
+        
+        # Remove from wishlist treeviews; only the strategy's own instruments can show it
+        if strategy:
+            for tab, tree in enumerate(self.stock_trees):
+                for stock in strategy["instruments"]:
+                    item = self.wishlist_rows[tab].get(stock)
+                    if item is None:
+                        continue
+                    values = list(tree.item(item)["values"])
+                    if len(values) > 4 and values[4] == strategy["name"]:
+                        values[4] = ""
+                        tree.item(item, values=values)
+        
+        self.save_strategies()
+        self.update_strategy_tree()
+        self.log_transaction(f"Deleted strategy: {strategy_id}")
+
+    def toggle_strategy(self):
+        """Enable/disable selected strategy"""
+        selected = self.strategy_tree.selection()
+        if not selected:
+            messagebox.showwarning("Selection Error", "Please select a strategy to toggle")
+            return
+            
+        strategy_id = self.strategy_tree.item(selected[0])["values"][0]
+        strategy = next((s for s in self.strategies if s["id"] == strategy_id), None)
+        
+        if strategy:
+            # Toggle status
+            if strategy in self.active_strategies:
+                self.active_strategies.remove(strategy)
+                strategy["status"] = "Disabled"
+            elif strategy["id"] not in self.compiled_strategies:
+                messagebox.showwarning("Invalid Strategy", "Fix this strategy's parameters before enabling it")
+                return
+            else:
+                self.active_strategies.append(strategy)
+                strategy["status"] = "Enabled"
+                
+            self.save_strategies()
+            self.update_strategy_tree()
+            self.log_transaction(f"{'Enabled' if strategy['status'] == 'Enabled' else 'Disabled'} strategy: {strategy['name']}")
+
+    def backtest_strategy(self):
+        """Backtest the selected strategy on its instruments over stored history"""
+        selected = self.strategy_tree.selection()
+        if not selected:
+            messagebox.showwarning("Selection Error", "Please select a strategy to backtest")
+            return
+            
+        strategy_id = self.strategy_tree.item(selected[0])["values"][0]
+        strategy = next((s for s in self.strategies if s["id"] == strategy_id), None)
+        if not strategy:
+            return
+        if not strategy["instruments"]:
+            messagebox.showwarning("Backtest", "Assign the strategy to at least one instrument first")
+            return
+            
+        # Any interval the candle store keeps, minute bars included; defaults to the strategy's own
+        dialog = tk.Toplevel(self.root)
+        dialog.title(f"Backtest - {strategy['name']}")
+        dialog.configure(bg=self.colors["panel"])
+        dialog.transient(self.root)
+        
+        tk.Label(dialog, text="Timeframe:", fg=self.colors["text"], bg=self.colors["panel"],
+               font=("Segoe UI", 9)).grid(row=0, column=0, padx=5, pady=5, sticky="e")
+        timeframe = ttk.Combobox(dialog, values=list(HistoricalData.MAX_DAYS), state="readonly", width=12,
+                                 font=("Segoe UI", 9))
+        timeframe.set(strategy.get("timeframe", "day"))
+        timeframe.grid(row=0, column=1, padx=5, pady=5, sticky="w")
+        
+        tk.Label(dialog, text="Lookback (days):", fg=self.colors["text"], bg=self.colors["panel"],
+               font=("Segoe UI", 9)).grid(row=1, column=0, padx=5, pady=5, sticky="e")
+        lookback = ttk.Combobox(dialog, values=BACKTEST_LOOKBACKS, state="readonly", width=12, font=("Segoe UI", 9))
+        lookback.set(BACKTEST_DAYS)
+        lookback.grid(row=1, column=1, padx=5, pady=5, sticky="w")
+        
+        def start():
+            interval, days = timeframe.get(), int(lookback.get())
+            dialog.destroy()
+            self.log_transaction(f"Backtesting '{strategy['name']}' on {len(strategy['instruments'])} instruments "
+                                 f"({interval} bars, {days} days)")
+            threading.Thread(target=self.run_backtest, args=(dict(strategy), interval, days), daemon=True).start()
+        
+        tk.Button(dialog, text="Run", command=start, bg=self.colors["secondary"], fg="white",
+                  font=("Segoe UI", 10, "bold"), relief=tk.FLAT, padx=10,
+                  cursor="hand2").grid(row=2, column=0, columnspan=2, pady=10)
+
+    def run_backtest(self, strategy, timeframe="day", days=BACKTEST_DAYS):
+        """Worker thread: backtest every instrument, then show the results"""
+        try:
+            compiled = compile_strategy(strategy["type"], strategy["params"])
+        except ValueError as e:
+            self.log_transaction(f"Cannot backtest '{strategy['name']}': {str(e)}")
+            return
+        backtester = Backtester()
+        config = ("backtest", strategy["type"], tuple(sorted(compiled.params.items())))
+        results = {}
+        for symbol in strategy["instruments"]:
+            try:
+                candles = self.get_historical_data(symbol, days=days, interval=timeframe)
+                if candles.empty:
+                    continue
+                # Unchanged history and parameters give the same result; reuse it
+                key = (symbol, timeframe, days)
+                result = self.historical_data.get_derived(key, config)
+                if result is None:
+                    result = backtester.run(compiled, candles)
+                    self.historical_data.put_derived(key, config, result)
+                results[symbol] = result
+            except Exception as e:
+                self.log_transaction(f"Error backtesting {symbol}: {str(e)}", event="error", symbol=symbol)
+        self.ui.post(self.show_backtest_results, strategy, results, timeframe, days)
+
+    def show_backtest_results(self, strategy, results, timeframe="day", days=BACKTEST_DAYS):
+        """Summary per instrument, with the trade list of the selected one"""
+        if not results:
+            messagebox.showinfo("Backtest", f"No stored history to backtest '{strategy['name']}' on")
+            return
+            
+        window = tk.Toplevel(self.root)
+        window.title(f"Backtest - {strategy['name']} ({strategy['type']}, {timeframe} bars, {days} days)")
+        window.geometry("900x600")
+        window.configure(bg=self.colors["background"])
+        
+        columns = ("Symbol", "Trades", "Hit Rate", "Net P&L", "Charges", "Max Drawdown")
+        summary = ttk.Treeview(window, columns=columns, show="headings", height=8)
+        for column in columns:
+            summary.heading(column, text=column)
+            summary.column(column, width=130, anchor=tk.W if column == "Symbol" else tk.E)
+        summary.pack(fill=tk.X, padx=10, pady=10)
+        
+        for symbol, result in results.items():
+            summary.insert("", tk.END, iid=symbol, values=(
+                symbol, result["trades"], f"{result['hit_rate'] * 100:.1f}%", f"{result['net_pnl']:.2f}",
+                f"{result['charges']:.2f}", f"{result['max_drawdown']:.2f} ({result['max_drawdown_pct']:.2f}%)"
+            ))
+        trades = sum(r["trades"] for r in results.values())
+        winners = sum(r["winners"] for r in results.values())
+        summary.insert("", tk.END, iid="__total__", values=(
+            "TOTAL", trades, f"{winners / trades * 100 if trades else 0:.1f}%",
+            f"{sum(r['net_pnl'] for r in results.values()):.2f}",
+            f"{sum(r['charges'] for r in results.values()):.2f}", ""
+        ))
+        
+        trade_columns = ("Entry", "Exit", "Side", "Qty", "Entry Price", "Exit Price", "Charges", "P&L")
+        trade_tree = ttk.Treeview(window, columns=trade_columns, show="headings")
+        for column in trade_columns:
+            trade_tree.heading(column, text=column)
+            trade_tree.column(column, width=105, anchor=tk.E)
+        trade_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        
+        def show_trades(event=None):
+            trade_tree.delete(*trade_tree.get_children())
+            selection = summary.selection()
+            if not selection or selection[0] not in results:
+                return
+            for trade in results[selection[0]]["trade_list"].itertuples(index=False):
+                trade_tree.insert("", tk.END, values=(
+                    f"{trade.entry_time:%Y-%m-%d %H:%M}", f"{trade.exit_time:%Y-%m-%d %H:%M}", trade.side,
+                    trade.quantity, f"{trade.entry_price:.2f}", f"{trade.exit_price:.2f}",
+                    f"{trade.charges:.2f}", f"{trade.pnl:.2f}"
+                ))
+        
+        summary.bind("<<TreeviewSelect>>", show_trades)
+        summary.selection_set(next(iter(results)))
+        
+        total = sum(r["net_pnl"] for r in results.values())
+        self.log_transaction(f"Backtest '{strategy['name']}': {trades} trades, net P&L {total:.2f}")
+
+    def open_optimizer(self):
+        """Parameter sweep for the strategy type chosen in the configuration panel"""
+        strategy_type = self.strategy_type.get()
+        if strategy_type not in STRATEGY_TYPES:
+            messagebox.showwarning("Optimize", "Please choose a strategy type to optimize")
+            return
+            
+        # Default to the selected strategy's instruments, else the first wishlist
+        symbols = []
+        selected = self.strategy_tree.selection()
+        if selected:
+            strategy_id = self.strategy_tree.item(selected[0])["values"][0]
+            strategy = next((s for s in self.strategies if s["id"] == strategy_id), None)
+            if strategy:
+                symbols = list(strategy["instruments"])
+        if not symbols:
+            symbols = list(self.wishlist_rows[0])
+            
+        window = tk.Toplevel(self.root)
+        window.title(f"Optimize - {strategy_type}")
+        window.geometry("800x600")
+        window.configure(bg=self.colors["background"])
+        
+        form = tk.Frame(window, bg=self.colors["panel"])
+        form.pack(fill=tk.X, padx=10, pady=10)
+        for column, heading in enumerate(("Parameter", "From", "To", "Step")):
+            tk.Label(form, text=heading, fg=self.colors["light_text"], bg=self.colors["panel"],
+                   font=("Segoe UI", 9, "bold")).grid(row=0, column=column, padx=5, pady=2)
+        
+        range_entries = {}
+        for row, (name, bounds) in enumerate(STRATEGY_TYPES[strategy_type].SEARCH_RANGES.items(), start=1):
+            tk.Label(form, text=name, fg=self.colors["text"], bg=self.colors["panel"],
+                   font=("Segoe UI", 9)).grid(row=row, column=0, padx=5, pady=2, sticky="e")
+            entries = []
+            for column, value in enumerate(bounds, start=1):
+                entry = ttk.Entry(form, width=8, font=("Segoe UI", 9))
+                entry.insert(0, str(value))
+                entry.grid(row=row, column=column, padx=5, pady=2)
+                entries.append(entry)
+            range_entries[name] = entries
+        
+        row = len(range_entries) + 1
+        tk.Label(form, text="Symbols:", fg=self.colors["text"], bg=self.colors["panel"],
+               font=("Segoe UI", 9)).grid(row=row, column=0, padx=5, pady=2, sticky="e")
+        symbols_entry = ttk.Entry(form, width=60, font=("Segoe UI", 9))
+        symbols_entry.insert(0, ", ".join(symbols))
+        symbols_entry.grid(row=row, column=1, columnspan=4, padx=5, pady=2, sticky="w")
+        
+        tk.Label(form, text="Random sample (blank = full grid):", fg=self.colors["text"], bg=self.colors["panel"],
+               font=("Segoe UI", 9)).grid(row=row + 1, column=0, columnspan=2, padx=5, pady=2, sticky="e")
+        samples_entry = ttk.Entry(form, width=8, font=("Segoe UI", 9))
+        samples_entry.grid(row=row + 1, column=2, padx=5, pady=2, sticky="w")
+        
+        status = tk.StringVar(value="")
+        tk.Label(form, textvariable=status, fg=self.colors["light_text"], bg=self.colors["panel"],
+               font=("Segoe UI", 9)).grid(row=row + 2, column=1, columnspan=4, padx=5, pady=2, sticky="w")
+        
+        names = list(range_entries)
+        columns = ("Rank",) + tuple(names) + ("Net P&L", "Trades", "Hit Rate", "Max Drawdown")
+        results_tree = ttk.Treeview(window, columns=columns, show="headings")
+        for column in columns:
+            results_tree.heading(column, text=column)
+            results_tree.column(column, width=90, anchor=tk.E)
+        results_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        ranked = []
+        
+        def show_results(results):
+            ranked[:] = results
+            results_tree.delete(*results_tree.get_children())
+            for rank, result in enumerate(results, start=1):
+                results_tree.insert("", tk.END, iid=str(rank - 1), values=(
+                    (rank,) + tuple(result["params"][name] for name in names) + (
+                        f"{result['net_pnl']:.2f}", result["trades"], f"{result['hit_rate'] * 100:.1f}%",
+                        f"{result['max_drawdown']:.2f}")
+                ))
+            run_button.config(state=tk.NORMAL)
+            status.set(f"{len(results)} parameter sets ranked by net P&L")
+        
+        def start():
+            try:
+                ranges = {}
+                for name, (start_entry, stop_entry, step_entry) in range_entries.items():
+                    first, last, step = int(start_entry.get()), int(stop_entry.get()), int(step_entry.get())
+                    ranges[name] = range(first, last + 1, max(step, 1))
+                samples = int(samples_entry.get()) if samples_entry.get().strip() else None
+            except ValueError:
+                messagebox.showerror("Optimize", "Ranges and sample size must be whole numbers", parent=window)
+                return
+            chosen = [symbol.strip().upper() for symbol in symbols_entry.get().split(",") if symbol.strip()]
+            if not chosen:
+                messagebox.showwarning("Optimize", "Enter at least one symbol", parent=window)
+                return
+            
+            run_button.config(state=tk.DISABLED)
+            status.set("Loading history...")
+            sweep = ParameterSweep(strategy_type, ranges)
+            threading.Thread(target=self.run_optimizer, args=(sweep, chosen, samples, status, show_results),
+                             daemon=True).start()
+        
+        def save_selected():
+            selection = results_tree.selection()
+            if not selection:
+                messagebox.showwarning("Selection Error", "Please select a result to save", parent=window)
+                return
+            self.save_optimized_strategy(strategy_type, ranked[int(selection[0])]["params"])
+        
+        buttons = tk.Frame(form, bg=self.colors["panel"])
+        buttons.grid(row=row + 1, column=3, columnspan=2, padx=5, pady=2, sticky="w")
+        run_button = tk.Button(buttons, text="Run", command=start, bg=self.colors["secondary"], fg="white",
+                               font=("Segoe UI", 10, "bold"), relief=tk.FLAT, padx=10, cursor="hand2")
+        run_button.pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="Save as Strategy", command=save_selected, bg=self.colors["primary"], fg="white",
+                  font=("Segoe UI", 10, "bold"), relief=tk.FLAT, padx=10, cursor="hand2").pack(side=tk.LEFT, padx=5)
+
+    def open_audit_log(self):
+        """Paged, filterable view of the transaction log"""
+        window = tk.Toplevel(self.root)
+        window.title("Audit Log")
+        window.geometry("1000x600")
+        window.configure(bg=self.colors["background"])
+        
+        form = tk.Frame(window, bg=self.colors["panel"])
+        form.pack(fill=tk.X, padx=10, pady=10)
+        filters = {}
+        for column, (name, label, width) in enumerate((("start", "From (YYYY-MM-DD [HH:MM])", 16),
+                                                       ("end", "To", 16), ("symbol", "Symbol", 12),
+                                                       ("account", "Account", 12), ("event", "Event", 12))):
+            tk.Label(form, text=label, fg=self.colors["light_text"], bg=self.colors["panel"],
+                   font=("Segoe UI", 9)).grid(row=0, column=column, padx=5, pady=2, sticky="w")
+            if name == "event":
+                # The choices come with the first results, once the log has been indexed
+                entry = ttk.Combobox(form, values=[""], width=width, font=("Segoe UI", 9))
+            else:
+                entry = ttk.Entry(form, width=width, font=("Segoe UI", 9))
+            entry.grid(row=1, column=column, padx=5, pady=2, sticky="w")
+            filters[name] = entry
+        
+        columns = ("Time", "Event", "Account", "Symbol", "Message")
+        tree = ttk.Treeview(window, columns=columns, show="headings")
+        for column, width in zip(columns, (150, 90, 90, 90, 560)):
+            tree.heading(column, text=column)
+            tree.column(column, width=width, anchor=tk.W)
+        tree.pack(fill=tk.BOTH, expand=True, padx=10)
+        
+        pager = tk.Frame(window, bg=self.colors["background"])
+        pager.pack(fill=tk.X, padx=10, pady=10)
+        status = tk.StringVar(value="")
+        state = {"query": None, "offset": 0, "total": 0}
+        
+        def parse_time(text, end_of_day=False):
+            text = text.strip()
+            if not text:
+                return None
+            value = datetime.fromisoformat(text)
+            if end_of_day and len(text) <= 10:
+                value += timedelta(days=1, milliseconds=-1)
+            return value
+        
+        def show_page(offset, total, records, events):
+            filters["event"]["values"] = [""] + events
+            state["offset"], state["total"] = offset, total
+            tree.delete(*tree.get_children())
+            for record in records:
+                tree.insert("", tk.END, values=(record.get("time", "").replace("T", " "), record.get("event", ""),
+                                                record.get("account", ""), record.get("symbol", ""),
+                                                record.get("message", "")))
+            last = offset + len(records)
+            status.set(f"{offset + 1 if records else 0}-{last} of {total:,}")
+            prev_button.config(state=tk.NORMAL if offset > 0 else tk.DISABLED)
+            next_button.config(state=tk.NORMAL if last < total else tk.DISABLED)
+        
+        def load(offset):
+            status.set("Searching...")
+            
+            def work():
+                try:
+                    total, records = self.audit_log.query(offset=offset, **state["query"])
+                    events = self.audit_log.values("event")
+                except Exception as e:
+                    self.ui.post(status.set, f"Error reading audit log: {str(e)}")
+                    return
+                self.ui.post(show_page, offset, total, records, events)
+            
+            threading.Thread(target=work, daemon=True).start()
         
-        # Remove from active strategies
-        self.active_strategies = [s for s in self.active_strategies if s["id"] != strategy_id]
+        def search():
+            try:
+                start = parse_time(filters["start"].get())
+                end = parse_time(filters["end"].get(), end_of_day=True)
+            except ValueError:
+                messagebox.showwarning("Audit Log", "Dates must look like 2024-05-31 or 2024-05-31 14:30",
+                                       parent=window)
+                return
+            state["query"] = {"start": start, "end": end, "symbol": filters["symbol"].get().strip().upper(),
+                              "account": filters["account"].get().strip(), "event": filters["event"].get().strip()}
+            load(0)
+        
+        tk.Button(form, text="Search", command=search, bg=self.colors["secondary"], fg="white",
+                  font=("Segoe UI", 10, "bold"), relief=tk.FLAT, padx=10,
+                  cursor="hand2").grid(row=1, column=5, padx=5, pady=2)
+        prev_button = tk.Button(pager, text="Previous", state=tk.DISABLED,
+                                command=lambda: load(max(state["offset"] - AUDIT_PAGE_SIZE, 0)),
+                                bg=self.colors["primary"], fg="white", font=("Segoe UI", 10, "bold"),
+                                relief=tk.FLAT, padx=10, cursor="hand2")
+        prev_button.pack(side=tk.LEFT, padx=5)
+        next_button = tk.Button(pager, text="Next", state=tk.DISABLED,
+                                command=lambda: load(state["offset"] + AUDIT_PAGE_SIZE),
+                                bg=self.colors["primary"], fg="white", font=("Segoe UI", 10, "bold"),
+                                relief=tk.FLAT, padx=10, cursor="hand2")
+        next_button.pack(side=tk.LEFT, padx=5)
+        tk.Label(pager, textvariable=status, fg=self.colors["light_text"], bg=self.colors["background"],
+               font=("Segoe UI", 9)).pack(side=tk.LEFT, padx=10)
+        search()
+
+    def run_optimizer(self, sweep, symbols, samples, status, on_done):
+        """Worker thread: load history and run the sweep across the process pool"""
+        candles = {}
+        for symbol in symbols:
+            try:
+                df = self.get_historical_data(symbol, days=BACKTEST_DAYS)
+                if not df.empty:
+                    candles[symbol] = df
+            except Exception as e:
+                self.log_transaction(f"Error loading history for {symbol}: {str(e)}", event="error", symbol=symbol)
         
-        # Remove from wishlist treeviews
-        for tree in self.stock_trees:
-            for item in tree.get_children():
-                values = tree.item(item)["values"]
-                if len(values) > 4 and values[4] == strategy_id:
-                    values[4] = ""
-                    tree.item(item, values=values)
+        def progress(done, total):
+            self.ui.post(status.set, f"Evaluated {done}/{total} parameter sets", key="optimizer_progress")
         
-        self.save_strategies()
-        self.update_strategy_tree()
-        self.log_transaction(f"Deleted strategy: {strategy_id}")
+        try:
+            results = sweep.run(candles, samples=samples, progress=progress)
+        except Exception as e:
+            self.log_transaction(f"Error in parameter sweep: {str(e)}")
+            results = []
+        self.ui.post(on_done, results)
+        self.log_transaction(f"Optimized {sweep.strategy_type} over {len(candles)} symbols: "
+                             f"{len(results)} parameter sets evaluated")
 
-    def toggle_strategy(self):
-        """Enable/disable selected strategy"""
-        selected = self.strategy_tree.selection()
-        if not selected:
-            messagebox.showwarning("Selection Error", "Please select a strategy to toggle")
+    def save_optimized_strategy(self, strategy_type, params):
+        """Save an optimizer result as a new, disabled strategy"""
+        default_name = f"{strategy_type} " + "/".join(str(value) for value in params.values())
+        strategy_name = simpledialog.askstring("Save Strategy", "Strategy name:", parent=self.root,
+                                               initialvalue=default_name)
+        if not strategy_name:
             return
             
-        strategy_id = self.strategy_tree.item(selected[0])["values"][0]
-        strategy = next((s for s in self.strategies if s["id"] == strategy_id), None)
-        
-        if strategy:
-            # Toggle status
-            if strategy in self.active_strategies:
-                self.active_strategies.remove(strategy)
-                strategy["status"] = "Disabled"
-            else:
-                self.active_strategies.append(strategy)
-                strategy["status"] = "Enabled"
-                
-            self.save_strategies()
-            self.update_strategy_tree()
-            self.log_transaction(f"{'Enabled' if strategy['status'] == 'Enabled' else 'Disabled'} strategy: {strategy['name']}")
+        compiled = compile_strategy(strategy_type, params)
+        strategy = {
+            "id": max((s["id"] for s in self.strategies), default=0) + 1,
+            "name": strategy_name.strip(),
+            "type": strategy_type,
+            "params": compiled.params,
+            "timeframe": "day",
+            "trigger": "bar",
+            "status": "Disabled",
+            "instruments": []
+        }
+        self.strategies.append(strategy)
+        self.compiled_strategies[strategy["id"]] = compiled
+        self.save_strategies()
+        self.update_strategy_tree()
+        self.log_transaction(f"Saved optimized strategy: {strategy['name']}")
 
     def save_strategy(self):
         """Save the current strategy configuration"""
         strategy_name = self.strategy_name.get().strip()
         strategy_type = self.strategy_type.get()
+        timeframe = self.strategy_timeframe.get()
+        trigger = self.strategy_trigger.get()
         
         if not strategy_name:
             messagebox.showwarning("Input Error", "Please enter a strategy name")
             return
             
-        # Get parameters
-        params = {}
-        if strategy_type == "Moving Average Crossover":
-            params = {
-                "short_ma": self.short_ma.get().strip(),
-                "long_ma": self.long_ma.get().strip()
-            }
-        elif strategy_type == "RSI":
-            params = {
-                "period": self.rsi_period.get().strip(),
-                "overbought": self.overbought.get().strip(),
-                "oversold": self.oversold.get().strip()
-            }
-        elif strategy_type == "MACD":
-            params = {
-                "fast_ema": self.fast_ema.get().strip(),
-                "slow_ema": self.slow_ema.get().strip(),
-                "signal_period": self.signal_period.get().strip()
-            }
+        # Parse and validate the parameters once, here, rather than on every evaluation
+        try:
+            compiled = compile_strategy(strategy_type, {name: entry.get().strip()
+                                                        for name, entry in self.param_entries.items()})
+        except ValueError as e:
+            messagebox.showwarning("Input Error", str(e))
+            return
+        params = compiled.params
         
         # Check if we're editing an existing strategy
         selected = self.strategy_tree.selection()
@@ -895,19 +4505,25 @@ class StratagemIQ:
                 strategy["name"] = strategy_name
                 strategy["type"] = strategy_type
                 strategy["params"] = params
+                strategy["timeframe"] = timeframe
+                strategy["trigger"] = trigger
+                self.compiled_strategies[strategy_id] = compiled
         else:
             # Create new strategy
-            strategy_id = len(self.strategies) + 1
+            strategy_id = max((s["id"] for s in self.strategies), default=0) + 1
             strategy = {
                 "id": strategy_id,
                 "name": strategy_name,
                 "type": strategy_type,
                 "params": params,
+                "timeframe": timeframe,
+                "trigger": trigger,
                 "status": "Enabled",
                 "instruments": []
             }
             self.strategies.append(strategy)
             self.active_strategies.append(strategy)
+            self.compiled_strategies[strategy_id] = compiled
         
         self.save_strategies()
         self.update_strategy_tree()
@@ -924,107 +4540,102 @@ class StratagemIQ:
             self.strategy_tree.insert("", tk.END, values=(
                 strategy["id"],
                 strategy["name"],
-                strategy["type"],
+                f"{strategy['type']} ({strategy.get('timeframe', 'day')})",
                 strategy["status"],
                 ", ".join(strategy["instruments"])
             ))
 
-    def get_historical_data(self, symbol, days=100):
-        """Get historical data for a symbol (simulated)"""
-        # In a real implementation, you would fetch this from the broker API
-        if symbol not in self.historical_data:
-            # Generate random data for simulation
-            np.random.seed(42)
-            prices = np.cumprod(1 + np.random.normal(0, 0.01, days)) * 100
-            dates = pd.date_range(end=datetime.today(), periods=days)
-            self.historical_data[symbol] = pd.DataFrame({
-                "date": dates,
-                "close": prices
-            }).set_index("date")
-        return self.historical_data[symbol]
-
-    def moving_average_strategy(self, symbol, strategy):
-        """Moving Average Crossover strategy"""
-        try:
-            # Get historical data
-            df = self.get_historical_data(symbol)
-            
-            # Calculate moving averages
-            short_ma = int(strategy["params"]["short_ma"])
-            long_ma = int(strategy["params"]["long_ma"])
-            
-            df["SMA_Short"] = talib.SMA(df["close"], timeperiod=short_ma)
-            df["SMA_Long"] = talib.SMA(df["close"], timeperiod=long_ma)
-            
-            # Generate signals
-            df["Signal"] = 0
-            df["Signal"][short_ma:] = np.where(
-                df["SMA_Short"][short_ma:] > df["SMA_Long"][short_ma:], 1, 0)
-            df["Position"] = df["Signal"].diff()
-            
-            # Get last signal
-            last_signal = df["Position"].iloc[-1]
-            
-            if last_signal > 0:
-                return "BUY"
-            elif last_signal < 0:
-                return "SELL"
-            else:
-                return None
-        except Exception as e:
-            self.log_transaction(f"Error in MA strategy for {symbol}: {str(e)}")
-            return None
+    def get_historical_data(self, symbol, days=100, interval="day"):
+        """OHLCV candles for a symbol from the local candle store, extended by candles built from ticks.
 
-    def rsi_strategy(self, symbol, strategy):
-        """RSI strategy"""
-        try:
-            # Get historical data
-            df = self.get_historical_data(symbol)
-            
-            # Calculate RSI
-            period = int(strategy["params"]["period"])
-            overbought = int(strategy["params"]["overbought"])
-            oversold = int(strategy["params"]["oversold"])
-            
-            df["RSI"] = talib.RSI(df["close"], timeperiod=period)
-            
-            # Generate signals
-            if df["RSI"].iloc[-1] < oversold:
-                return "BUY"
-            elif df["RSI"].iloc[-1] > overbought:
-                return "SELL"
-            else:
-                return None
-        except Exception as e:
-            self.log_transaction(f"Error in RSI strategy for {symbol}: {str(e)}")
-            return None
+        Kite is only asked for newer candles when the live candles do not
+        already carry on from the end of the stored ones.
+        """
+        key = (symbol, interval, days)
+        df = self.historical_data.get(key)
+        if df is None or (self.history.is_due(symbol, interval)
+                          and not self.live_candles.continues(symbol, interval, df.index[-1] if len(df) else None)):
+            row = self.all_instruments.find(symbol)
+            token = int(self.all_instruments.columns["instrument_token"][row]) if row is not None else None
+            kite = self.market_data_client()
+            df = self.historical_data.put(key, self.history.candles(kite, token, symbol, interval, days))
 
-    def macd_strategy(self, symbol, strategy):
-        """MACD strategy"""
-        try:
-            # Get historical data
-            df = self.get_historical_data(symbol)
-            
-            # Calculate MACD
-            fast_ema = int(strategy["params"]["fast_ema"])
-            slow_ema = int(strategy["params"]["slow_ema"])
-            signal_period = int(strategy["params"]["signal_period"])
-            
-            macd, signal, _ = talib.MACD(df["close"], 
-                                        fastperiod=fast_ema, 
-                                        slowperiod=slow_ema, 
-                                        signalperiod=signal_period)
-            
-            # Generate signals
-            if macd.iloc[-1] > signal.iloc[-1] and macd.iloc[-2] <= signal.iloc[-2]:
-                return "BUY"
-            elif macd.iloc[-1] < signal.iloc[-1] and macd.iloc[-2] >= signal.iloc[-2]:
-                return "SELL"
-            else:
-                return None
-        except Exception as e:
-            self.log_transaction(f"Error in MACD strategy for {symbol}: {str(e)}")
-            return None
+        return self.live_candles.extend(symbol, interval, df)
+
+    def get_indicator_state(self, symbol, strategy_id, compiled, timeframe="day", poll_history=True):
+        """Streaming indicator state of a compiled strategy for a symbol, advanced to the latest bar.
+
+        Seeded once from history; afterwards only bars newer than the last
+        one consumed are fed in, one O(1) update each. Those come straight
+        from the live candles; the history cache is read again only when the
+        live candles leave a gap after the last bar, or, with `poll_history`,
+        when there are none to take. Editing a strategy compiles a new
+        object, which starts a fresh state.
+        """
+        key = (strategy_id, symbol)
+        state = self.indicator_states.get(key)
+        if state is None or state["strategy"] is not compiled or state["timeframe"] != timeframe:
+            state = {"strategy": compiled, "timeframe": timeframe, "indicators": compiled.create_indicators(),
+                     "last_bar": None, "fired": None}
+            self.indicator_states[key] = state
+        elif state["last_bar"] is not None:
+            cursor = HistoricalData._epoch(state["last_bar"])
+            bars = self.live_candles.since(symbol, timeframe, cursor)
+            if len(bars) and bars["date"][0] <= cursor + HistoricalData.INTERVAL_SECONDS[timeframe]:
+                self.feed_indicator_state(state, bars["close"], pd.Timestamp(int(bars["date"][-1]), unit="s"))
+                return state
+            if not len(bars) and not poll_history:
+                return state
+
+        df = self.get_historical_data(symbol, days=STRATEGY_TIMEFRAMES[timeframe], interval=timeframe)
+        closes = df["close"]
+        if state["last_bar"] is not None:
+            closes = closes[closes.index > state["last_bar"]]
+        if len(closes):
+            self.feed_indicator_state(state, closes.to_numpy(), closes.index[-1])
+
+        return state
+
+    def feed_indicator_state(self, state, closes, last_bar):
+        for close in closes:
+            for indicator in state["indicators"]:
+                indicator.update(float(close))
+        state["last_bar"] = last_bar
+
+    def evaluate_strategy_batch(self, strategy, compiled, symbols):
+        """Evaluate a strategy for many symbols at once; returns {symbol: "BUY"/"SELL"}.
+
+        Symbols whose histories cover the same bars are stacked column-wise
+        and evaluated in one vectorized pass, giving the same signals as the
+        per-symbol path. Symbols without a new bar since the last run are
+        skipped.
+        """
+        timeframe = strategy.get("timeframe", "day")
+        groups = {}
+        for symbol in symbols:
+            try:
+                df = self.get_historical_data(symbol, days=STRATEGY_TIMEFRAMES[timeframe], interval=timeframe)
+            except Exception as e:
+                self.log_transaction(f"Error loading history for {symbol}: {str(e)}", event="error", symbol=symbol)
+                continue
+            if df.empty or self.evaluated_bars.get((strategy["id"], symbol)) == df.index[-1]:
+                continue
+            self.evaluated_bars[(strategy["id"], symbol)] = df.index[-1]
+            key = (len(df), df.index[0], df.index[-1])
+            groups.setdefault(key, []).append((symbol, df["close"].to_numpy(dtype=np.float64)))
+
+        signals = {}
+        for members in groups.values():
+            closes = np.column_stack([close for _, close in members])
+            try:
+                vector = compiled.latest_signals(closes)
+            except Exception as e:
+                self.log_transaction(f"Error in batch evaluation of '{strategy['name']}': {str(e)}")
+                continue
+            for (symbol, _), signal in zip(members, vector):
+                if signal:
+                    signals[symbol] = "BUY" if signal > 0 else "SELL"
+        return signals
 
     def execute_strategy_signal(self, symbol, action, strategy_name):
         """Execute a trade based on strategy signal"""
@@ -1032,72 +4643,123 @@ class StratagemIQ:
             # Get quantity (for simplicity, using fixed quantity)
             quantity = 1
             
-            # Get selected account
-            selected_account = self.account_dropdown.get()
-            if not selected_account:
+            # Get selected accounts
+            accounts = self.order_accounts()
+            if not accounts:
                 self.log_transaction("No account selected for strategy execution")
                 return
                 
-            # Find the kite instance for the selected account
-            kite = None
-            for i, creds in enumerate(self.credentials_list):
-                if creds["username"] == selected_account:
-                    kite = self.buy_kite_instances[i] if action == "BUY" else self.sell_kite_instances[i]
-                    break
+            # Queue the trade in every account; the gateway paces each within its order rate
+            order_params = {
+                "exchange": "NSE",
+                "tradingsymbol": symbol,
+                "transaction_type": action,
+                "quantity": quantity,
+                "order_type": "MARKET",
+                "product": "MIS",
+                "variety": "regular"
+            }
             
-            if not kite:
-                self.log_transaction("Failed to find account instance for strategy execution")
-                return
-                
-            # Execute trade
-            order_id = kite.place_order(
-                exchange="NSE",
-                tradingsymbol=symbol,
-                transaction_type=action,
-                quantity=quantity,
-                order_type="MARKET",
-                product="MIS",
-                variety="regular"
-            )
+            orders, missing = self.fan_out_order(accounts, order_params)
+            for username in missing:
+                self.log_transaction(f"Failed to find account instance {username} for strategy execution",
+                                     event="order_error", symbol=symbol, account=username, side=action,
+                                     strategy=strategy_name)
+            
+            def report(futures):
+                self.portfolio.expect_fill()
+                for username, kite, params in orders:
+                    fields = {"symbol": symbol, "account": username, "side": action,
+                              "quantity": params["quantity"], "strategy": strategy_name}
+                    try:
+                        order_id = futures[username].result()
+                    except Exception as e:
+                        self.log_transaction(f"Error placing strategy order for {username}: {str(e)}",
+                                             event="order_error", **fields)
+                        continue
+                    self.log_transaction(f"Strategy '{strategy_name}' [{username}]: {action} order for "
+                                         f"{params['quantity']} shares of {symbol} placed! Order ID: {order_id}",
+                                         event="order", order_id=order_id, **fields)
             
-            message = f"Strategy '{strategy_name}': {action} order for {quantity} shares of {symbol} placed! Order ID: {order_id}"
-            self.log_transaction(message)
+            if orders:
+                self.order_gateway.submit_basket(orders, report)
         except Exception as e:
             message = f"Error placing strategy order: {str(e)}"
-            self.log_transaction(message)
+            self.log_transaction(message, event="order_error", symbol=symbol, side=action, strategy=strategy_name)
 
-    def strategy_execution_thread(self):
-        """Thread for executing trading strategies"""
-        while True:
+    def sync_scheduler(self):
+        """Hand the active strategies' timeframes, triggers and instruments to the scheduler"""
+        self.scheduler.set_jobs({
+            strategy["id"]: (strategy.get("timeframe", "day"), strategy.get("trigger", "bar"),
+                             list(strategy["instruments"]))
+            for strategy in self.active_strategies if strategy["id"] in self.compiled_strategies
+        })
+
+    def find_active_strategy(self, strategy_id):
+        strategy = next((s for s in self.active_strategies if s["id"] == strategy_id), None)
+        return strategy, self.compiled_strategies.get(strategy_id)
+
+    def run_strategy_bar(self, strategy_id):
+        """Scheduler callback: a bar closed on the strategy's timeframe"""
+        # A bar closing at the session close, or a run delayed past it, cannot trade
+        if not market_is_open():
+            return
+        strategy, compiled = self.find_active_strategy(strategy_id)
+        if strategy is None or compiled is None:
+            return
+        
+        # Close the bar for symbols that have not ticked since it ended
+        self.live_candles.close_bars()
+        
+        if len(strategy["instruments"]) >= BATCH_EVALUATION_MIN_SYMBOLS:
+            signals = self.evaluate_strategy_batch(strategy, compiled, strategy["instruments"])
+            for symbol, signal in signals.items():
+                self.execute_strategy_signal(symbol, signal, strategy["name"])
+            return
+
+        timeframe = strategy.get("timeframe", "day")
+        for symbol in strategy["instruments"]:
             try:
-                # Only run during market hours
-                now = datetime.now()
-                hour = now.hour
-                if not ((9 <= hour < 15) or (hour == 15 and now.minute < 30)):
-                    time.sleep(60)
+                state = self.get_indicator_state(symbol, strategy_id, compiled, timeframe)
+                # Act once per bar, even if the new bar is late and the next run sees the same one
+                if state["last_bar"] is None or self.evaluated_bars.get((strategy_id, symbol)) == state["last_bar"]:
                     continue
-                
-                # Process active strategies
-                for strategy in self.active_strategies:
-                    for symbol in strategy["instruments"]:
-                        # Get signal based on strategy type
-                        signal = None
-                        if strategy["type"] == "Moving Average Crossover":
-                            signal = self.moving_average_strategy(symbol, strategy)
-                        elif strategy["type"] == "RSI":
-                            signal = self.rsi_strategy(symbol, strategy)
-                        elif strategy["type"] == "MACD":
-                            signal = self.macd_strategy(symbol, strategy)
-                        
-                        # Execute trade if signal generated
-                        if signal:
-                            self.execute_strategy_signal(symbol, signal, strategy["name"])
-                
-                # Check every minute
-                time.sleep(60)
+                self.evaluated_bars[(strategy_id, symbol)] = state["last_bar"]
+                signal = compiled.evaluate(state["indicators"])
             except Exception as e:
-                self.log_transaction(f"Error in strategy thread: {str(e)}")
-                time.sleep(10)
+                self.log_transaction(f"Error in {compiled.TYPE} strategy for {symbol}: {str(e)}", event="error",
+                                     symbol=symbol, strategy=strategy["name"])
+                continue
+            
+            # Execute trade if signal generated
+            if signal:
+                self.execute_strategy_signal(symbol, "BUY" if signal > 0 else "SELL", strategy["name"])
+
+    def run_strategy_ticks(self, strategy_id, symbols):
+        """Scheduler callback: new prices for some of a tick-triggered strategy's symbols"""
+        if not market_is_open():
+            return
+        strategy, compiled = self.find_active_strategy(strategy_id)
+        if strategy is None or compiled is None:
+            return
+        
+        timeframe = strategy.get("timeframe", "day")
+        for symbol in symbols:
+            price = self.stock_prices.get(symbol)
+            if price is None:
+                continue
+            try:
+                state = self.get_indicator_state(symbol, strategy_id, compiled, timeframe, poll_history=False)
+                signal = compiled.evaluate_tick(state["indicators"], float(price))
+            except Exception as e:
+                self.log_transaction(f"Error in {compiled.TYPE} strategy for {symbol}: {str(e)}", event="error",
+                                     symbol=symbol, strategy=strategy["name"])
+                continue
+            
+            # One order per signal per forming bar, however many ticks repeat it
+            if signal and state["fired"] != (state["last_bar"], signal):
+                state["fired"] = (state["last_bar"], signal)
+                self.execute_strategy_signal(symbol, "BUY" if signal > 0 else "SELL", strategy["name"])
 
     def configure_styles(self):
         """Configure ttk styles based on current theme"""
@@ -1190,6 +4852,9 @@ class StratagemIQ:
         # Update buttons
         self.add_account_button.config(bg=self.colors["secondary"])
         self.change_access_token_button.config(bg=self.colors["accent"])
+        self.quantity_scale_button.config(bg=self.colors["primary"])
+        self.mirror_listbox.config(bg=self.colors["background"], fg=self.colors["text"],
+                                   selectbackground=self.colors["secondary"])
         self.search_button.config(bg=self.colors["secondary"])
         self.add_button.config(bg=self.colors["secondary"])
         self.remove_button.config(bg=self.colors["accent"])
@@ -1203,14 +4868,16 @@ class StratagemIQ:
         
         # Update labels
         self.portfolio_value.config(bg=self.colors["panel"])
+        self.portfolio_pnl.config(bg=self.colors["panel"])
         self.market_status.config(bg=self.colors["panel"])
         self.market_timings_label.config(bg=self.colors["panel"], fg=self.colors["light_text"])
         self.quantity_label.config(bg=self.colors["panel"], fg=self.colors["text"])
         self.order_type_label.config(bg=self.colors["panel"], fg=self.colors["text"])
         self.limit_price_label.config(bg=self.colors["panel"], fg=self.colors["text"])
         
-        # Update market status colors
+        # Update market status and price colors
         self.update_market_status()
+        self.configure_row_tags()
 
     def toggle_limit_price(self, event=None):
         """Show/hide limit price entry based on order type"""
@@ -1223,17 +4890,11 @@ class StratagemIQ:
 
     def update_market_status(self):
         """Update market status based on current time"""
-        now = datetime.now()
-        hour = now.hour
-        
-        # Market hours: 9:15 AM to 3:30 PM
-        if (9 <= hour < 15) or (hour == 15 and now.minute < 30):
+        # Market hours: 9:15 AM to 3:30 PM on weekdays
+        if market_is_open():
             self.market_status.config(text="OPEN", fg=self.colors["positive"])
         else:
             self.market_status.config(text="CLOSED", fg=self.colors["negative"])
-        
-        # Update every minute
-        self.root.after(60000, self.update_market_status)
 
     def add_new_account(self):
         username = self.username_entry.get().strip()
@@ -1250,26 +4911,19 @@ class StratagemIQ:
             }
             
             try:
-                # Test the credentials
-                kite = KiteConnect(api_key=api_key)
-                kite.set_access_token(access_token)
+                # Test the credentials with the client the account will keep
+                kite = self.client_pool.client(api_key, access_token)
                 profile = kite.profile()
                 
                 # Add account if credentials are valid
                 self.credentials_list.append(new_credentials)
                 self.save_credentials_list(self.credentials_list)
-                
-                # Initialize KiteConnect instances
-                buy_kite = KiteConnect(api_key=api_key)
-                sell_kite = KiteConnect(api_key=api_key)
-                buy_kite.set_access_token(access_token)
-                sell_kite.set_access_token(access_token)
-                self.buy_kite_instances.append(buy_kite)
-                self.sell_kite_instances.append(sell_kite)
+                self.accounts[username] = {"creds": new_credentials, "kite": kite}
                 
                 # Update UI
-                self.account_dropdown['values'] = self.get_account_usernames()
+                self.refresh_account_widgets()
                 self.account_dropdown.current(len(self.account_dropdown['values']) - 1)
+                self.update_selected_account()
                 
                 # Clear fields
                 self.username_entry.delete(0, tk.END)
@@ -1278,7 +4932,7 @@ class StratagemIQ:
                 self.access_token_entry.delete(0, tk.END)
                 
                 messagebox.showinfo("Success", f"Account '{username}' added successfully!")
-                self.log_transaction(f"Added account: {username}")
+                self.log_transaction(f"Added account: {username}", event="account", account=username)
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to add account: {str(e)}")
         else:
@@ -1287,6 +4941,66 @@ class StratagemIQ:
     def get_account_usernames(self):
         return [creds["username"] for creds in self.credentials_list]
 
+    def refresh_account_widgets(self):
+        """Refill the account dropdown and mirror list, keeping the mirror selection"""
+        usernames = self.get_account_usernames()
+        self.account_dropdown['values'] = usernames
+        self.mirror_listbox.delete(0, tk.END)
+        for index, username in enumerate(usernames):
+            self.mirror_listbox.insert(tk.END, username)
+            if username in self.selected_accounts:
+                self.mirror_listbox.selection_set(index)
+        self.selected_accounts = [u for u in usernames if u in self.selected_accounts]
+
+    def update_selected_account(self, event=None):
+        self.selected_account = self.account_dropdown.get()
+
+    def update_selected_accounts(self, event=None):
+        self.selected_accounts = [self.mirror_listbox.get(index) for index in self.mirror_listbox.curselection()]
+
+    def change_quantity_scale(self):
+        """Set the multiplier applied to order quantities for the selected account"""
+        selected_username = self.account_dropdown.get()
+        account = self.accounts.get(selected_username)
+        if account is None:
+            messagebox.showwarning("Selection Error", "Please select an account first")
+            return
+            
+        scale = simpledialog.askfloat("Quantity Scale", 
+                                      f"Quantity multiplier for {selected_username}:",
+                                      parent=self.root, minvalue=0.01,
+                                      initialvalue=account["creds"].get("quantity_scale", 1.0))
+        if scale is None:
+            return
+        account["creds"]["quantity_scale"] = scale
+        self.save_credentials_list(self.credentials_list)
+        self.log_transaction(f"Set quantity scale for {selected_username} to {scale:g}", event="account",
+                             account=selected_username)
+
+    def order_accounts(self):
+        """Accounts an order goes to: every mirrored account, else the selected one.
+
+        Strategy orders are placed from the scheduler thread, so this reads
+        the selection the Tk thread last recorded, never the widgets.
+        """
+        if self.selected_accounts:
+            return list(self.selected_accounts)
+        return [self.selected_account] if self.selected_account else []
+
+    def fan_out_order(self, accounts, order_params):
+        """One order per account, quantity scaled per account; returns ([(account, kite, params)], missing)"""
+        orders, missing = [], []
+        for username in accounts:
+            account = self.accounts.get(username)
+            if account is None:
+                missing.append(username)
+                continue
+            kite = account["kite"]
+            scale = float(account["creds"].get("quantity_scale", 1.0))
+            quantity = max(1, int(round(order_params["quantity"] * scale)))
+            orders.append((username, kite, dict(order_params, quantity=quantity)))
+        return orders, missing
+
     def change_access_token(self):
         selected_username = self.account_dropdown.get()
         if not selected_username:
@@ -1304,13 +5018,13 @@ class StratagemIQ:
                     self.save_credentials_list(self.credentials_list)
                     
                     # Update Kite instance
-                    index = self.credentials_list.index(creds)
-                    if index < len(self.buy_kite_instances):
-                        self.buy_kite_instances[index].set_access_token(new_access_token)
-                        self.sell_kite_instances[index].set_access_token(new_access_token)
+                    account = self.accounts.get(selected_username)
+                    if account is not None:
+                        account["kite"].set_access_token(new_access_token)
                     
                     messagebox.showinfo("Success", f"Access token updated for {selected_username}")
-                    self.log_transaction(f"Updated token for: {selected_username}")
+                    self.log_transaction(f"Updated token for: {selected_username}", event="account",
+                                         account=selected_username)
                     break
 
     def search_instruments(self):
@@ -1321,30 +5035,45 @@ class StratagemIQ:
             
         self.update_suggestions()
 
+    def schedule_suggestions(self, event=None):
+        """Debounce keystrokes so only the last query in a burst is searched"""
+        if self.suggestion_after is not None:
+            self.root.after_cancel(self.suggestion_after)
+        self.suggestion_after = self.root.after(SEARCH_DEBOUNCE_MS, self.update_suggestions)
+
     def update_suggestions(self, event=None):
+        self.suggestion_after = None
         query = self.search_entry.get().strip().upper()
-        
-        # Clear existing suggestions
-        for item in self.suggestion_tree.get_children():
-            self.suggestion_tree.delete(item)
 
+        # Nothing to do for keys that did not change the query (arrows, shift, ...)
+        index = self.search_index
+        if (query, index) == self.last_suggestion_query:
+            return
+        self.last_suggestion_query = (query, index)
+
+        # Get matching instruments, best first (limit to 20 results)
+        matches = []
         if query:
-            # Get matching instruments
-            matches = []
-            for instrument in self.all_instruments:
-                if query in instrument["tradingsymbol"] or query in instrument["name"]:
-                    matches.append(instrument)
-                    if len(matches) >= 20:  # Limit to 20 results
-                        break
-            
-            # Add to treeview
-            for instrument in matches:
-                self.suggestion_tree.insert("", tk.END, values=(
-                    instrument["tradingsymbol"],
-                    instrument["name"],
-                    instrument["exchange"],
-                    instrument["instrument_type"]
-                ))
+            matches = [index.registry.record(i) for i in index.search(query, limit=20)]
+
+        # Reuse existing rows rather than clearing and rebuilding the tree
+        items = self.suggestion_tree.get_children()
+        for item, instrument in zip(items, matches):
+            self.suggestion_tree.item(item, values=(
+                instrument["tradingsymbol"],
+                instrument["name"],
+                instrument["exchange"],
+                instrument["instrument_type"]
+            ))
+        if len(items) > len(matches):
+            self.suggestion_tree.delete(*items[len(matches):])
+        for instrument in matches[len(items):]:
+            self.suggestion_tree.insert("", tk.END, values=(
+                instrument["tradingsymbol"],
+                instrument["name"],
+                instrument["exchange"],
+                instrument["instrument_type"]
+            ))
 
     def add_selected_to_wishlist(self):
         selected = self.suggestion_tree.selection()
@@ -1375,17 +5104,17 @@ class StratagemIQ:
         current_tab = self.notebook.index(self.notebook.select())
         
         # Check if already in wishlist
-        tree = self.stock_trees[current_tab]
-        for item in tree.get_children():
-            if tree.item(item)["values"][0] == selected_stock:
-                messagebox.showinfo("Info", f"{selected_stock} is already in this wishlist")
-                return
+        if selected_stock in self.wishlist_rows[current_tab]:
+            messagebox.showinfo("Info", f"{selected_stock} is already in this wishlist")
+            return
                 
         # Add to wishlist
-        tree.insert("", tk.END, values=(selected_stock, "0.00", "0.00%", "0", ""))
+        self.insert_wishlist_row(current_tab, selected_stock)
         self.subscribed_instruments[current_tab].append(selected_stock)
         self.save_subscribed_instruments()
-        self.log_transaction(f"Added to wishlist {current_tab+1}: {selected_stock}")
+        self.sync_tick_subscriptions()
+        self.log_transaction(f"Added to wishlist {current_tab+1}: {selected_stock}", event="wishlist",
+                             symbol=selected_stock)
 
     def remove_from_wishlist(self):
         current_tab = self.notebook.index(self.notebook.select())
@@ -1397,67 +5126,66 @@ class StratagemIQ:
             return
             
         for item in selected_items:
-            stock = tree.item(item)["values"][0]
+            stock = self.row_symbols[(current_tab, item)]
             if stock in self.subscribed_instruments[current_tab]:
                 self.subscribed_instruments[current_tab].remove(stock)
-            tree.delete(item)
+            self.delete_wishlist_row(current_tab, item)
+            self.log_transaction(f"Removed from wishlist {current_tab+1}: {stock}", event="wishlist", symbol=stock)
         
         self.save_subscribed_instruments()
-        self.log_transaction(f"Removed from wishlist {current_tab+1}: {stock}")
+        self.sync_tick_subscriptions()
 
     def get_all_instruments(self):
+        """Instrument master from the local cache (empty until the first download)"""
+        return self.instrument_cache.load() or InstrumentRegistry.empty()
+
+    def get_all_instruments_with_index(self):
+        """Cached instrument master plus its search index, built off the Tk thread"""
+        instruments = self.get_all_instruments()
+        return instruments, InstrumentSearchIndex(instruments)
+
+    def refresh_instruments_thread(self):
+        """Fetch the instrument master if it changed and swap it in"""
         try:
-            url = "https://api.kite.trade/instruments"
-            response = requests.get(url)
-            data = response.text.splitlines()
-            
-            if not data:
-                return []
-                
-            headers = data[0].split(",")
-            instruments = []
-            
-            for row in data[1:]:
-                values = row.split(",")
-                if len(values) == len(headers):
-                    instrument = {headers[i]: values[i] for i in range(len(headers))}
-                    instruments.append(instrument)
-            
-            return instruments
+            instruments = self.instrument_cache.refresh()
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to fetch instruments: {str(e)}")
-            return []
+            self.log_transaction(f"Failed to refresh instruments: {str(e)}")
+            if not self.all_instruments:
+                self.ui.post(messagebox.showerror, "Error", f"Failed to fetch instruments: {str(e)}")
+            return
+
+        if instruments is None:
+            return  # Unchanged since the cached copy
+
+        # Build the index here; the swap happens on the Tk thread
+        self.ui.post(self.apply_instruments, instruments, InstrumentSearchIndex(instruments))
+        self.log_transaction(f"Instrument master refreshed: {len(instruments):,} instruments")
+
+    def apply_instruments(self, instruments, search_index):
+        """Swap in a refreshed instrument master and re-run the current search against it (Tk thread)"""
+        # Readers always see either the old or the new registry, never a partial one
+        self.all_instruments = instruments
+        self.search_index = search_index
+        if self.tick_stream:
+            self.tick_stream.set_instruments(self.all_instruments)
+            self.sync_tick_subscriptions()
+        # On a first run the list was searched against an empty registry
+        self.schedule_suggestions()
 
     def update_stock_prices_thread(self):
         while True:
             try:
-                for i in range(len(self.stock_trees)):
-                    tree = self.stock_trees[i]
-                    subscribed_instruments = self.subscribed_instruments[i]
-                    
-                    for stock in subscribed_instruments:
-                        ltp, change, volume = self.get_stock_data(stock)
-                        
-                        # Update treeview
-                        for item in tree.get_children():
-                            if tree.item(item)["values"][0] == stock:
-                                # Set color based on change
-                                change_value = float(change.strip('%'))
-                                change_color = self.colors["positive"] if change_value >= 0 else self.colors["negative"]
-                                tree.tag_configure(change_color, foreground=change_color)
-                                
-                                # Update values, preserving strategy column
-                                values = list(tree.item(item)["values"])
-                                if len(values) < 5:
-                                    values.extend([""] * (5 - len(values)))
-                                values[1] = ltp
-                                values[2] = change
-                                values[3] = volume
-                                tree.item(item, values=values, tags=(change_color,))
-                                break
-                
-                # Update portfolio value every 5 seconds
-                if self.credentials_list:
+                # REST quotes only while the tick stream is down
+                if not (self.tick_stream and self.tick_stream.is_connected()):
+                    # Fetch every subscribed symbol once, in as few calls as possible
+                    quotes = self.get_batch_stock_data(self.get_all_subscribed_symbols())
+                    self.apply_quotes(quotes)
+                    self.scheduler.mark_dirty(list(quotes))
+                    if self.portfolio.reprice({stock: self.stock_prices[stock] for stock in quotes}):
+                        self.refresh_portfolio_label()
+
+                # Re-read holdings and positions only after a fill or once they go stale
+                if self.accounts and self.portfolio.is_due():
                     self.update_portfolio_value()
                 
                 time.sleep(5)
@@ -1465,37 +5193,166 @@ class StratagemIQ:
                 print(f"Error in update thread: {str(e)}")
                 time.sleep(10)
 
-    def get_stock_data(self, stock):
+    def apply_quotes(self, quotes):
+        """Post {symbol: (ltp, change, volume)} to every wishlist row holding the symbol.
+
+        Safe to call from any thread; the UI dispatcher applies the update.
+        """
+        for stock, (ltp, change, volume) in quotes.items():
+            # Set color based on change
+            change_value = float(change.strip('%'))
+            change_color = self.colors["positive"] if change_value >= 0 else self.colors["negative"]
+
+            for tab, rows in enumerate(self.wishlist_rows):
+                item = rows.get(stock)
+                if item is None:
+                    continue
+                # Only the price columns; the strategy column is left alone
+                self.ui.post_row(self.stock_trees[tab], item,
+                                 {"Price": ltp, "Change": change, "Volume": volume},
+                                 (change_color,))
+
+    def configure_row_tags(self):
+        """Register the up/down colour tags on every wishlist tree"""
+        for tree in self.stock_trees:
+            for color in (self.colors["positive"], self.colors["negative"]):
+                tree.tag_configure(color, foreground=color)
+
+    def insert_wishlist_row(self, tab, stock, strategy_name=""):
+        """Insert a wishlist row and record it in the symbol index"""
+        item = self.stock_trees[tab].insert("", tk.END, values=(stock, "0.00", "0.00%", "0", strategy_name))
+        self.wishlist_rows[tab][stock] = item
+        self.row_symbols[(tab, item)] = stock
+        return item
+
+    def delete_wishlist_row(self, tab, item):
+        """Delete a wishlist row and drop it from the symbol index"""
+        stock = self.row_symbols.pop((tab, item), None)
+        if stock is not None and self.wishlist_rows[tab].get(stock) == item:
+            del self.wishlist_rows[tab][stock]
+        self.stock_trees[tab].delete(item)
+
+    def get_all_subscribed_symbols(self):
+        """Deduplicated symbols across every wishlist tab"""
+        return list(dict.fromkeys(stock for wishlist in self.subscribed_instruments for stock in wishlist))
+
+    def start_tick_stream(self):
+        """Connect the WebSocket tick stream using the first account"""
+        if not self.credentials_list:
+            return
+
+        creds = self.credentials_list[0]
         try:
-            # Use the first account for market data
-            if not self.credentials_list:
-                return "0.00", "0.00%", "0"
-                
-            kite = self.buy_kite_instances[0]
-            quote = kite.quote(f"NSE:{stock}")
-            
-            ltp = quote[f"NSE:{stock}"]["last_price"]
-            change_pct = quote[f"NSE:{stock}"]["net_change_percentage"]
-            volume = quote[f"NSE:{stock}"]["volume"]
-            
-            return f"{ltp:.2f}", f"{change_pct:.2f}%", f"{volume:,}"
+            self.tick_stream = TickStream(creds["api_key"], creds["access_token"], root=TICKER_URL)
+            self.tick_stream.set_instruments(self.all_instruments)
+            self.tick_stream.add_listener(self.update_wishlist_ticks)
+            self.tick_stream.add_listener(self.update_strategy_ticks)
+            self.tick_stream.add_listener(self.update_portfolio_ticks)
+            self.tick_stream.add_order_listener(self.update_portfolio_orders)
+            self.tick_stream.update_subscriptions(self.get_all_subscribed_symbols())
+            self.tick_stream.start()
         except Exception as e:
-            print(f"Error fetching data for {stock}: {str(e)}")
-            return "0.00", "0.00%", "0"
+            self.tick_stream = None
+            self.log_transaction(f"Tick stream unavailable, using REST quotes: {str(e)}")
+
+    def sync_tick_subscriptions(self):
+        """Keep the tick stream subscribed to exactly the wishlist symbols"""
+        if self.tick_stream:
+            self.tick_stream.update_subscriptions(self.get_all_subscribed_symbols())
+
+    def update_wishlist_ticks(self, ticks):
+        """Tick listener: refresh the wishlist rows"""
+        quotes = {}
+        for tick in ticks:
+            quotes[tick["tradingsymbol"]] = (f"{tick['last_price']:.2f}",
+                                             f"{tick.get('change', 0.0):.2f}%",
+                                             f"{tick.get('volume_traded', 0):,}")
+        self.apply_quotes(quotes)
+
+    def update_strategy_ticks(self, ticks):
+        """Tick listener: publish last prices, build live candles and wake tick-triggered strategies"""
+        for tick in ticks:
+            self.stock_prices[tick["tradingsymbol"]] = tick["last_price"]
+        self.live_candles.add_ticks(ticks)
+        self.scheduler.mark_dirty([tick["tradingsymbol"] for tick in ticks])
+
+    def update_portfolio_ticks(self, ticks):
+        """Tick listener: revalue only the holdings and positions that ticked"""
+        if self.portfolio.reprice({tick["tradingsymbol"]: tick["last_price"] for tick in ticks}):
+            self.refresh_portfolio_label()
+
+    def market_data_client(self):
+        """Client of the first loaded account, used for quotes and history"""
+        account = next(iter(list(self.accounts.values())), None)
+        return account["kite"] if account else None
+
+    def get_stock_data(self, stock):
+        return self.get_batch_stock_data([stock]).get(stock, ("0.00", "0.00%", "0"))
+
+    def get_batch_stock_data(self, stocks):
+        """Fetch quotes for many symbols with one API call per chunk of QUOTE_BATCH_SIZE"""
+        results = {}
+
+        # Use the first account for market data
+        kite = self.market_data_client()
+        if kite is None:
+            return results
+
+        # Deduplicate while keeping order, so shared symbols cost one slot
+        unique_stocks = list(dict.fromkeys(stocks))
+
+        for start in range(0, len(unique_stocks), QUOTE_BATCH_SIZE):
+            chunk = unique_stocks[start:start + QUOTE_BATCH_SIZE]
+            try:
+                quotes = kite.quote([f"NSE:{stock}" for stock in chunk])
+            except Exception as e:
+                print(f"Error fetching quotes for {len(chunk)} instruments: {str(e)}")
+                continue
+
+            for stock in chunk:
+                quote = quotes.get(f"NSE:{stock}")
+                if not quote:
+                    continue
+                try:
+                    ltp = quote["last_price"]
+                    change_pct = quote["net_change_percentage"]
+                    volume = quote["volume"]
+                    results[stock] = (f"{ltp:.2f}", f"{change_pct:.2f}%", f"{volume:,}")
+                    self.stock_prices[stock] = ltp
+                    self.live_candles.add(stock, ltp, volume)
+                except Exception as e:
+                    print(f"Error fetching data for {stock}: {str(e)}")
+
+        return results
 
     def update_portfolio_value(self):
-        try:
-            total_value = 0.0
-            
-            for kite in self.buy_kite_instances:
-                holdings = kite.holdings()
-                for holding in holdings:
-                    total_value += holding["last_price"] * holding["quantity"]
-            
-            self.portfolio_value.config(text=f"₹{total_value:,.2f}")
-        except:
-            # Fail silently if we can't update
-            pass
+        """Reload every account's holdings and positions in parallel, then value them at live prices"""
+        errors = self.portfolio.load({username: account["kite"] for username, account in self.accounts.items()})
+        for username, error in errors.items():
+            print(f"Error loading portfolio for {username}: {error}")
+        
+        self.portfolio.reprice(dict(self.stock_prices))
+        self.refresh_portfolio_label()
+
+    def refresh_portfolio_label(self):
+        """Post the aggregate and per-account values to the dashboard"""
+        total_value, total_pnl, accounts = self.portfolio.summary()
+        pnl_color = self.colors["positive"] if total_pnl >= 0 else self.colors["negative"]
+        self.ui.post(self.portfolio_value.config, key="portfolio_value", text=f"₹{total_value:,.2f}")
+        self.ui.post(self.portfolio_pnl.config, key="portfolio_pnl", text=f"P&L: ₹{total_pnl:,.2f}", fg=pnl_color)
+        self.ui.post(self.show_portfolio_accounts, accounts, key="portfolio_accounts")
+
+    def show_portfolio_accounts(self, accounts):
+        for item in self.portfolio_tree.get_children():
+            self.portfolio_tree.delete(item)
+        for username, (value, pnl) in accounts.items():
+            self.portfolio_tree.insert("", tk.END, values=(username, f"₹{value:,.0f}", f"₹{pnl:,.0f}"))
+
+    def update_portfolio_orders(self, order):
+        """Order listener: a fill changes holdings or positions"""
+        # Only the tick stream's own account streams order updates; expect_fill() covers the rest
+        if order.get("status") == "COMPLETE" or order.get("filled_quantity"):
+            self.portfolio.invalidate()
 
     def buy_stock(self):
         self.execute_trade("BUY")
@@ -1513,7 +5370,7 @@ class StratagemIQ:
             messagebox.showwarning("Selection Error", "Please select an instrument to trade")
             return
             
-        stock = tree.item(selected_items[0])["values"][0]
+        stock = self.row_symbols[(current_tab, selected_items[0])]
         
         # Get quantity
         quantity = self.quantity_entry.get().strip()
@@ -1536,141 +5393,180 @@ class StratagemIQ:
             price = float(price_str)
         
         # Get selected accounts
-        selected_account = self.account_dropdown.get()
-        if not selected_account:
+        accounts = self.order_accounts()
+        if not accounts:
             messagebox.showwarning("Selection Error", "Please select an account")
             return
             
-        # Find the kite instance for the selected account
-        kite = None
-        for i, creds in enumerate(self.credentials_list):
-            if creds["username"] == selected_account:
-                kite = self.buy_kite_instances[i] if action == "BUY" else self.sell_kite_instances[i]
-                break
+        order_params = {
+            "exchange": "NSE",
+            "tradingsymbol": stock,
+            "transaction_type": action,
+            "quantity": quantity,
+            "order_type": order_type,
+            "product": "MIS",
+            "variety": "regular"
+        }
         
-        if not kite:
+        # Add price for limit orders
+        if order_type == "LIMIT" and price:
+            order_params["price"] = price
+        
+        orders, missing = self.fan_out_order(accounts, order_params)
+        if not orders:
             messagebox.showerror("Error", "Failed to find account instance")
             return
+        
+        # Place every account's order concurrently, off the Tk thread; one summary comes back when all are done
+        self.status_var.set(f"Placing {action} order for {stock} in {len(orders)} account(s)...")
+        started = time.monotonic()
+        self.order_gateway.submit_basket(
+            orders, lambda futures: self.ui.post(self.report_trade, action, stock, orders, missing, futures,
+                                                 time.monotonic() - started))
+
+    def report_trade(self, action, stock, orders, missing, futures, elapsed):
+        """Show the outcome of a manual order across its accounts (Tk thread)"""
+        self.portfolio.expect_fill()
+        lines = []
+        placed = 0
+        for username, kite, params in orders:
+            fields = {"symbol": stock, "account": username, "side": action, "quantity": params["quantity"]}
+            try:
+                order_id = futures[username].result()
+            except Exception as e:
+                line = f"[{username}] Error placing {action} order: {str(e)}"
+                self.log_transaction(line, event="order_error", **fields)
+            else:
+                line = f"[{username}] {action} order for {params['quantity']} shares of {stock} placed successfully! Order ID: {order_id}"
+                self.log_transaction(line, event="order", order_id=order_id, **fields)
+                placed += 1
+            lines.append(line)
+        for username in missing:
+            line = f"[{username}] Failed to find account instance"
+            self.log_transaction(line, event="order_error", symbol=stock, account=username, side=action)
+            lines.append(line)
             
-        # Execute trade
-        try:
-            order_params = {
-                "exchange": "NSE",
-                "tradingsymbol": stock,
-                "transaction_type": action,
-                "quantity": quantity,
-                "order_type": order_type,
-                "product": "MIS",
-                "variety": "regular"
-            }
-            
-            # Add price for limit orders
-            if order_type == "LIMIT" and price:
-                order_params["price"] = price
-            
-            order_id = kite.place_order(**order_params)
-            
-            message = f"{action} order for {quantity} shares of {stock} placed successfully! Order ID: {order_id}"
-            messagebox.showinfo("Success", message)
-            self.log_transaction(message)
-        except Exception as e:
-            message = f"Error placing {action} order: {str(e)}"
-            messagebox.showerror("Error", message)
-            self.log_transaction(message)
+        summary = f"{action} {stock}: placed in {placed} of {len(lines)} account(s) in {elapsed:.2f}s"
+        self.status_var.set(summary)
+        if placed == len(lines):
+            messagebox.showinfo("Success", summary + "\n\n" + "\n".join(lines))
+        else:
+            messagebox.showerror("Error", summary + "\n\n" + "\n".join(lines))
 
-    def log_transaction(self, message):
-        """Log transaction to file"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = f"[{timestamp}] {message}"
-        
-        # Write to log file
-        try:
-            with open("transactions.log", "a") as log_file:
-                log_file.write(log_entry + "\n")
-        except Exception as e:
-            print(f"Error writing to log file: {str(e)}")
-        
-        # Print to console for debugging
-        print(log_entry)
+    def log_transaction(self, message, event="info", **fields):
+        """Queue a transaction log record; fields such as symbol, account and order_id are stored with it"""
+        record = {"time": datetime.now().isoformat(timespec="milliseconds"), "event": event, "message": message}
+        record.update(fields)
+        self.logger.log(record)
+
+    def on_close(self):
+        """Window closed: stop strategies and flush pending saves and the transaction log before exiting"""
+        self.scheduler.stop()
+        self.wishlist_saver.close()
+        self.strategy_saver.close()
+        with self.database_lock:
+            if self.database is not None:
+                self.database.close()
+        self.log_transaction("Shutting down")
+        self.logger.close()
+        self.root.destroy()
+
+    def open_database(self):
+        """The state database, opened and migrated on first use; safe off the Tk thread"""
+        with self.database_lock:
+            if self.database is None:
+                self.database = StateDatabase()
+            return self.database
 
     def save_credentials_list(self, credentials_list):
         try:
-            with open("credentials.json", "w") as file:
-                json.dump(credentials_list, file)
+            self.open_database().save_credentials(credentials_list)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save credentials: {str(e)}")
 
-    def load_credentials_list(self):
-        try:
-            if os.path.exists("credentials.json"):
-                with open("credentials.json", "r") as file:
-                    return json.load(file)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load credentials: {str(e)}")
-        return []
-
     def save_subscribed_instruments(self):
-        try:
-            # Save wishlist names along with instruments
-            data = {
-                "wishlist_names": self.wishlist_names,
-                "instruments": self.subscribed_instruments
-            }
-            with open("wishlists.json", "w") as file:
-                json.dump(data, file)
-        except Exception as e:
-            print(f"Error saving wishlists: {str(e)}")
+        """Queue the wishlists for saving; bulk edits coalesce into one write"""
+        # Save wishlist names along with instruments
+        self.wishlist_saver.update((list(self.wishlist_names),
+                                    [list(wishlist) for wishlist in self.subscribed_instruments]))
 
     def load_subscribed_instruments(self):
+        """Read wishlists from the database; safe to call off the Tk thread"""
         try:
-            if os.path.exists("wishlists.json"):
-                with open("wishlists.json", "r") as file:
-                    data = json.load(file)
-                    self.wishlist_names = data.get("wishlist_names", [f"Wishlist {i+1}" for i in range(10)])
-                    self.subscribed_instruments = data.get("instruments", [[] for _ in range(10)])
-                    
-                    # Update tab names
-                    for i, name in enumerate(self.wishlist_names):
-                        if i < self.notebook.index("end"):
-                            self.notebook.tab(i, text=name)
-                    
-                    # Populate wishlists
-                    for i, wishlist in enumerate(self.subscribed_instruments):
-                        if i < len(self.stock_trees):
-                            tree = self.stock_trees[i]
-                            for stock in wishlist:
-                                tree.insert("", tk.END, values=(stock, "0.00", "0.00%", "0", ""))
+            return self.open_database().load_wishlists()
         except Exception as e:
             print(f"Error loading wishlists: {str(e)}")
+        return None
+
+    def show_subscribed_instruments(self, data):
+        """Apply loaded wishlists to the tabs and trees"""
+        if not data:
+            return
+        self.wishlist_names = data.get("wishlist_names", [f"Wishlist {i+1}" for i in range(10)])
+        self.subscribed_instruments = data.get("instruments", [[] for _ in range(10)])
+        
+        # Update tab names
+        for i, name in enumerate(self.wishlist_names):
+            if i < self.notebook.index("end"):
+                self.notebook.tab(i, text=name)
+        
+        # Populate wishlists
+        for i, wishlist in enumerate(self.subscribed_instruments):
+            if i < len(self.stock_trees):
+                for item in list(self.wishlist_rows[i].values()):
+                    self.delete_wishlist_row(i, item)
+                for stock in wishlist:
+                    if stock not in self.wishlist_rows[i]:
+                        self.insert_wishlist_row(i, stock)
 
     def save_strategies(self):
-        """Save strategies to file"""
-        try:
-            with open("strategies.json", "w") as file:
-                json.dump({
-                    "strategies": self.strategies,
-                    "active_strategies": [s["id"] for s in self.active_strategies]
-                }, file)
-        except Exception as e:
-            print(f"Error saving strategies: {str(e)}")
+        """Queue strategies for saving; bulk edits coalesce into one write"""
+        # Every change to strategies ends here, so the schedule follows it
+        self.sync_scheduler()
+        # Encoded now, so later edits on the Tk thread cannot race the write
+        self.strategy_saver.update(([(s["id"], json.dumps(s)) for s in self.strategies],
+                                    [s["id"] for s in self.active_strategies]))
 
     def load_strategies(self):
-        """Load strategies from file"""
+        """Read strategies from the database; safe to call off the Tk thread"""
         try:
-            if os.path.exists("strategies.json"):
-                with open("strategies.json", "r") as file:
-                    data = json.load(file)
-                    self.strategies = data.get("strategies", [])
-                    active_ids = data.get("active_strategies", [])
-                    self.active_strategies = [s for s in self.strategies if s["id"] in active_ids]
-                    
-                    # Update strategy status
-                    for strategy in self.strategies:
-                        strategy["status"] = "Enabled" if strategy in self.active_strategies else "Disabled"
-                    
-                    self.update_strategy_tree()
+            return self.open_database().load_strategies()
         except Exception as e:
             print(f"Error loading strategies: {str(e)}")
+        return None
+
+    def show_strategies(self, data):
+        """Apply loaded strategies; wishlists must already be populated"""
+        if not data:
+            return
+        self.strategies = data.get("strategies", [])
+        active_ids = data.get("active_strategies", [])
+        self.active_strategies = [s for s in self.strategies if s["id"] in active_ids]
+        
+        # Compile each strategy once; one with invalid saved params stays disabled
+        self.compiled_strategies = {}
+        for strategy in self.strategies:
+            try:
+                self.compiled_strategies[strategy["id"]] = compile_strategy(strategy["type"], strategy["params"])
+            except ValueError as e:
+                self.log_transaction(f"Strategy '{strategy['name']}' disabled: {str(e)}")
+                if strategy in self.active_strategies:
+                    self.active_strategies.remove(strategy)
+        
+        # Update strategy status; files from before timeframes run on daily bars
+        for strategy in self.strategies:
+            strategy["status"] = "Enabled" if strategy in self.active_strategies else "Disabled"
+            strategy.setdefault("timeframe", "day")
+            strategy.setdefault("trigger", "bar")
+        
+        # Show assigned strategies in the wishlist rows
+        for strategy in self.strategies:
+            for stock in strategy["instruments"]:
+                for tab, rows in enumerate(self.wishlist_rows):
+                    if stock in rows:
+                        self.stock_trees[tab].set(rows[stock], "Strategy", strategy["name"])
+        
+        self.update_strategy_tree()
 
 if __name__ == "__main__":
     root = tk.Tk()
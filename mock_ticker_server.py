@@ -0,0 +1,177 @@
+"""Local stand-in for the Kite ticker WebSocket, for running StratagemIQ offline.
+
+Serves random-walk quote ticks in Kite's binary packet format for whatever
+instrument tokens a client subscribes to, plus a small instruments CSV so the
+app can resolve symbols to tokens without reaching api.kite.trade.
+
+Usage:
+    python mock_ticker_server.py --port 8765
+
+Then start the app with:
+    KITE_TICKER_URL=ws://127.0.0.1:8765/ws
+    KITE_INSTRUMENTS_URL=http://127.0.0.1:8765/instruments
+"""
+import argparse
+import json
+import random
+import struct
+
+from autobahn.twisted.resource import WebSocketResource
+from autobahn.twisted.websocket import WebSocketServerFactory, WebSocketServerProtocol
+from twisted.internet import reactor
+from twisted.internet.task import LoopingCall
+from twisted.web.resource import Resource
+from twisted.web.server import Site
+
+# tradingsymbol -> (instrument_token, name, previous close)
+UNIVERSE = {
+    "RELIANCE": (738561, "RELIANCE INDUSTRIES", 2950.0),
+    "TCS": (2953217, "TATA CONSULTANCY SERV LT", 4100.0),
+    "INFY": (408065, "INFOSYS", 1600.0),
+    "HDFCBANK": (341249, "HDFC BANK", 1650.0),
+    "ICICIBANK": (1270529, "ICICI BANK", 1200.0),
+    "SBIN": (779521, "STATE BANK OF INDIA", 820.0),
+    "TATASTEEL": (895745, "TATA STEEL", 165.0),
+    "TATAPOWER": (877057, "TATA POWER CO", 430.0),
+    "TATAELXSI": (873217, "TATA ELXSI", 7200.0),
+    "ADANIPOWER": (4451329, "ADANI POWER", 640.0),
+}
+
+CSV_HEADER = "instrument_token,exchange_token,tradingsymbol,name,last_price,expiry,strike,tick_size,lot_size,instrument_type,segment,exchange"
+
+
+class MockMarket:
+    """Random-walk OHLCV state per instrument token"""
+
+    def __init__(self):
+        self.state = {}
+        for symbol, (token, name, close) in UNIVERSE.items():
+            self.state[token] = self._new_state(close)
+
+    def _new_state(self, close):
+        return {"close": close, "open": close, "high": close, "low": close,
+                "ltp": close, "volume": 0}
+
+    def tick(self, token):
+        state = self.state.get(token)
+        if state is None:
+            state = self.state[token] = self._new_state(100.0)
+
+        state["ltp"] = max(0.05, round(state["ltp"] * (1 + random.gauss(0, 0.0008)), 2))
+        state["high"] = max(state["high"], state["ltp"])
+        state["low"] = min(state["low"], state["ltp"])
+        state["volume"] += random.randint(1, 500)
+        return state
+
+    def quote_packet(self, token):
+        """44-byte quote-mode packet; prices are in paise"""
+        s = self.tick(token)
+        paise = lambda price: int(round(price * 100))
+        return struct.pack(">11i", token, paise(s["ltp"]), random.randint(1, 50),
+                           paise((s["high"] + s["low"]) / 2), s["volume"],
+                           random.randint(0, 100000), random.randint(0, 100000),
+                           paise(s["open"]), paise(s["high"]), paise(s["low"]), paise(s["close"]))
+
+    def ltp_packet(self, token):
+        s = self.tick(token)
+        return struct.pack(">2i", token, int(round(s["ltp"] * 100)))
+
+
+class TickerProtocol(WebSocketServerProtocol):
+    def onOpen(self):
+        self.modes = {}  # instrument token -> "ltp" / "quote" / "full"
+        self.factory.clients.add(self)
+        print(f"Client connected: {self.peer}")
+
+    def onClose(self, wasClean, code, reason):
+        self.factory.clients.discard(self)
+        print(f"Client disconnected: {self.peer} ({code})")
+
+    def onMessage(self, payload, isBinary):
+        if isBinary:
+            return
+        try:
+            message = json.loads(payload.decode("utf8"))
+            action, value = message.get("a"), message.get("v")
+        except (ValueError, AttributeError):
+            return
+
+        if action == "subscribe":
+            for token in value:
+                self.modes.setdefault(int(token), "quote")
+        elif action == "unsubscribe":
+            for token in value:
+                self.modes.pop(int(token), None)
+        elif action == "mode":
+            mode, tokens = value
+            for token in tokens:
+                if int(token) in self.modes:
+                    self.modes[int(token)] = mode
+
+    def send_ticks(self, market):
+        if not self.modes:
+            # Kite sends a 1-byte heartbeat when there is nothing to stream
+            self.sendMessage(b"\x00", isBinary=True)
+            return
+
+        packets = []
+        for token, mode in self.modes.items():
+            packet = market.ltp_packet(token) if mode == "ltp" else market.quote_packet(token)
+            packets.append(struct.pack(">H", len(packet)) + packet)
+        self.sendMessage(struct.pack(">H", len(packets)) + b"".join(packets), isBinary=True)
+
+
+class TickerFactory(WebSocketServerFactory):
+    protocol = TickerProtocol
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.clients = set()
+        self.market = MockMarket()
+
+    def broadcast(self):
+        for client in list(self.clients):
+            client.send_ticks(self.market)
+
+    def drop_all(self):
+        """Close every connection to exercise client reconnect/resubscribe"""
+        for client in list(self.clients):
+            client.sendClose()
+
+
+class InstrumentsResource(Resource):
+    isLeaf = True
+
+    def render_GET(self, request):
+        request.setHeader(b"content-type", b"text/csv")
+        rows = [CSV_HEADER]
+        for symbol, (token, name, close) in UNIVERSE.items():
+            rows.append(f"{token},{token >> 8},{symbol},{name},0,,0,0.05,1,EQ,NSE,NSE")
+        return ("\n".join(rows) + "\n").encode("utf8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Kite ticker WebSocket server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between tick batches")
+    parser.add_argument("--drop-every", type=float, default=0,
+                        help="close all connections every N seconds to test reconnects")
+    args = parser.parse_args()
+
+    factory = TickerFactory(f"ws://{args.host}:{args.port}/ws")
+    root = Resource()
+    root.putChild(b"ws", WebSocketResource(factory))
+    root.putChild(b"instruments", InstrumentsResource())
+
+    LoopingCall(factory.broadcast).start(args.interval)
+    if args.drop_every > 0:
+        LoopingCall(factory.drop_all).start(args.drop_every, now=False)
+
+    reactor.listenTCP(args.port, Site(root), interface=args.host)
+    print(f"Mock ticker on ws://{args.host}:{args.port}/ws, instruments on http://{args.host}:{args.port}/instruments")
+    reactor.run()
+
+
+if __name__ == "__main__":
+    main()
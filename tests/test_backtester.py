@@ -0,0 +1,94 @@
+"""The vectorized Backtester must agree with a plain bar-by-bar simulation."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from StratagemIQ import Backtester, compile_strategy
+
+STRATEGIES = [("Moving Average Crossover", {"short_ma": "5", "long_ma": "20"}),
+              ("RSI", {"period": "14", "overbought": "70", "oversold": "30"}),
+              ("MACD", {"fast_ema": "12", "slow_ema": "26", "signal_period": "9"})]
+
+
+def candles(index, seed):
+    rng = np.random.default_rng(seed)
+    close = np.cumprod(1 + rng.normal(0, 0.002, len(index))) * 1000
+    opens = np.concatenate([close[:1], close[:-1]]) * (1 + rng.normal(0, 0.0005, len(index)))
+    return pd.DataFrame({"open": opens, "close": close}, index=index)
+
+
+def minute_candles():
+    sessions = pd.bdate_range("2024-01-01", periods=10)
+    index = pd.DatetimeIndex(np.concatenate([
+        pd.date_range(day + pd.Timedelta(hours=9, minutes=15), periods=375, freq="min") for day in sessions]))
+    return candles(index, 5)
+
+
+def daily_candles():
+    return candles(pd.bdate_range("2023-01-01", periods=400), 6)
+
+
+def simulate(backtester, compiled, data):
+    """(net P&L per trade, equity per bar), filling one bar at a time"""
+    close = data["close"].to_numpy()
+    opens = data["open"].to_numpy()
+    signals = compiled.signal_series(close)
+    days = data.index.normalize()
+    square_off = bool((days[1:] == days[:-1]).any())
+    qty, slippage, charges = backtester.quantity, backtester.slippage, backtester.charges
+
+    position, wanted, entry, cash = 0, 0, None, 0.0
+    trades, equity = [], []
+
+    def exit_at(price):
+        nonlocal cash
+        price *= 1 - slippage * position
+        cost = charges(price * qty, position < 0)
+        trades.append(position * qty * (price - entry[0]) - entry[1] - cost)
+        cash += position * qty * price - cost
+
+    for t in range(len(close)):
+        if square_off and t and days[t] != days[t - 1]:
+            wanted = 0
+        if position != wanted:
+            if position:
+                exit_at(opens[t])
+            position = wanted
+            if position:
+                price = opens[t] * (1 + slippage * position)
+                cost = charges(price * qty, position > 0)
+                entry = (price, cost)
+                cash -= position * qty * price + cost
+        if signals[t]:
+            wanted = signals[t] if backtester.allow_short or signals[t] > 0 else 0
+        last = t == len(close) - 1 or (square_off and days[t + 1] != days[t])
+        if last and position:
+            exit_at(close[t])
+            position = 0
+        equity.append(backtester.capital + cash + position * qty * close[t])
+    return np.array(trades), np.array(equity)
+
+
+@pytest.mark.parametrize("make_candles", [minute_candles, daily_candles])
+@pytest.mark.parametrize("allow_short", [True, False])
+@pytest.mark.parametrize("strategy_type, params", STRATEGIES)
+def test_matches_bar_by_bar_simulation(make_candles, allow_short, strategy_type, params):
+    data = make_candles()
+    compiled = compile_strategy(strategy_type, params)
+    backtester = Backtester(quantity=3, allow_short=allow_short)
+
+    result = backtester.run(compiled, data)
+    trades, equity = simulate(backtester, compiled, data)
+
+    assert result["trades"] == len(trades) > 0
+    np.testing.assert_allclose(result["trade_list"]["pnl"].to_numpy(), trades, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(result["equity"].to_numpy(), equity, rtol=1e-9)
+    assert result["net_pnl"] == pytest.approx(trades.sum())
+
+
+def test_intraday_positions_are_flat_at_each_session_close():
+    data = minute_candles()
+    result = Backtester().run(compile_strategy(*STRATEGIES[0]), data)
+    trades = result["trade_list"]
+    assert (trades["entry_time"].dt.normalize() == trades["exit_time"].dt.normalize()).all()
+    assert (trades["exit_time"].dt.time <= pd.Timestamp("15:29").time()).all()
@@ -0,0 +1,77 @@
+"""Candles topped up a tail at a time must equal one full download."""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import StratagemIQ
+from StratagemIQ import CandleStore, HistoricalData
+
+
+class FakeKite:
+    """Serves daily candles from a fixed list, as kite.historical_data does"""
+
+    def __init__(self, candles):
+        self.candles = candles
+        self.calls = []
+
+    def historical_data(self, instrument_token, start, end, interval):
+        self.calls.append((start, end))
+        return [candle for candle in self.candles if start <= candle["date"] <= end]
+
+
+@pytest.fixture
+def kite():
+    rng = np.random.default_rng(3)
+    closes = np.cumprod(1 + rng.normal(0, 0.01, 366)) * 100
+    return FakeKite([{"date": datetime(2024, 1, 1) + timedelta(days=i), "open": close, "high": close * 1.01,
+                      "low": close * 0.99, "close": close, "volume": 1000 + i}
+                     for i, close in enumerate(closes)])
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    class Clock(datetime):
+        current = None
+
+        @classmethod
+        def now(cls, tz=None):
+            return cls.current
+
+    monkeypatch.setattr(StratagemIQ, "datetime", Clock)
+    return Clock
+
+
+def history(directory):
+    data = HistoricalData(CandleStore(str(directory)))
+    data.REQUEST_GAP = 0
+    return data
+
+
+def test_tail_updates_match_a_full_download(tmp_path, kite, clock):
+    start = datetime(2024, 3, 1, 10, 0)
+    incremental = history(tmp_path / "incremental")
+    for day in range(60):
+        clock.current = start + timedelta(days=day)
+        incremental.candles(kite, 1, "X", "day", days=30)
+    # After the first download, each day asks only for the candles after the last one stored
+    assert all(end - begin <= timedelta(days=2) for begin, end in kite.calls[1:])
+
+    full = history(tmp_path / "full")
+    full.candles(kite, 1, "X", "day", days=30 + 59)
+    stored = np.array(incremental.store.read("X", "day"))
+    np.testing.assert_array_equal(stored, np.array(full.store.read("X", "day")))
+    # Only completed candles are kept: the day forming at the last check is left out
+    assert stored["date"][-1] == HistoricalData._epoch(datetime(2024, 4, 28))
+
+
+def test_longer_lookback_prepends_to_match_a_full_download(tmp_path, kite, clock):
+    clock.current = datetime(2024, 9, 1, 10, 0)
+    extended = history(tmp_path / "extended")
+    extended.candles(kite, 1, "X", "day", days=30)
+    frame = extended.candles(kite, 1, "X", "day", days=200)
+
+    full = history(tmp_path / "full")
+    full.candles(kite, 1, "X", "day", days=200)
+    np.testing.assert_array_equal(np.array(extended.store.read("X", "day")), np.array(full.store.read("X", "day")))
+    assert frame.index[0] == datetime(2024, 2, 15)
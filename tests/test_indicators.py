@@ -0,0 +1,69 @@
+"""Streaming indicators must agree bar for bar with the vectorized series."""
+import numpy as np
+import pytest
+
+from StratagemIQ import (EMAIndicator, MACDIndicator, RSIIndicator, SMAIndicator,
+                         ema_series, macd_series, rsi_series, sma_series)
+
+
+@pytest.fixture
+def closes():
+    rng = np.random.default_rng(7)
+    return np.cumprod(1 + rng.normal(0, 0.02, 400)) * 100
+
+
+def streamed(indicator, closes, attribute="value"):
+    values = []
+    for close in closes:
+        indicator.update(close)
+        value = getattr(indicator, attribute)
+        values.append(np.nan if value is None else value)
+    return np.array(values)
+
+
+@pytest.mark.parametrize("period", [1, 5, 20])
+def test_sma_matches_series(closes, period):
+    np.testing.assert_allclose(streamed(SMAIndicator(period), closes), sma_series(closes, period), rtol=1e-9)
+
+
+@pytest.mark.parametrize("period", [2, 12, 26])
+def test_ema_matches_series(closes, period):
+    np.testing.assert_allclose(streamed(EMAIndicator(period), closes), ema_series(closes, period), rtol=1e-9)
+
+
+@pytest.mark.parametrize("period", [2, 14])
+def test_rsi_matches_series(closes, period):
+    np.testing.assert_allclose(streamed(RSIIndicator(period), closes), rsi_series(closes, period), rtol=1e-9)
+
+
+def test_rsi_without_losses_is_100():
+    np.testing.assert_array_equal(streamed(RSIIndicator(3), [1.0, 2.0, 3.0, 4.0, 5.0])[3:], [100.0, 100.0])
+
+
+def test_macd_matches_series(closes):
+    macd_line, signal_line = macd_series(closes, 12, 26, 9)
+    indicator = MACDIndicator(12, 26, 9)
+    macd, signal = [], []
+    for close in closes:
+        indicator.update(close)
+        macd.append(np.nan if indicator.value is None else indicator.value)
+        signal.append(np.nan if indicator.signal is None else indicator.signal)
+    np.testing.assert_allclose(macd, macd_line, rtol=1e-9)
+    np.testing.assert_allclose(signal, signal_line, rtol=1e-9)
+
+
+@pytest.mark.parametrize("make", [lambda: SMAIndicator(5), lambda: EMAIndicator(5), lambda: RSIIndicator(5)])
+def test_peek_matches_update_without_committing(closes, make):
+    indicator = make()
+    for i, close in enumerate(closes[:40]):
+        committed = make()
+        for previous in closes[:i + 1]:
+            committed.update(previous)
+        value = indicator.value
+        peeked = indicator.peek(close)
+        assert indicator.value == value
+        if committed.value is None:
+            assert peeked is None
+        else:
+            assert peeked == pytest.approx(committed.value)
+        indicator.update(close)
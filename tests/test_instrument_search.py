@@ -0,0 +1,82 @@
+"""InstrumentSearchIndex ranking and trigram substring search."""
+import random
+
+import pytest
+
+from StratagemIQ import InstrumentRegistry, InstrumentSearchIndex
+
+# (tradingsymbol, name, segment, exchange)
+INSTRUMENTS = [
+    ("TCS", "TATA CONSULTANCY SERV LT", "NSE", "NSE"),
+    ("TCS", "TATA CONSULTANCY SERV LT", "BSE", "BSE"),
+    ("TCSFUT", "TATA CONSULTANCY SERV LT", "NFO-FUT", "NFO"),
+    ("TCSL", "TCS LOGISTICS", "BSE", "BSE"),
+    ("TATAPOWER", "TATA POWER CO", "NSE", "NSE"),
+    ("TATASTEEL", "TATA STEEL", "NSE", "NSE"),
+    ("ADANIPOWER", "ADANI POWER", "NSE", "NSE"),
+    ("NIFTY 50", "NIFTY 50", "INDICES", "NSE"),
+    ("RELIANCE", "RELIANCE INDUSTRIES", "NSE", "NSE"),
+    ("POWERGRID", "POWER GRID CORP", "NSE", "NSE"),
+]
+
+
+def make_registry(instruments):
+    rows = [[str(token), str(token), symbol, name, "0", "", "0", "0.05", "1", "EQ", segment, exchange]
+            for token, (symbol, name, segment, exchange) in enumerate(instruments, start=1)]
+    return InstrumentRegistry.from_rows(InstrumentRegistry.FIELDS, rows)
+
+
+@pytest.fixture
+def index():
+    return InstrumentSearchIndex(make_registry(INSTRUMENTS))
+
+
+def found(index, query, limit=20):
+    return [(index.registry.record(row)["tradingsymbol"], index.registry.record(row)["segment"])
+            for row in index.search(query, limit)]
+
+
+def test_exact_symbol_first_and_liquid_segment_first(index):
+    assert found(index, "tcs")[:2] == [("TCS", "NSE"), ("TCS", "BSE")]
+
+
+def test_symbol_prefix_before_name_prefix(index):
+    results = found(index, "TATA")
+    assert results[:2] == [("TATAPOWER", "NSE"), ("TATASTEEL", "NSE")]
+    # TCS matches only by its name, so it ranks after every symbol prefix
+    assert results.index(("TCS", "NSE")) > 1
+
+
+def test_substring_uses_trigrams(index):
+    assert set(found(index, "POWER")) == {("POWERGRID", "NSE"), ("TATAPOWER", "NSE"), ("ADANIPOWER", "NSE")}
+    assert found(index, "POWER")[0] == ("POWERGRID", "NSE")
+    assert found(index, "STEEL") == [("TATASTEEL", "NSE")]
+
+
+def test_no_match_and_empty_query(index):
+    assert found(index, "XYZQ") == []
+    assert found(index, "   ") == []
+
+
+def test_limit(index):
+    assert len(found(index, "T", limit=3)) == 3
+
+
+def test_empty_registry():
+    assert InstrumentSearchIndex(InstrumentRegistry.empty()).search("TCS") == []
+
+
+def test_matches_brute_force():
+    rng = random.Random(3)
+    letters = "ABCDE"
+    instruments = [("".join(rng.choice(letters) for _ in range(rng.randint(3, 8))),
+                    " ".join("".join(rng.choice(letters) for _ in range(4)) for _ in range(2)),
+                    rng.choice(["NSE", "BSE", "NFO-OPT", "MCX-FUT"]), "NSE")
+                   for _ in range(3000)]
+    index = InstrumentSearchIndex(make_registry(instruments))
+    for _ in range(200):
+        query = "".join(rng.choice(letters) for _ in range(rng.randint(1, 5)))
+        expected = {row for row, (symbol, name, segment, exchange) in enumerate(instruments)
+                    if symbol.startswith(query) or name.startswith(query)
+                    or (len(query) >= 3 and (query in symbol or query in name))}
+        assert set(index.search(query, limit=len(instruments))) == expected, query
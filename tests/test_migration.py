@@ -0,0 +1,107 @@
+"""StateDatabase's schema migrations import the files earlier versions wrote."""
+import json
+
+from StratagemIQ import StateDatabase
+
+
+def write(directory, name, data):
+    path = directory / name
+    path.write_text(data if isinstance(data, str) else json.dumps(data))
+    return path
+
+
+def open_database(directory):
+    return StateDatabase(str(directory / "state.db"))
+
+
+def test_imports_legacy_files(tmp_path):
+    write(tmp_path, "credentials.json", [{"username": "AB1234", "api_key": "k"}])
+    # Before wishlists.json, each tab's symbols were in wishlist_N.json
+    write(tmp_path, "wishlist_1.json", ["RELIANCE", "TATAPOWER"])
+    write(tmp_path, "wishlist_3.json", ["SBIN"])
+    write(tmp_path, "strategies.json", {"strategies": [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}],
+                                        "active_strategies": [2]})
+    write(tmp_path, "transactions.log", "[2025-07-16 00:57:13] System initialized. Ready to trade.\nnoise\n")
+
+    database = open_database(tmp_path)
+    try:
+        assert database.connection.execute("PRAGMA user_version").fetchone()[0] == len(StateDatabase.MIGRATIONS)
+        assert database.connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert database.load_credentials() == [{"username": "AB1234", "api_key": "k"}]
+        assert database.load_wishlists()["instruments"][:3] == [["RELIANCE", "TATAPOWER"], [], ["SBIN"]]
+        assert database.load_strategies() == {"strategies": [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}],
+                                              "active_strategies": [2]}
+    finally:
+        database.close()
+
+    segment = tmp_path / "transactions.000000.jsonl"
+    assert [json.loads(line) for line in segment.read_text().splitlines()] == [
+        {"time": "2025-07-16T00:57:13.000", "event": "info", "message": "System initialized. Ready to trade."}]
+    # The originals stay where they were
+    assert (tmp_path / "credentials.json").exists() and (tmp_path / "transactions.log").exists()
+
+
+def test_wishlists_json_supersedes_per_tab_files(tmp_path):
+    write(tmp_path, "wishlists.json", {"wishlist_names": ["Core"] + [f"Wishlist {i+1}" for i in range(1, 10)],
+                                       "instruments": [[] for _ in range(10)]})
+    # Left behind by an older version; the tabs were emptied since
+    write(tmp_path, "wishlist_1.json", ["RELIANCE", "TATAPOWER"])
+
+    database = open_database(tmp_path)
+    try:
+        wishlists = database.load_wishlists()
+    finally:
+        database.close()
+    assert wishlists["wishlist_names"][0] == "Core"
+    assert wishlists["instruments"] == [[] for _ in range(10)]
+
+
+def test_migrates_once(tmp_path):
+    write(tmp_path, "credentials.json", [{"username": "first"}])
+    open_database(tmp_path).close()
+    write(tmp_path, "credentials.json", [{"username": "second"}])
+
+    database = open_database(tmp_path)
+    try:
+        assert database.load_credentials() == [{"username": "first"}]
+    finally:
+        database.close()
+
+
+def test_skips_bad_files_and_keeps_the_rest(tmp_path, capsys):
+    write(tmp_path, "credentials.json", "{not json")
+    write(tmp_path, "strategies.json", {"strategies": [{"name": "no id"}]})
+    write(tmp_path, "wishlists.json", {"wishlist_names": ["A"], "instruments": [["TCS", {"not": "a symbol"}]]})
+    write(tmp_path, "wishlist_2.json", ["INFY"])
+
+    database = open_database(tmp_path)
+    try:
+        assert database.load_credentials() == []
+        assert database.load_strategies() is None
+        # The bad wishlists.json is skipped whole; being there, it still stands in for the per-tab files
+        assert database.load_wishlists() is None
+    finally:
+        database.close()
+    output = capsys.readouterr().out
+    for name in ("credentials.json", "strategies.json", "wishlists.json"):
+        assert f"Skipping {name}" in output
+
+
+def test_account_without_username_is_skipped(tmp_path):
+    write(tmp_path, "credentials.json", [{"api_key": "k"}])
+    database = open_database(tmp_path)
+    try:
+        assert database.load_credentials() == []
+    finally:
+        database.close()
+
+
+def test_repeated_strategy_ids_are_kept(tmp_path):
+    write(tmp_path, "strategies.json", {"strategies": [{"id": 1, "name": "a"}, {"id": 1, "name": "b"}],
+                                        "active_strategies": []})
+    database = open_database(tmp_path)
+    try:
+        strategies = database.load_strategies()["strategies"]
+    finally:
+        database.close()
+    assert [(s["id"], s["name"]) for s in strategies] == [(1, "a"), (2, "b")]
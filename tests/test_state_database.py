@@ -0,0 +1,110 @@
+"""StateDatabase: incremental wishlist and strategy saves."""
+import json
+import random
+
+import pytest
+
+from StratagemIQ import StateDatabase
+
+
+@pytest.fixture
+def database(tmp_path):
+    db = StateDatabase(str(tmp_path / "state.db"))
+    yield db
+    db.close()
+
+
+def reloaded(database, load):
+    """What a fresh StateDatabase on the same file loads"""
+    fresh = StateDatabase(database.path)
+    try:
+        return getattr(fresh, load)()
+    finally:
+        fresh.close()
+
+
+def traced(database, save, *args):
+    """SQL statements a save ran, minus the transaction bracket"""
+    statements = []
+    database.connection.set_trace_callback(statements.append)
+    try:
+        save(*args)
+    finally:
+        database.connection.set_trace_callback(None)
+    return [sql for sql in statements if sql not in ("BEGIN IMMEDIATE", "COMMIT")]
+
+
+NAMES = [f"Wishlist {i+1}" for i in range(10)]
+
+
+def test_nothing_saved(database):
+    assert database.load_wishlists() is None
+    assert database.load_strategies() is None
+
+
+def test_wishlist_round_trip(database):
+    instruments = [["TCS", "INFY"], [], ["SBIN"]] + [[] for _ in range(7)]
+    database.save_wishlists(NAMES, instruments)
+    assert reloaded(database, "load_wishlists") == {"wishlist_names": NAMES, "instruments": instruments}
+
+
+def test_wishlist_saves_write_only_changes(database):
+    instruments = [["TCS", "INFY"]] + [[] for _ in range(9)]
+    database.save_wishlists(NAMES, instruments)
+
+    assert traced(database, database.save_wishlists, NAMES, instruments) == []
+
+    instruments[0].append("SBIN")
+    assert traced(database, database.save_wishlists, NAMES, instruments) == [
+        "INSERT OR REPLACE INTO wishlist_items VALUES (0, 'SBIN', 2)"]
+
+    instruments[0].remove("TCS")
+    assert traced(database, database.save_wishlists, NAMES, instruments) == [
+        "DELETE FROM wishlist_items WHERE tab = 0 AND symbol = 'TCS'"]
+
+    names = list(NAMES)
+    names[3] = "Banks"
+    assert traced(database, database.save_wishlists, names, instruments) == [
+        "INSERT OR REPLACE INTO wishlists VALUES (3, 'Banks')"]
+
+    # A reorder rewrites that tab only
+    instruments[0].reverse()
+    statements = traced(database, database.save_wishlists, names, instruments)
+    assert statements[0] == "DELETE FROM wishlist_items WHERE tab = 0"
+    assert len(statements) == 3
+    assert reloaded(database, "load_wishlists")["instruments"][0] == ["SBIN", "INFY"]
+
+
+def test_wishlist_edits_survive_reload(database):
+    rng = random.Random(5)
+    instruments = [[] for _ in range(10)]
+    for step in range(300):
+        tab = rng.randrange(10)
+        action = rng.random()
+        if action < 0.5:
+            instruments[tab].append(rng.choice("ABCDEFGH"))
+        elif action < 0.8 and instruments[tab]:
+            instruments[tab].pop(rng.randrange(len(instruments[tab])))
+        else:
+            rng.shuffle(instruments[tab])
+        instruments[tab] = list(dict.fromkeys(instruments[tab]))
+        database.save_wishlists(NAMES, instruments)
+        if step % 25 == 0:
+            assert reloaded(database, "load_wishlists")["instruments"] == instruments
+
+
+def test_strategy_saves_write_only_changes(database):
+    strategies = [(1, json.dumps({"id": 1, "name": "a"})), (2, json.dumps({"id": 2, "name": "b"}))]
+    database.save_strategies(strategies, [1])
+    assert reloaded(database, "load_strategies") == {
+        "strategies": [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}], "active_strategies": [1]}
+
+    statements = traced(database, database.save_strategies, strategies, [1, 2])
+    assert len(statements) == 1 and statements[0].startswith("INSERT OR REPLACE INTO strategies VALUES (2, 1, 1,")
+
+    assert traced(database, database.save_strategies, strategies[:1], [1]) == ["DELETE FROM strategies WHERE id = 2"]
+
+
+def test_duplicate_strategy_ids_are_rejected(database):
+    with pytest.raises(ValueError):
+        database.save_strategies([(1, "{}"), (1, "{}")], [])
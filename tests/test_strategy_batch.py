@@ -0,0 +1,60 @@
+"""Batch evaluation over many symbols must give the per-symbol path's signals."""
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from StratagemIQ import StratagemIQ, compile_strategy
+
+STRATEGIES = [("Moving Average Crossover", {"short_ma": "5", "long_ma": "20"}),
+              ("RSI", {"period": "7", "overbought": "65", "oversold": "35"}),
+              ("MACD", {"fast_ema": "6", "slow_ema": "13", "signal_period": "5"})]
+
+
+@pytest.fixture
+def candles():
+    """24 symbols of daily closes; a third start 40 bars late, so their histories are shorter"""
+    rng = np.random.default_rng(11)
+    index = pd.date_range("2024-01-01", periods=200, name="date")
+    closes = np.cumprod(1 + rng.normal(0, 0.02, (200, 24)), axis=0) * 100
+    return {f"S{i}": pd.DataFrame({"close": closes[40 if i >= 16 else 0:, i]}, index=index[40 if i >= 16 else 0:])
+            for i in range(24)}
+
+
+@pytest.mark.parametrize("strategy_type, params", STRATEGIES)
+def test_batch_matches_per_symbol(candles, strategy_type, params):
+    compiled = compile_strategy(strategy_type, params)
+    strategy = {"id": 1, "name": "test", "timeframe": "day", "instruments": list(candles)}
+    bars = {}
+    app = SimpleNamespace(evaluated_bars={}, log_transaction=print,
+                          get_historical_data=lambda symbol, days, interval: candles[symbol].iloc[:bars[symbol]])
+    indicators = {symbol: compiled.create_indicators() for symbol in candles}
+
+    fired = 0
+    for end in pd.date_range("2024-01-01", periods=200):
+        expected = {}
+        for symbol, df in candles.items():
+            bars[symbol] = int((df.index <= end).sum())
+            if not bars[symbol]:
+                continue
+            # The per-symbol path: streaming indicators fed one closed bar at a time
+            for indicator in indicators[symbol]:
+                indicator.update(float(df["close"].iloc[bars[symbol] - 1]))
+            signal = compiled.evaluate(indicators[symbol])
+            if signal:
+                expected[symbol] = "BUY" if signal > 0 else "SELL"
+
+        assert StratagemIQ.evaluate_strategy_batch(app, strategy, compiled, list(candles)) == expected
+        fired += len(expected)
+    assert fired > 0
+
+
+def test_batch_skips_symbols_without_a_new_bar(candles):
+    compiled = compile_strategy(*STRATEGIES[0])
+    strategy = {"id": 1, "name": "test", "timeframe": "day", "instruments": list(candles)}
+    app = SimpleNamespace(evaluated_bars={}, log_transaction=print,
+                          get_historical_data=lambda symbol, days, interval: candles[symbol])
+    StratagemIQ.evaluate_strategy_batch(app, strategy, compiled, list(candles))
+    assert app.evaluated_bars == {(1, symbol): df.index[-1] for symbol, df in candles.items()}
+    assert StratagemIQ.evaluate_strategy_batch(app, strategy, compiled, list(candles)) == {}